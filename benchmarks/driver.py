@@ -0,0 +1,230 @@
+"""
+Drive every scenario against one seeded database and write the results as JSON.
+
+Runs in its own process so DATABASE_URL is read before the app is imported
+and peak RSS is measured for this run only:
+
+    python -m benchmarks.driver --database bench.db --transport asgi \
+        --concurrency 1,16 --requests 200 --output run.json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import resource
+import socket
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List
+
+import httpx
+
+from benchmarks.scenarios import SCENARIOS, BenchContext, Scenario
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(int(round(fraction * (len(sorted_values) - 1))), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+def peak_rss_mb(transport: str) -> float:
+    # ru_maxrss is in kilobytes on Linux; the uvicorn server is a child process
+    who = resource.RUSAGE_CHILDREN if transport == "uvicorn" else resource.RUSAGE_SELF
+    return round(resource.getrusage(who).ru_maxrss / 1024, 1)
+
+
+async def read_events(
+    client: httpx.AsyncClient, method: str, url: str, kwargs: Dict[str, Any], count: int
+) -> httpx.Response:
+    """Connect to a server-sent event stream, read `count` events, disconnect."""
+    async with client.stream(method, url, **kwargs) as response:
+        if response.status_code == 200:
+            events = 0
+            async for line in response.aiter_lines():
+                # every event has one data line, keep-alive comments have none
+                if line.startswith("data: "):
+                    events += 1
+                    if events == count:
+                        break
+    return response
+
+
+async def run_scenario(
+    client: httpx.AsyncClient,
+    ctx: BenchContext,
+    scenario: Scenario,
+    concurrency: int,
+    requests: int,
+) -> Dict[str, Any]:
+    if scenario.max_concurrency:
+        concurrency = min(concurrency, scenario.max_concurrency)
+    if scenario.max_requests:
+        requests = min(requests, scenario.max_requests)
+
+    latencies: List[float] = []
+    errors = 0
+    remaining = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for _ in remaining:
+            method, url, kwargs = scenario.request(ctx)
+            started = time.perf_counter()
+            if scenario.stream_events:
+                response = await read_events(
+                    client, method, url, kwargs, scenario.stream_events
+                )
+            else:
+                response = await client.request(method, url, **kwargs)
+            latencies.append(time.perf_counter() - started)
+
+            if response.status_code not in scenario.expected_statuses:
+                errors += 1
+            if scenario.on_response:
+                scenario.on_response(ctx, response)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "scenario": scenario.name,
+        "route": scenario.route,
+        "concurrency": concurrency,
+        "requests": requests,
+        "errors": errors,
+        "throughput_rps": round(requests / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {
+            "p50": round(percentile(latencies, 0.50) * 1000, 3),
+            "p90": round(percentile(latencies, 0.90) * 1000, 3),
+            "p99": round(percentile(latencies, 0.99) * 1000, 3),
+            "max": round(latencies[-1] * 1000, 3) if latencies else 0.0,
+        },
+    }
+
+
+async def run_all(
+    client: httpx.AsyncClient,
+    ctx: BenchContext,
+    transport: str,
+    concurrency_levels: List[int],
+    requests: int,
+    scenario_names: List[str],
+) -> List[Dict[str, Any]]:
+    # warm up connections, caches and the SQLite page cache
+    for _ in range(10):
+        await client.get("/api/v1/health_check")
+
+    results = []
+    for concurrency in concurrency_levels:
+        for scenario in SCENARIOS:
+            if scenario_names and scenario.name not in scenario_names:
+                continue
+            if transport not in scenario.transports:
+                continue
+            results.append(
+                await run_scenario(client, ctx, scenario, concurrency, requests)
+            )
+    return results
+
+
+async def run_asgi(ctx: BenchContext, *args) -> List[Dict[str, Any]]:
+    from src.main import app
+
+    # ASGITransport does not send lifespan events, so run startup here
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://bench"
+        ) as client:
+            return await run_all(client, ctx, "asgi", *args)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def run_uvicorn(ctx: BenchContext, *args) -> List[Dict[str, Any]]:
+    port = _free_port()
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "src.main:app",
+            "--port",
+            str(port),
+            "--log-level",
+            "warning",
+            "--no-access-log",
+        ],
+        env=os.environ.copy(),
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    limits = httpx.Limits(max_connections=max(args[0]), max_keepalive_connections=None)
+
+    try:
+        async with httpx.AsyncClient(
+            base_url=base_url, limits=limits, timeout=120
+        ) as client:
+            for _ in range(300):
+                try:
+                    await client.get("/api/v1/health_check")
+                    break
+                except httpx.TransportError:
+                    await asyncio.sleep(0.1)
+            else:
+                raise RuntimeError("uvicorn did not start")
+
+            return await run_all(client, ctx, "uvicorn", *args)
+    finally:
+        server.terminate()
+        server.wait()
+
+
+TRANSPORTS = {"asgi": run_asgi, "uvicorn": run_uvicorn}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the benchmark scenarios once")
+    parser.add_argument("--database", required=True)
+    parser.add_argument("--transport", choices=sorted(TRANSPORTS), default="asgi")
+    parser.add_argument("--concurrency", default="1,16")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--scenarios", default="", help="comma separated names")
+    parser.add_argument("--output", required=True, help="JSON file to write")
+    args = parser.parse_args()
+
+    # one log line per request would dominate the measurement
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    concurrency_levels = [int(level) for level in args.concurrency.split(",")]
+    scenario_names = [name for name in args.scenarios.split(",") if name]
+
+    ctx = BenchContext.from_database(args.database)
+    results = asyncio.run(
+        TRANSPORTS[args.transport](
+            ctx, concurrency_levels, args.requests, scenario_names
+        )
+    )
+    with open(args.output, "w") as output:
+        json.dump(
+            {
+                "transport": args.transport,
+                "peak_rss_mb": peak_rss_mb(args.transport),
+                "scenarios": results,
+            },
+            output,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Wall time of test files under each TEST_DB_MODE of tests/conftest.py:
+"file" (create_all / drop_all on test_unit.db around every test) against
+"rollback" (schema built once in memory, every test rolled back).
+
+    python -m benchmarks.fixture_modes --runs 3 --workers 4
+"""
+
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+DEFAULT_TEST_FILES = (
+    "tests/test_candidate.py",
+    "tests/test_interview.py",
+    "tests/test_feedback.py",
+)
+
+# "12 passed, 10 warnings in 1.23s"
+PYTEST_SUMMARY = re.compile(r"(\d+) passed.* in ([\d.]+)s")
+
+
+def run_tests(
+    mode: str, test_files: List[str], workers: Optional[int] = None
+) -> Dict[str, Any]:
+    """Run the test files once in a new interpreter with the given mode."""
+    command = [sys.executable, "-m", "pytest", "-q", "-p", "no:cacheprovider"]
+    if workers:
+        command += ["-n", str(workers)]
+
+    started_at = time.perf_counter()
+    completed = subprocess.run(
+        command + list(test_files),
+        env={**os.environ, "TEST_DB_MODE": mode},
+        capture_output=True,
+        text=True,
+    )
+    wall_seconds = time.perf_counter() - started_at
+
+    summary = PYTEST_SUMMARY.search(completed.stdout.strip().splitlines()[-1])
+    if completed.returncode != 0 or summary is None:
+        raise RuntimeError(f"tests failed in {mode} mode:\n{completed.stdout}")
+    return {
+        "tests": int(summary.group(1)),
+        "pytest_seconds": float(summary.group(2)),
+        "wall_seconds": wall_seconds,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("test_files", nargs="*", default=list(DEFAULT_TEST_FILES))
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument(
+        "--workers", type=int, help="pytest-xdist workers, in both modes"
+    )
+    parser.add_argument("--output")
+    args = parser.parse_args(argv)
+
+    report: Dict[str, Any] = {"test_files": args.test_files, "workers": args.workers}
+    for mode in ("file", "rollback"):
+        runs = [
+            run_tests(mode, args.test_files, args.workers) for _ in range(args.runs)
+        ]
+        report[mode] = {
+            "tests": runs[0]["tests"],
+            **{
+                key: statistics.median(run[key] for run in runs)
+                for key in ("pytest_seconds", "wall_seconds")
+            },
+        }
+    report["speedup"] = (
+        report["file"]["pytest_seconds"] / report["rollback"]["pytest_seconds"]
+    )
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(output)
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
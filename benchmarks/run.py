@@ -0,0 +1,186 @@
+"""
+Seed databases at several sizes, run every scenario over each transport and
+write the results as JSON, optionally compared against a stored baseline.
+
+    python -m benchmarks.run --sizes 1000,100000 --concurrency 1,16,64 \
+        --output benchmarks/results.json --baseline benchmarks/baseline.json
+
+Exits with status 1 when a scenario regressed beyond --tolerance.
+"""
+
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+from benchmarks.seed import seed_database
+
+DATA_DIR = Path(__file__).parent / ".data"
+
+
+def seeded_database(candidates: int, interviews: int) -> Path:
+    """
+    Seeded databases are cached by size, every run works on a fresh copy
+    so the write scenarios do not skew later runs.
+    """
+    DATA_DIR.mkdir(exist_ok=True)
+    seed_path = DATA_DIR / f"seed-{candidates}-{interviews}.db"
+    if not seed_path.exists():
+        partial_path = seed_path.with_suffix(".partial")
+        partial_path.unlink(missing_ok=True)
+        asyncio.run(seed_database(str(partial_path), candidates, interviews))
+        partial_path.rename(seed_path)
+
+    run_path = DATA_DIR / "run.db"
+    for suffix in ("", "-wal", "-shm"):
+        Path(f"{run_path}{suffix}").unlink(missing_ok=True)
+    shutil.copyfile(seed_path, run_path)
+    return run_path
+
+
+def run_driver(database: Path, transport: str, args) -> Dict[str, Any]:
+    env = os.environ.copy()
+    env["DATABASE_URL"] = f"sqlite+aiosqlite:///{database}"
+    # the single worker brings cached seeds from older schemas up to date
+    env["SCHEMA_STARTUP_MODE"] = "upgrade"
+    output = database.with_suffix(".json")
+    subprocess.run(
+        [
+            sys.executable,
+            "-m",
+            "benchmarks.driver",
+            "--database",
+            str(database),
+            "--transport",
+            transport,
+            "--concurrency",
+            args.concurrency,
+            "--requests",
+            str(args.requests),
+            "--scenarios",
+            args.scenarios,
+            "--output",
+            str(output),
+        ],
+        env=env,
+        check=True,
+    )
+    return json.loads(output.read_text())
+
+
+def result_key(size: int, transport: str, scenario: Dict[str, Any]) -> Tuple:
+    return (size, transport, scenario["scenario"], scenario["concurrency"])
+
+
+def flatten(report: Dict[str, Any]) -> Dict[Tuple, Dict[str, Any]]:
+    return {
+        result_key(run["candidates"], run["transport"], scenario): scenario
+        for run in report["runs"]
+        for scenario in run["scenarios"]
+    }
+
+
+def compare(
+    report: Dict[str, Any], baseline: Dict[str, Any], tolerance: float
+) -> List[str]:
+    """
+    A scenario regressed when its throughput dropped, or its p99 latency
+    rose, by more than `tolerance` relative to the baseline.
+    """
+    regressions = []
+    baseline_results = flatten(baseline)
+    for key, current in flatten(report).items():
+        previous = baseline_results.get(key)
+        if previous is None:
+            continue
+
+        label = "size={} transport={} scenario={} concurrency={}".format(*key)
+        if current["throughput_rps"] < previous["throughput_rps"] * (1 - tolerance):
+            regressions.append(
+                f"{label}: throughput {previous['throughput_rps']} -> "
+                f"{current['throughput_rps']} rps"
+            )
+        if current["latency_ms"]["p99"] > previous["latency_ms"]["p99"] * (
+            1 + tolerance
+        ):
+            regressions.append(
+                f"{label}: p99 {previous['latency_ms']['p99']} -> "
+                f"{current['latency_ms']['p99']} ms"
+            )
+        if current["errors"] > previous["errors"]:
+            regressions.append(
+                f"{label}: errors {previous['errors']} -> {current['errors']}"
+            )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the API benchmark suite")
+    parser.add_argument("--sizes", default="1000,100000", help="candidate counts")
+    parser.add_argument("--interviews", type=int, default=2, help="per candidate")
+    parser.add_argument("--concurrency", default="1,16,64")
+    parser.add_argument("--requests", type=int, default=500, help="per scenario")
+    parser.add_argument("--transports", default="asgi,uvicorn")
+    parser.add_argument("--scenarios", default="", help="comma separated names")
+    parser.add_argument("--output", default="benchmarks/results.json")
+    parser.add_argument("--baseline", help="results file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    parser.add_argument(
+        "--update-baseline",
+        action="store_true",
+        help="write the results to --baseline instead of comparing",
+    )
+    args = parser.parse_args()
+
+    runs = []
+    for size in [int(size) for size in args.sizes.split(",")]:
+        for transport in args.transports.split(","):
+            database = seeded_database(size, args.interviews)
+            run = run_driver(database, transport, args)
+            run.update(candidates=size, interviews_per_candidate=args.interviews)
+            runs.append(run)
+
+            for scenario in run["scenarios"]:
+                print(
+                    f"{size:>9} {transport:<8} {scenario['scenario']:<26} "
+                    f"c={scenario['concurrency']:<3} "
+                    f"{scenario['throughput_rps']:>9} rps "
+                    f"p99={scenario['latency_ms']['p99']} ms "
+                    f"errors={scenario['errors']}"
+                )
+
+    report = {
+        "created_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "runs": runs,
+    }
+    Path(args.output).write_text(json.dumps(report, indent=2))
+    print(f"results written to {args.output}")
+
+    if args.baseline and args.update_baseline:
+        Path(args.baseline).write_text(json.dumps(report, indent=2))
+        print(f"baseline updated: {args.baseline}")
+    elif args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())
+        for key in sorted(flatten(report).keys() - flatten(baseline).keys()):
+            print(
+                "NOT IN BASELINE size={} transport={} scenario={} "
+                "concurrency={}".format(*key)
+            )
+        regressions = compare(report, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
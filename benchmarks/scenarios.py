@@ -0,0 +1,385 @@
+"""
+One benchmark scenario per API route.
+
+Scenarios run in the order listed: the write scenarios feed the ids they
+create to the scenarios that consume rows (delete, bulk delete, feedback), so
+every scenario only touches rows that are valid for it.
+"""
+
+import itertools
+import json
+import random
+import sqlite3
+import uuid
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+import httpx
+
+Request = Tuple[str, str, Dict[str, Any]]
+
+
+@dataclass
+class BenchContext:
+    candidate_ids: List[str]
+    interview_ids_with_feedback: List[int]
+    interviewers: List[str]
+    max_change_seq: int
+    rng: random.Random = field(default_factory=lambda: random.Random(42))
+    created_candidate_ids: Deque[str] = field(default_factory=deque)
+    created_interview_ids: Deque[int] = field(default_factory=deque)
+    # per bulk created batch: half of its ids, and the position of all of it
+    created_batch_ids: Deque[List[str]] = field(default_factory=deque)
+    created_batch_positions: Deque[str] = field(default_factory=deque)
+    counter: Any = field(default_factory=itertools.count)
+
+    @classmethod
+    def from_database(cls, database: str, sample_size: int = 10000) -> "BenchContext":
+        connection = sqlite3.connect(database)
+        try:
+            candidate_ids = [
+                row[0]
+                for row in connection.execute(
+                    "SELECT id FROM candidates ORDER BY random() LIMIT ?",
+                    (sample_size,),
+                )
+            ]
+            interview_ids = [
+                row[0]
+                for row in connection.execute(
+                    "SELECT interview_id FROM feedbacks ORDER BY random() LIMIT ?",
+                    (sample_size,),
+                )
+            ]
+            interviewers = [
+                row[0]
+                for row in connection.execute(
+                    "SELECT DISTINCT interviewer FROM interviews LIMIT ?",
+                    (sample_size,),
+                )
+            ]
+            max_change_seq = connection.execute(
+                "SELECT coalesce(max(seq), 0) FROM change_log"
+            ).fetchone()[0]
+        finally:
+            connection.close()
+
+        return cls(candidate_ids, interview_ids, interviewers, max_change_seq)
+
+    def candidate_id(self) -> str:
+        return self.rng.choice(self.candidate_ids)
+
+    def unique_email(self) -> str:
+        return f"bench-{uuid.uuid4().hex}@example.com"
+
+
+@dataclass(frozen=True)
+class Scenario:
+    name: str
+    route: str
+    request: Callable[[BenchContext], Request]
+    expected_statuses: Tuple[int, ...] = (200,)
+    on_response: Optional[Callable[[BenchContext, httpx.Response], None]] = None
+    # cap for heavy routes such as the full export
+    max_requests: Optional[int] = None
+    max_concurrency: Optional[int] = None
+    # server-sent event streams: read this many events, then disconnect
+    stream_events: Optional[int] = None
+    transports: Tuple[str, ...] = ("asgi", "uvicorn")
+
+
+def _new_candidate(ctx: BenchContext) -> Dict[str, Any]:
+    return {
+        "name": "Bench Candidate",
+        "email": ctx.unique_email(),
+        "position": "Python Developer",
+        "status": "applied",
+    }
+
+
+def _remember_candidate(ctx: BenchContext, response: httpx.Response) -> None:
+    if response.status_code == 201:
+        ctx.created_candidate_ids.append(response.json()["data"]["id"])
+
+
+def _remember_interview(ctx: BenchContext, response: httpx.Response) -> None:
+    if response.status_code == 201:
+        ctx.created_interview_ids.append(response.json()["data"]["id"])
+
+
+def _new_batch(ctx: BenchContext) -> List[Dict[str, Any]]:
+    # a position of its own, which the bulk delete by filter selects
+    position = f"Bench Batch {next(ctx.counter)}"
+    return [{**_new_candidate(ctx), "position": position} for _ in range(100)]
+
+
+def _remember_batch(ctx: BenchContext, response: httpx.Response) -> None:
+    if response.status_code != 200:
+        return
+    ids = [
+        result["id"]
+        for result in response.json()["data"]["results"]
+        if result["status"] == "created"
+    ]
+    # bulk_delete_by_ids deletes the first half, bulk_delete_by_filter the rest
+    ctx.created_batch_ids.append(ids[: len(ids) // 2])
+    ctx.created_batch_positions.append(
+        json.loads(response.request.content)[0]["position"]
+    )
+
+
+def _pop_or_missing(pool: Deque[Any], missing: Any) -> Any:
+    return pool.popleft() if pool else missing
+
+
+def _status_flip(ctx: BenchContext) -> Dict[str, Any]:
+    # moves the seeded testers of one status to the other and back
+    from_status, to_status = ctx.rng.sample(["applied", "interviewing"], 2)
+    return {
+        "filter": {"status": from_status, "position": "Tester"},
+        "status": to_status,
+    }
+
+
+def _change_since(ctx: BenchContext) -> int:
+    return ctx.rng.randint(0, max(ctx.max_change_seq - 100, 0))
+
+
+SCENARIOS: List[Scenario] = [
+    Scenario(
+        "health_check",
+        "GET /api/v1/health_check",
+        lambda ctx: ("GET", "/api/v1/health_check", {}),
+    ),
+    Scenario(
+        "list_candidates",
+        "GET /api/v1/candidates/",
+        lambda ctx: ("GET", "/api/v1/candidates/", {"params": {"limit": 50}}),
+    ),
+    Scenario(
+        "list_candidates_filtered",
+        "GET /api/v1/candidates/?status=&position=",
+        lambda ctx: (
+            "GET",
+            "/api/v1/candidates/",
+            {
+                "params": {
+                    "limit": 50,
+                    "status": "interviewing",
+                    "position": "Tester",
+                }
+            },
+        ),
+    ),
+    Scenario(
+        "list_candidates_by_rating",
+        "GET /api/v1/candidates/?sort=average_rating",
+        lambda ctx: (
+            "GET",
+            "/api/v1/candidates/",
+            {"params": {"limit": 50, "sort": "average_rating"}},
+        ),
+    ),
+    Scenario(
+        "search_candidates",
+        "GET /api/v1/candidates/search",
+        lambda ctx: (
+            "GET",
+            "/api/v1/candidates/search",
+            {"params": {"q": f"feedback {ctx.rng.randrange(1000)}", "limit": 20}},
+        ),
+    ),
+    Scenario(
+        "export_candidates",
+        "GET /api/v1/candidates/export",
+        lambda ctx: ("GET", "/api/v1/candidates/export", {}),
+        max_requests=3,
+        max_concurrency=1,
+    ),
+    Scenario(
+        "create_candidate",
+        "POST /api/v1/candidates/",
+        lambda ctx: ("POST", "/api/v1/candidates/", {"json": _new_candidate(ctx)}),
+        expected_statuses=(201,),
+        on_response=_remember_candidate,
+    ),
+    Scenario(
+        "bulk_create_candidates",
+        "POST /api/v1/candidates/bulk",
+        lambda ctx: (
+            "POST",
+            "/api/v1/candidates/bulk",
+            {"json": _new_batch(ctx)},
+        ),
+        on_response=_remember_batch,
+    ),
+    Scenario(
+        "update_candidate_status",
+        "PATCH /api/v1/candidates/{id}",
+        lambda ctx: (
+            "PATCH",
+            f"/api/v1/candidates/{ctx.candidate_id()}",
+            {"json": {"status": ctx.rng.choice(["interviewing", "applied"])}},
+        ),
+    ),
+    Scenario(
+        "bulk_update_by_ids",
+        "PATCH /api/v1/candidates/bulk {ids}",
+        lambda ctx: (
+            "PATCH",
+            "/api/v1/candidates/bulk",
+            {
+                "json": {
+                    "ids": ctx.rng.sample(
+                        ctx.candidate_ids, min(100, len(ctx.candidate_ids))
+                    ),
+                    "status": ctx.rng.choice(["interviewing", "applied"]),
+                }
+            },
+        ),
+    ),
+    Scenario(
+        "bulk_update_by_filter",
+        "PATCH /api/v1/candidates/bulk {filter}",
+        lambda ctx: (
+            "PATCH",
+            "/api/v1/candidates/bulk",
+            {"json": _status_flip(ctx)},
+        ),
+        # a fifth of the statuses of a position: thousands of rows per request
+        max_requests=20,
+        max_concurrency=1,
+    ),
+    Scenario(
+        "list_candidate_interviews",
+        "GET /api/v1/candidates/{candidate_id}/interviews",
+        lambda ctx: ("GET", f"/api/v1/candidates/{ctx.candidate_id()}/interviews", {}),
+    ),
+    Scenario(
+        "create_schedule_interview",
+        "POST /api/v1/candidates/{candidate_id}/interviews",
+        lambda ctx: (
+            "POST",
+            f"/api/v1/candidates/{ctx.candidate_id()}/interviews",
+            {
+                "json": {
+                    "interviewer": f"bench{next(ctx.counter)}@example.com",
+                    "scheduled_at": "2030-01-01T09:00:00",
+                }
+            },
+        ),
+        expected_statuses=(201,),
+        on_response=_remember_interview,
+    ),
+    Scenario(
+        "list_free_slots",
+        "GET /api/v1/interviewers/{interviewer}/free-slots",
+        lambda ctx: (
+            "GET",
+            f"/api/v1/interviewers/{ctx.rng.choice(ctx.interviewers)}/free-slots",
+            {
+                "params": {
+                    "start": "2024-01-01T00:00:00",
+                    "end": "2024-01-08T00:00:00",
+                    "duration_minutes": 60,
+                }
+            },
+        ),
+    ),
+    Scenario(
+        "submit_feedback",
+        "POST /api/v1/interviews/{interview_id}/feedback",
+        lambda ctx: (
+            "POST",
+            f"/api/v1/interviews/{_pop_or_missing(ctx.created_interview_ids, 0)}"
+            "/feedback",
+            {"json": {"rating": 4, "comment": "Benchmark feedback"}},
+        ),
+        expected_statuses=(201,),
+    ),
+    Scenario(
+        "view_feedback",
+        "GET /api/v1/interviews/{interview_id}/feedback",
+        lambda ctx: (
+            "GET",
+            "/api/v1/interviews/"
+            f"{ctx.rng.choice(ctx.interview_ids_with_feedback)}/feedback",
+            {},
+        ),
+    ),
+    Scenario(
+        "list_changes",
+        "GET /api/v1/changes",
+        lambda ctx: (
+            "GET",
+            "/api/v1/changes",
+            {"params": {"since": _change_since(ctx), "limit": 100}},
+        ),
+    ),
+    Scenario(
+        "stream_changes",
+        "GET /api/v1/changes/stream",
+        lambda ctx: (
+            "GET",
+            "/api/v1/changes/stream",
+            {"params": {"since": _change_since(ctx)}},
+        ),
+        # at least 100 changes follow since, read from the change log
+        stream_events=50,
+        # httpx's ASGITransport returns a response once the app has sent all
+        # of it, which a stream never does
+        transports=("uvicorn",),
+    ),
+    Scenario(
+        "analytics_funnel",
+        "GET /api/v1/analytics/funnel",
+        lambda ctx: ("GET", "/api/v1/analytics/funnel", {}),
+    ),
+    Scenario(
+        "analytics_interviewers",
+        "GET /api/v1/analytics/interviewers",
+        lambda ctx: ("GET", "/api/v1/analytics/interviewers", {}),
+    ),
+    Scenario(
+        "analytics_time_to_hire",
+        "GET /api/v1/analytics/time-to-hire",
+        lambda ctx: ("GET", "/api/v1/analytics/time-to-hire", {}),
+    ),
+    Scenario(
+        "bulk_delete_by_ids",
+        "POST /api/v1/candidates/bulk-delete {ids}",
+        lambda ctx: (
+            "POST",
+            "/api/v1/candidates/bulk-delete",
+            {"json": {"ids": _pop_or_missing(ctx.created_batch_ids, ["none"])}},
+        ),
+    ),
+    Scenario(
+        "bulk_delete_by_filter",
+        "POST /api/v1/candidates/bulk-delete {filter}",
+        lambda ctx: (
+            "POST",
+            "/api/v1/candidates/bulk-delete",
+            {
+                "json": {
+                    "filter": {
+                        "position": _pop_or_missing(
+                            ctx.created_batch_positions, "none"
+                        )
+                    }
+                }
+            },
+        ),
+    ),
+    Scenario(
+        "delete_candidate",
+        "DELETE /api/v1/candidates/{id}",
+        lambda ctx: (
+            "DELETE",
+            f"/api/v1/candidates/{_pop_or_missing(ctx.created_candidate_ids, 'none')}",
+            {},
+        ),
+        expected_statuses=(204,),
+    ),
+]
@@ -0,0 +1,130 @@
+"""
+Seed a SQLite database for the benchmarks.
+
+    python -m benchmarks.seed --database benchmarks/.data/bench.db --candidates 100000
+"""
+
+import argparse
+import asyncio
+import datetime
+import itertools
+import time
+
+from sqlalchemy import insert
+
+from settings import DB_ENGINE_PROFILES, logger
+from src.database import (
+    CandidateModel,
+    FeedbackModel,
+    InterviewModel,
+    create_engine_from_profile,
+)
+from src.migrations import upgrade
+from src.models.models import CandidateStatus
+
+STATUSES = list(CandidateStatus)
+POSITIONS = ["Python Developer", "Tester", "Data Engineer", "Designer", "DevOps"]
+INTERVIEWERS = [f"interviewer{number:03d}@example.com" for number in range(200)]
+FIRST_SCHEDULED_AT = datetime.datetime(2024, 1, 1, 8, 0)
+FIRST_CREATED_AT = FIRST_SCHEDULED_AT - datetime.timedelta(days=30)
+
+
+def candidate_id(index: int) -> str:
+    return f"bench-{index:09d}"
+
+
+async def seed_database(
+    database: str,
+    candidates: int,
+    interviews_per_candidate: int = 2,
+    feedback_ratio: float = 0.5,
+    batch_size: int = 10000,
+) -> None:
+    started = time.perf_counter()
+    engine = create_engine_from_profile(
+        f"sqlite+aiosqlite:///{database}", DB_ENGINE_PROFILES["high-throughput"]
+    )
+
+    async with engine.begin() as conn:
+        await conn.run_sync(upgrade)
+
+    interview_ids = itertools.count(1)
+    feedback_every = round(1 / feedback_ratio) if feedback_ratio else 0
+
+    for start in range(0, candidates, batch_size):
+        indexes = range(start, min(start + batch_size, candidates))
+        candidate_rows = []
+        for index in indexes:
+            status = STATUSES[index % len(STATUSES)]
+            created_at = FIRST_CREATED_AT + datetime.timedelta(minutes=index)
+            candidate_rows.append(
+                {
+                    "id": candidate_id(index),
+                    "name": f"Candidate {index}",
+                    "email": f"candidate{index}@example.com",
+                    "position": POSITIONS[index % len(POSITIONS)],
+                    "status": status,
+                    "created_at": created_at,
+                    "hired_at": (
+                        created_at + datetime.timedelta(days=7 + index % 50)
+                        if status == CandidateStatus.hired
+                        else None
+                    ),
+                }
+            )
+
+        interview_rows = []
+        feedback_rows = []
+        for index in indexes:
+            for number in range(interviews_per_candidate):
+                interview_id = next(interview_ids)
+                interview_rows.append(
+                    {
+                        "id": interview_id,
+                        "candidate_id": candidate_id(index),
+                        "interviewer": INTERVIEWERS[interview_id % len(INTERVIEWERS)],
+                        "scheduled_at": FIRST_SCHEDULED_AT
+                        + datetime.timedelta(hours=interview_id),
+                        "result": "PASS" if interview_id % 3 else "FAIL",
+                    }
+                )
+                if feedback_every and interview_id % feedback_every == 0:
+                    feedback_rows.append(
+                        {
+                            "interview_id": interview_id,
+                            "rating": interview_id % 5 + 1,
+                            "comment": f"Feedback for interview {interview_id}",
+                        }
+                    )
+
+        async with engine.begin() as conn:
+            await conn.execute(insert(CandidateModel.__table__), candidate_rows)
+            if interview_rows:
+                await conn.execute(insert(InterviewModel.__table__), interview_rows)
+            if feedback_rows:
+                await conn.execute(insert(FeedbackModel.__table__), feedback_rows)
+
+    await engine.dispose()
+    logger.info(
+        f"seeded {candidates} candidates into {database} "
+        f"in {time.perf_counter() - started:.1f}s"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Seed a benchmark database")
+    parser.add_argument("--database", required=True, help="SQLite file to create")
+    parser.add_argument("--candidates", type=int, default=1000)
+    parser.add_argument("--interviews", type=int, default=2)
+    parser.add_argument("--feedback-ratio", type=float, default=0.5)
+    args = parser.parse_args()
+
+    asyncio.run(
+        seed_database(
+            args.database, args.candidates, args.interviews, args.feedback_ratio
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""
+Cold start of one app worker, every run in a fresh interpreter: the time to
+import src.main, to run the lifespan startup (SCHEMA_STARTUP_MODE) and to
+answer the first request, plus the slowest imports from python -X importtime.
+
+    python -m benchmarks.startup --database bench.db --mode check --runs 5 \
+        --output startup.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+
+# budgets asserted by tests/test_startup.py, a few times what a laptop needs
+IMPORT_BUDGET_SECONDS = 3.0
+FIRST_REQUEST_BUDGET_SECONDS = 1.0
+
+FIRST_PARTY_PACKAGES = ("src", "settings")
+
+
+def _environment(database: str, mode: str) -> Dict[str, str]:
+    env = dict(os.environ)
+    env["DATABASE_URL"] = f"sqlite+aiosqlite:///{database}"
+    env["SCHEMA_STARTUP_MODE"] = mode
+    env["PYTHONPATH"] = os.pathsep.join(
+        filter(None, [os.getcwd(), env.get("PYTHONPATH")])
+    )
+    return env
+
+
+async def _cold_start() -> Dict[str, Any]:
+    import httpx
+
+    started_at = time.perf_counter()
+    from src.main import app
+
+    imported_at = time.perf_counter()
+
+    async with app.router.lifespan_context(app):
+        ready_at = time.perf_counter()
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://bench"
+        ) as client:
+            response = await client.get("/api/v1/candidates/", params={"limit": 1})
+        answered_at = time.perf_counter()
+
+    return {
+        "import_seconds": imported_at - started_at,
+        "startup_seconds": ready_at - imported_at,
+        "first_request_seconds": answered_at - ready_at,
+        "first_request_status": response.status_code,
+    }
+
+
+def cold_start(database: str, mode: str) -> Dict[str, Any]:
+    """Measure one cold start in a new interpreter."""
+    started_at = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-m", "benchmarks.startup", "--child"],
+        env=_environment(database, mode),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    result["process_seconds"] = time.perf_counter() - started_at
+    return result
+
+
+def import_time_report(database: str, top: int = 20) -> Dict[str, Any]:
+    """
+    Parse `python -X importtime -c "import src.main"`: the total, the self
+    time summed per top-level package, and the slowest first-party modules.
+    """
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import src.main"],
+        env=_environment(database, "skip"),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    modules = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        modules.append((name.strip(), int(self_us), int(cumulative_us)))
+
+    by_package: Dict[str, int] = defaultdict(int)
+    for name, self_us, _ in modules:
+        by_package[name.split(".")[0]] += self_us
+
+    first_party = [
+        module for module in modules if module[0].split(".")[0] in FIRST_PARTY_PACKAGES
+    ]
+    main_cumulative_us = next(
+        cumulative_us for name, _, cumulative_us in modules if name == "src.main"
+    )
+
+    return {
+        "total_ms": main_cumulative_us / 1000,
+        "packages_ms": {
+            package: self_us / 1000
+            for package, self_us in sorted(
+                by_package.items(), key=lambda item: item[1], reverse=True
+            )[:top]
+        },
+        "first_party_ms": {
+            name: cumulative_us / 1000
+            for name, _, cumulative_us in sorted(
+                first_party, key=lambda module: module[2], reverse=True
+            )[:top]
+        },
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--database", default="startup.db")
+    parser.add_argument(
+        "--mode", default="check", choices=("upgrade", "check", "skip")
+    )
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--output")
+    args = parser.parse_args(argv)
+
+    if args.child:
+        print(json.dumps(asyncio.run(_cold_start())))
+        return
+
+    # the first start creates (or migrates) the database
+    cold_start(args.database, "upgrade")
+    runs = [cold_start(args.database, args.mode) for _ in range(args.runs)]
+
+    report = {
+        "mode": args.mode,
+        "runs": args.runs,
+        **{
+            key: statistics.median(run[key] for run in runs)
+            for key in (
+                "import_seconds",
+                "startup_seconds",
+                "first_request_seconds",
+                "process_seconds",
+            )
+        },
+        "importtime": import_time_report(args.database, args.top),
+    }
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(output)
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
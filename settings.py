@@ -8,6 +8,159 @@ load_dotenv()
 ENVIRONMENT = os.getenv("ENVIRONMENT")
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite+aiosqlite:///./test.db")
 
+# database engine profiles: SQLite pragmas applied on every new connection
+# plus connection pool sizing. Pick one with DB_ENGINE_PROFILE and override
+# single options with DB_<OPTION>, e.g. DB_BUSY_TIMEOUT=10000
+DB_ENGINE_PROFILES = {
+    "default": {
+        "journal_mode": "wal",
+        "synchronous": "full",
+        "busy_timeout": 5000,  # ms to wait on a locked database
+        "cache_size": -2000,  # negative = KiB, i.e. 2 MB page cache
+        "mmap_size": 0,
+        "pool_size": 5,
+        "max_overflow": 10,
+        "pool_timeout": 30,
+    },
+    # concurrent write heavy workloads: fsync only at checkpoints (a power loss
+    # may roll back the last commits, but never corrupts the database), larger
+    # page cache, memory-mapped reads and a bigger pool
+    "high-throughput": {
+        "journal_mode": "wal",
+        "synchronous": "normal",
+        "busy_timeout": 15000,
+        "cache_size": -65536,  # 64 MB
+        "mmap_size": 268435456,  # 256 MB
+        "pool_size": 20,
+        "max_overflow": 20,
+        "pool_timeout": 30,
+    },
+}
+DB_ENGINE_PROFILE = os.getenv("DB_ENGINE_PROFILE", "default")
+
+
+def _engine_options(profile: str) -> dict:
+    options = dict(DB_ENGINE_PROFILES[profile])
+    for option, default in options.items():
+        value = os.getenv(f"DB_{option.upper()}")
+        if value is not None:
+            options[option] = type(default)(value)
+    return options
+
+
+DB_ENGINE_OPTIONS = _engine_options(DB_ENGINE_PROFILE)
+
+# what every app worker does with the schema on startup: "check" only verifies
+# the schema version and refuses to start on a mismatch, "upgrade" applies
+# pending migrations (and creates a new database), "skip" does nothing. The
+# migrations run once per deploy, python -m src.migrations, before the workers
+# start
+SCHEMA_STARTUP_MODE = os.getenv("SCHEMA_STARTUP_MODE", "check")
+
+# read replicas: comma separated database URLs the read-only routes are spread
+# over round-robin, e.g. copies kept up to date by Litestream or LiteFS (a
+# read-only URI of the primary file will do for testing,
+# sqlite+aiosqlite:///file:test.db?mode=ro&uri=true). A client that wrote
+# within READ_YOUR_WRITES_SECONDS keeps reading from the primary
+DATABASE_REPLICA_URLS = [
+    url.strip()
+    for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",")
+    if url.strip()
+]
+READ_YOUR_WRITES_SECONDS = float(os.getenv("READ_YOUR_WRITES_SECONDS", "5"))
+
+# pagination
+DEFAULT_PAGE_SIZE = int(os.getenv("DEFAULT_PAGE_SIZE", "50"))
+MAX_PAGE_SIZE = int(os.getenv("MAX_PAGE_SIZE", "500"))
+
+# rows fetched per server-side chunk by the NDJSON export
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", "1000"))
+
+# bulk candidate import: rows per transaction and rows per request
+BULK_IMPORT_CHUNK_SIZE = int(os.getenv("BULK_IMPORT_CHUNK_SIZE", "1000"))
+BULK_IMPORT_MAX_ROWS = int(os.getenv("BULK_IMPORT_MAX_ROWS", "50000"))
+
+# interview calendar: duration used when none is given, and the longest
+# allowed interview. Overlap checks only look back MAX_INTERVIEW_DURATION_MINUTES
+# from a new interview, so lowering it below existing durations hides them
+DEFAULT_INTERVIEW_DURATION_MINUTES = int(
+    os.getenv("DEFAULT_INTERVIEW_DURATION_MINUTES", "60")
+)
+MAX_INTERVIEW_DURATION_MINUTES = int(os.getenv("MAX_INTERVIEW_DURATION_MINUTES", "480"))
+# longest window accepted by the free-slot search
+MAX_FREE_SLOT_WINDOW_DAYS = int(os.getenv("MAX_FREE_SLOT_WINDOW_DAYS", "31"))
+
+# candidate search ranks at most this many matches, the first ones in index
+# order, so a very broad search costs the same as a narrow one
+SEARCH_MAX_MATCHES = int(os.getenv("SEARCH_MAX_MATCHES", "10000"))
+
+# analytics endpoints: aggregates are cached for this many seconds and are not
+# invalidated by writes, so a dashboard may lag behind by up to the TTL
+ANALYTICS_CACHE_TTL_SECONDS = float(os.getenv("ANALYTICS_CACHE_TTL_SECONDS", "60"))
+ANALYTICS_CACHE_MAX_ENTRIES = int(os.getenv("ANALYTICS_CACHE_MAX_ENTRIES", "1000"))
+
+# read cache in front of the interview / feedback GET routes: "memory" or "none"
+READ_CACHE_BACKEND = os.getenv("READ_CACHE_BACKEND", "memory")
+READ_CACHE_MAX_ENTRIES = int(os.getenv("READ_CACHE_MAX_ENTRIES", "10000"))
+READ_CACHE_TTL_SECONDS = float(os.getenv("READ_CACHE_TTL_SECONDS", "30"))
+
+# POST requests with an Idempotency-Key header: the first response is stored
+# for IDEMPOTENCY_KEY_TTL_SECONDS and replayed to retries. A key whose request
+# has not finished after IDEMPOTENCY_LOCK_SECONDS (e.g. the server died) can
+# be claimed again. Every stored response purges up to IDEMPOTENCY_PURGE_BATCH
+# expired keys
+IDEMPOTENCY_KEY_TTL_SECONDS = float(os.getenv("IDEMPOTENCY_KEY_TTL_SECONDS", "86400"))
+IDEMPOTENCY_LOCK_SECONDS = float(os.getenv("IDEMPOTENCY_LOCK_SECONDS", "60"))
+IDEMPOTENCY_PURGE_BATCH = int(os.getenv("IDEMPOTENCY_PURGE_BATCH", "100"))
+
+# python -m src.bulk_import: rows inserted (and checkpointed) per transaction
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "5000"))
+
+# GET /api/v1/changes/stream (server-sent events, see src.change_feed): the
+# change log is polled every SSE_POLL_SECONDS and after every local commit, a
+# stream with SSE_QUEUE_SIZE undelivered changes is closed (its client resumes
+# with Last-Event-ID), and idle streams get a comment every
+# SSE_HEARTBEAT_SECONDS so that proxies keep them open
+SSE_POLL_SECONDS = float(os.getenv("SSE_POLL_SECONDS", "1"))
+SSE_QUEUE_SIZE = int(os.getenv("SSE_QUEUE_SIZE", "1000"))
+SSE_HEARTBEAT_SECONDS = float(os.getenv("SSE_HEARTBEAT_SECONDS", "15"))
+
+# transactional outbox (see src.outbox): triggers queue a message when a
+# candidate is hired or rejected and when feedback is submitted, and the
+# dispatcher sends it to OUTBOX_SINK: "log", "webhook" (a POST to
+# OUTBOX_WEBHOOK_URL) or "stub" (kept in memory). OUTBOX_DISPATCHER runs the
+# dispatcher in every app worker, turn it off to run python -m src.outbox
+OUTBOX_DISPATCHER = os.getenv("OUTBOX_DISPATCHER", "true").lower() == "true"
+OUTBOX_SINK = os.getenv("OUTBOX_SINK", "log")
+OUTBOX_WEBHOOK_URL = os.getenv("OUTBOX_WEBHOOK_URL", "")
+# up to OUTBOX_BATCH_SIZE messages are claimed at a time, and sent at most
+# OUTBOX_CONCURRENCY at once. A claimed message can be claimed again after
+# OUTBOX_LEASE_SECONDS (e.g. when its dispatcher died)
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "100"))
+OUTBOX_CONCURRENCY = int(os.getenv("OUTBOX_CONCURRENCY", "10"))
+OUTBOX_POLL_SECONDS = float(os.getenv("OUTBOX_POLL_SECONDS", "1"))
+OUTBOX_LEASE_SECONDS = float(os.getenv("OUTBOX_LEASE_SECONDS", "60"))
+OUTBOX_SEND_TIMEOUT_SECONDS = float(os.getenv("OUTBOX_SEND_TIMEOUT_SECONDS", "10"))
+# failed sends are retried after OUTBOX_BACKOFF_SECONDS, doubled on every
+# failure up to OUTBOX_MAX_BACKOFF_SECONDS, until OUTBOX_MAX_ATTEMPTS
+OUTBOX_BACKOFF_SECONDS = float(os.getenv("OUTBOX_BACKOFF_SECONDS", "1"))
+OUTBOX_MAX_BACKOFF_SECONDS = float(os.getenv("OUTBOX_MAX_BACKOFF_SECONDS", "300"))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "10"))
+
+# serialize GET responses straight to JSON bytes instead of letting FastAPI
+# validate and encode them again through response_model
+FAST_JSON_RESPONSES = os.getenv("FAST_JSON_RESPONSES", "false").lower() == "true"
+
+# concurrent identical GETs of the read routes share one execution (see
+# src.singleflight)
+REQUEST_COALESCING = os.getenv("REQUEST_COALESCING", "true").lower() == "true"
+
+# per-request database instrumentation: X-DB-Query-Count / X-DB-Time-ms
+# response headers (opt-in), and a log line for every request whose database
+# time reaches SLOW_REQUEST_DB_MS
+QUERY_STATS_HEADERS = os.getenv("QUERY_STATS_HEADERS", "false").lower() == "true"
+SLOW_REQUEST_DB_MS = float(os.getenv("SLOW_REQUEST_DB_MS", "250"))
+
 
 logging_level = logging.INFO
 
@@ -0,0 +1,184 @@
+import datetime
+from typing import Dict, List, Optional
+
+from fastapi import APIRouter, Depends
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.cache import analytics_cache
+from src.database import CandidateModel, FeedbackModel, InterviewModel, get_read_db
+from src.models.models import CandidateStatus
+from src.responses import fast_response
+from src.schemas.analytics import (
+    FunnelData,
+    FunnelPositionData,
+    FunnelResponse,
+    InterviewerRatingData,
+    InterviewerRatingsData,
+    InterviewerRatingsResponse,
+    TimeToHireData,
+    TimeToHirePositionData,
+    TimeToHireResponse,
+)
+from src.schemas.candidate import CandidateStatusEnum
+from src.singleflight import coalesced
+
+analytics_router = APIRouter()
+
+# every endpoint is a single GROUP BY query, and its result is cached for
+# ANALYTICS_CACHE_TTL_SECONDS (see src.cache.analytics_cache)
+
+
+def _now() -> datetime.datetime:
+    return datetime.datetime.now(datetime.timezone.utc)
+
+
+@analytics_router.get("/funnel", response_model=FunnelResponse)
+@coalesced
+async def hiring_funnel(
+    position: Optional[str] = None, db: AsyncSession = Depends(get_read_db)
+):
+    async def load() -> FunnelData:
+        # an index-only scan of ix_candidates_position_status
+        funnel_query = (
+            select(CandidateModel.position, CandidateModel.status, func.count())
+            .group_by(CandidateModel.position, CandidateModel.status)
+            .order_by(CandidateModel.position, CandidateModel.status)
+        )
+        if position:
+            funnel_query = funnel_query.where(CandidateModel.position == position)
+        funnel_query_result = await db.execute(funnel_query)
+
+        positions: Dict[str, Dict[CandidateStatusEnum, int]] = {}
+        for row_position, status, count in funnel_query_result.all():
+            statuses = positions.setdefault(
+                row_position, {each: 0 for each in CandidateStatusEnum}
+            )
+            statuses[CandidateStatusEnum(status.value)] = count
+
+        return FunnelData(
+            generated_at=_now(),
+            positions=[
+                FunnelPositionData(
+                    position=row_position,
+                    total=sum(statuses.values()),
+                    statuses=statuses,
+                )
+                for row_position, statuses in positions.items()
+            ],
+        )
+
+    result = {
+        "status": True,
+        "message": "Hiring funnel retrieved successfully",
+        "data": await analytics_cache.get_or_load(("funnel", position), load),
+    }
+    return fast_response(FunnelResponse, result)
+
+
+@analytics_router.get("/interviewers", response_model=InterviewerRatingsResponse)
+@coalesced
+async def interviewer_ratings(db: AsyncSession = Depends(get_read_db)):
+    async def load() -> InterviewerRatingsData:
+        # interviews in ix_interviews_interviewer_scheduled_at order, each
+        # joined to its feedback through the unique interview_id index
+        rating_query_result = await db.execute(
+            select(
+                InterviewModel.interviewer,
+                func.count(InterviewModel.id),
+                func.count(FeedbackModel.id),
+                func.avg(FeedbackModel.rating),
+                func.min(FeedbackModel.rating),
+                func.max(FeedbackModel.rating),
+            )
+            .outerjoin(FeedbackModel, FeedbackModel.interview_id == InterviewModel.id)
+            .group_by(InterviewModel.interviewer)
+            .order_by(InterviewModel.interviewer)
+        )
+
+        interviewers: List[InterviewerRatingData] = [
+            InterviewerRatingData(
+                interviewer=interviewer,
+                interviews=interviews,
+                feedbacks=feedbacks,
+                average_rating=average_rating,
+                min_rating=min_rating,
+                max_rating=max_rating,
+            )
+            for (
+                interviewer,
+                interviews,
+                feedbacks,
+                average_rating,
+                min_rating,
+                max_rating,
+            ) in rating_query_result.all()
+        ]
+        return InterviewerRatingsData(generated_at=_now(), interviewers=interviewers)
+
+    result = {
+        "status": True,
+        "message": "Interviewer ratings retrieved successfully",
+        "data": await analytics_cache.get_or_load(("interviewers",), load),
+    }
+    return fast_response(InterviewerRatingsResponse, result)
+
+
+@analytics_router.get("/time-to-hire", response_model=TimeToHireResponse)
+@coalesced
+async def time_to_hire(
+    position: Optional[str] = None, db: AsyncSession = Depends(get_read_db)
+):
+    async def load() -> TimeToHireData:
+        days_to_hire = func.julianday(CandidateModel.hired_at) - func.julianday(
+            CandidateModel.created_at
+        )
+        # only hired candidates created after the timestamps were introduced
+        time_to_hire_query = (
+            select(
+                CandidateModel.position,
+                func.count(),
+                func.avg(days_to_hire),
+                func.min(days_to_hire),
+                func.max(days_to_hire),
+            )
+            .where(
+                CandidateModel.status == CandidateStatus.hired,
+                CandidateModel.created_at.is_not(None),
+                CandidateModel.hired_at.is_not(None),
+            )
+            .group_by(CandidateModel.position)
+            .order_by(CandidateModel.position)
+        )
+        if position:
+            time_to_hire_query = time_to_hire_query.where(
+                CandidateModel.position == position
+            )
+        time_to_hire_query_result = await db.execute(time_to_hire_query)
+
+        return TimeToHireData(
+            generated_at=_now(),
+            positions=[
+                TimeToHirePositionData(
+                    position=row_position,
+                    hired=hired,
+                    average_days=average_days,
+                    min_days=min_days,
+                    max_days=max_days,
+                )
+                for (
+                    row_position,
+                    hired,
+                    average_days,
+                    min_days,
+                    max_days,
+                ) in time_to_hire_query_result.all()
+            ],
+        )
+
+    result = {
+        "status": True,
+        "message": "Time to hire retrieved successfully",
+        "data": await analytics_cache.get_or_load(("time_to_hire", position), load),
+    }
+    return fast_response(TimeToHireResponse, result)
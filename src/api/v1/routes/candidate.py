@@ -1,46 +1,117 @@
-from typing import List
+import datetime
+import json
+import uuid
+from typing import Annotated, Any, AsyncIterator, Dict, Iterator, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import select
+from fastapi import (
+    APIRouter,
+    Depends,
+    Header,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+)
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from sqlalchemy import delete, func, select, tuple_, update
+from sqlalchemy.dialects.sqlite import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
-from src.database import CandidateModel, InterviewModel, get_db
+from settings import (
+    BULK_IMPORT_CHUNK_SIZE,
+    BULK_IMPORT_MAX_ROWS,
+    DEFAULT_PAGE_SIZE,
+    EXPORT_CHUNK_SIZE,
+    MAX_PAGE_SIZE,
+)
+from src.cache import candidate_tag, read_cache
+from src.database import (
+    LAST_WRITE_COOKIE,
+    CandidateModel,
+    CandidateSearchRowModel,
+    FeedbackModel,
+    InterviewModel,
+    get_db,
+    get_read_db,
+    read_sessionmaker,
+)
+from src.etag import candidate_version_rows, check_etag, make_etag
+from src.pagination import InvalidCursor, decode_cursor, encode_cursor
+from src.responses import fast_response
+from src.search import (
+    candidate_search,
+    match_query,
+    search_match,
+    search_rank,
+    search_snippet,
+    search_truncated,
+)
 from src.schemas.candidate import (
+    CandidateBulkCreateData,
+    CandidateBulkCreateResponse,
+    CandidateBulkDeleteData,
+    CandidateBulkDeleteResponse,
+    CandidateBulkRowResult,
+    CandidateBulkRowStatusEnum,
+    CandidateBulkSelection,
+    CandidateBulkStatusUpdate,
+    CandidateBulkUpdateData,
+    CandidateBulkUpdateResponse,
     CandidateCreate,
     CandidateCreateDataResponse,
     CandidateCreateResponse,
     CandidateListDataResponse,
     CandidateListResponse,
+    CandidateSearchData,
+    CandidateSearchResponse,
+    CandidateSortEnum,
+    CandidateStatusEnum,
     CandidateStatusUpdate,
 )
+from src.singleflight import coalesced
 
 candidate_router = APIRouter()
 
+# list sort -> summary columns sorted highest first, before the id
+CANDIDATE_SORT_COLUMNS = {
+    CandidateSortEnum.ID: [],
+    CandidateSortEnum.AVERAGE_RATING: [CandidateModel.average_rating],
+    CandidateSortEnum.LAST_INTERVIEW_AT: [CandidateModel.last_interview_at],
+}
+
+
+def _hired_at(status: CandidateStatusEnum) -> Optional[datetime.datetime]:
+    if status != CandidateStatusEnum.HIRED:
+        return None
+    return datetime.datetime.now(datetime.timezone.utc)
+
 
 @candidate_router.post("/", response_model=CandidateCreateResponse, status_code=201)
 async def create_candidate(
     candidate: CandidateCreate, db: AsyncSession = Depends(get_db)
 ):
-    # check existing email
-    candidate_query_result = await db.execute(
-        select(CandidateModel).where(CandidateModel.email == candidate.email)
+    # a duplicate email inserts nothing and returns no row
+    insert_query_result = await db.execute(
+        insert(CandidateModel)
+        .values(
+            name=candidate.name,
+            email=candidate.email,
+            position=candidate.position,
+            status=candidate.status,
+            hired_at=_hired_at(candidate.status),
+        )
+        .on_conflict_do_nothing(index_elements=[CandidateModel.email])
+        .returning(CandidateModel)
     )
-    existing_candidate = candidate_query_result.scalars().first()
-    if existing_candidate:
+    db_candidate = insert_query_result.scalars().first()
+    if not db_candidate:
         raise HTTPException(
             status_code=400, detail="Candidate with this email already exists"
         )
 
-    db_candidate = CandidateModel(
-        name=candidate.name,
-        email=candidate.email,
-        position=candidate.position,
-        status=candidate.status,
-    )
-    db.add(db_candidate)
     await db.commit()
-    await db.refresh(db_candidate)
 
     result = CandidateCreateResponse(
         status=True,
@@ -51,10 +122,378 @@ async def create_candidate(
     return result
 
 
+def parse_bulk_body(body: bytes, content_type: str) -> List[Any]:
+    """
+    Split a bulk request body into raw items, either from a JSON array or
+    from NDJSON (one JSON object per line). Lines that are not valid JSON
+    are kept as strings so they are reported as invalid rows.
+    """
+    if "ndjson" in content_type or "jsonl" in content_type:
+        items: List[Any] = []
+        for line in body.splitlines():
+            if not line.strip():
+                continue
+            try:
+                items.append(json.loads(line))
+            except ValueError:
+                items.append(line.decode(errors="replace"))
+        return items
+
+    items = json.loads(body)
+    if not isinstance(items, list):
+        raise ValueError("Request body must be a JSON array")
+    return items
+
+
+def _format_validation_error(exc: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(loc) for loc in error['loc']) or 'body'}: {error['msg']}"
+        for error in exc.errors()
+    )
+
+
+async def import_candidates(
+    items: List[Any], db: AsyncSession, chunk_size: int = BULK_IMPORT_CHUNK_SIZE
+) -> CandidateBulkCreateData:
+    """
+    Insert candidates in chunks: one set-based email lookup, one
+    executemany INSERT and one commit per chunk.
+    """
+    results: List[CandidateBulkRowResult] = []
+
+    for start in range(0, len(items), chunk_size):
+        chunk_rows: Dict[str, Dict[str, Any]] = {}
+
+        for index, item in enumerate(items[start : start + chunk_size], start):
+            try:
+                candidate = CandidateCreate.model_validate(item)
+            except ValidationError as exc:
+                results.append(
+                    CandidateBulkRowResult(
+                        index=index,
+                        status=CandidateBulkRowStatusEnum.INVALID,
+                        error=_format_validation_error(exc),
+                    )
+                )
+                continue
+
+            # the same email twice in one payload: keep the first one
+            if candidate.email in chunk_rows:
+                results.append(
+                    CandidateBulkRowResult(
+                        index=index,
+                        status=CandidateBulkRowStatusEnum.DUPLICATE,
+                        email=candidate.email,
+                    )
+                )
+                continue
+
+            chunk_rows[candidate.email] = {
+                "index": index,
+                "id": str(uuid.uuid4()),
+                "name": candidate.name,
+                "email": candidate.email,
+                "position": candidate.position,
+                "status": candidate.status,
+                "hired_at": _hired_at(candidate.status),
+            }
+
+        if not chunk_rows:
+            continue
+
+        existing_query_result = await db.execute(
+            select(CandidateModel.email).where(CandidateModel.email.in_(chunk_rows))
+        )
+        for email in existing_query_result.scalars().all():
+            row = chunk_rows.pop(email)
+            results.append(
+                CandidateBulkRowResult(
+                    index=row["index"],
+                    status=CandidateBulkRowStatusEnum.DUPLICATE,
+                    email=email,
+                )
+            )
+
+        inserted_emails = set()
+        if chunk_rows:
+            # ON CONFLICT DO NOTHING covers emails created concurrently
+            # between the lookup above and this insert
+            insert_result = await db.execute(
+                insert(CandidateModel)
+                .on_conflict_do_nothing(index_elements=[CandidateModel.email])
+                .returning(CandidateModel.email),
+                [
+                    {key: value for key, value in row.items() if key != "index"}
+                    for row in chunk_rows.values()
+                ],
+            )
+            inserted_emails = set(insert_result.scalars().all())
+            await db.commit()
+
+        for email, row in chunk_rows.items():
+            created = email in inserted_emails
+            results.append(
+                CandidateBulkRowResult(
+                    index=row["index"],
+                    status=(
+                        CandidateBulkRowStatusEnum.CREATED
+                        if created
+                        else CandidateBulkRowStatusEnum.DUPLICATE
+                    ),
+                    id=row["id"] if created else None,
+                    email=email,
+                )
+            )
+
+    results.sort(key=lambda row_result: row_result.index)
+
+    def count(status: CandidateBulkRowStatusEnum) -> int:
+        return sum(1 for row_result in results if row_result.status == status)
+
+    return CandidateBulkCreateData(
+        created=count(CandidateBulkRowStatusEnum.CREATED),
+        duplicate=count(CandidateBulkRowStatusEnum.DUPLICATE),
+        invalid=count(CandidateBulkRowStatusEnum.INVALID),
+        results=results,
+    )
+
+
+@candidate_router.post("/bulk", response_model=CandidateBulkCreateResponse)
+async def bulk_create_candidates(request: Request, db: AsyncSession = Depends(get_db)):
+    """
+    Accepts a JSON array of CandidateCreate objects, or NDJSON with
+    Content-Type: application/x-ndjson, and reports a result per row.
+    """
+    body = await request.body()
+    try:
+        items = parse_bulk_body(body, request.headers.get("content-type", ""))
+    except ValueError:
+        raise HTTPException(
+            status_code=400, detail="Request body must be a JSON array or NDJSON"
+        )
+
+    if len(items) > BULK_IMPORT_MAX_ROWS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Bulk import is limited to {BULK_IMPORT_MAX_ROWS} rows",
+        )
+
+    result = {
+        "status": True,
+        "message": "Candidates imported successfully",
+        "data": await import_candidates(items, db),
+    }
+
+    return result
+
+
+def bulk_selection_filters(
+    selection: CandidateBulkSelection, chunk_size: int = BULK_IMPORT_CHUNK_SIZE
+) -> Iterator[List[Any]]:
+    """
+    The WHERE clauses of the statements of a bulk write: one statement per
+    chunk of ids (SQLite limits the bound parameters of a statement), or a
+    single one for a filter, whatever the number of candidates it matches.
+    """
+    if (selection.ids is None) == (selection.filter is None):
+        raise HTTPException(
+            status_code=400, detail="Select candidates by either ids or filter"
+        )
+
+    if selection.ids is not None:
+        if len(selection.ids) > BULK_IMPORT_MAX_ROWS:
+            raise HTTPException(
+                status_code=413,
+                detail=f"Bulk writes are limited to {BULK_IMPORT_MAX_ROWS} ids",
+            )
+        ids = list(dict.fromkeys(selection.ids))
+        for start in range(0, len(ids), chunk_size):
+            yield [CandidateModel.id.in_(ids[start : start + chunk_size])]
+        return
+
+    filters = []
+    if selection.filter.status:
+        filters.append(CandidateModel.status == selection.filter.status)
+    if selection.filter.position:
+        filters.append(CandidateModel.position == selection.filter.position)
+    # an empty filter would match every candidate
+    if not filters:
+        raise HTTPException(
+            status_code=400, detail="Filter on status, position or both"
+        )
+    yield filters
+
+
+def invalidate_bulk_selection(selection: CandidateBulkSelection) -> None:
+    if selection.ids is not None:
+        read_cache.invalidate_tags(*map(candidate_tag, selection.ids))
+    else:
+        # the ids matched by the filter are never loaded
+        read_cache.clear()
+
+
+@candidate_router.patch("/bulk", response_model=CandidateBulkUpdateResponse)
+async def bulk_update_candidate_status(
+    status_update: CandidateBulkStatusUpdate, db: AsyncSession = Depends(get_db)
+):
+    """
+    Moves the selected candidates to a status with set-based UPDATEs, in one
+    transaction. Candidates already in that status are left alone and are
+    not counted.
+    """
+    hired_at = _hired_at(status_update.status)
+
+    updated = 0
+    for filters in bulk_selection_filters(status_update):
+        update_query_result = await db.execute(
+            update(CandidateModel)
+            .where(*filters, CandidateModel.status != status_update.status)
+            .values(
+                status=status_update.status,
+                hired_at=hired_at,
+                version=CandidateModel.version + 1,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        updated += update_query_result.rowcount
+
+    await db.commit()
+    invalidate_bulk_selection(status_update)
+
+    result = {
+        "status": True,
+        "message": "Candidate statuses updated successfully",
+        "data": CandidateBulkUpdateData(updated=updated),
+    }
+
+    return result
+
+
+@candidate_router.post("/bulk-delete", response_model=CandidateBulkDeleteResponse)
+async def bulk_delete_candidates(
+    selection: CandidateBulkSelection, db: AsyncSession = Depends(get_db)
+):
+    """
+    Deletes the selected candidates with set-based DELETEs, in one
+    transaction. Their interviews and feedback go with them through ON DELETE
+    CASCADE, without being loaded.
+    """
+    deleted = 0
+    for filters in bulk_selection_filters(selection):
+        delete_query_result = await db.execute(
+            delete(CandidateModel)
+            .where(*filters)
+            .execution_options(synchronize_session=False)
+        )
+        deleted += delete_query_result.rowcount
+
+    await db.commit()
+    invalidate_bulk_selection(selection)
+
+    result = {
+        "status": True,
+        "message": "Candidates deleted successfully",
+        "data": CandidateBulkDeleteData(deleted=deleted),
+    }
+
+    return result
+
+
 @candidate_router.get("/", response_model=CandidateListResponse)
-async def list_candidates(db: AsyncSession = Depends(get_db)):
+@coalesced
+async def list_candidates(
+    response: Response,
+    limit: Annotated[int, Query(ge=1, le=MAX_PAGE_SIZE)] = DEFAULT_PAGE_SIZE,
+    after: Annotated[
+        Optional[str], Query(description="next_cursor from the previous page")
+    ] = None,
+    status: Optional[CandidateStatusEnum] = None,
+    position: Optional[str] = None,
+    sort: CandidateSortEnum = CandidateSortEnum.ID,
+    min_rating: Annotated[Optional[float], Query(ge=1, le=5)] = None,
+    if_none_match: Annotated[Optional[str], Header()] = None,
+    db: AsyncSession = Depends(get_read_db),
+):
+    sort_columns = CANDIDATE_SORT_COLUMNS[sort]
+    filters = []
+
+    if after:
+        try:
+            cursor = decode_cursor(after)
+            last_key = [cursor["id"]]
+            if sort_columns:
+                if cursor["sort"] != sort.value:
+                    raise InvalidCursor("Cursor of another sort order")
+                last_value = cursor["value"]
+                if sort == CandidateSortEnum.LAST_INTERVIEW_AT:
+                    last_value = datetime.datetime.fromisoformat(last_value)
+                last_key.insert(0, last_value)
+        except (InvalidCursor, KeyError, TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+
+        if sort_columns:
+            filters.append(
+                tuple_(*sort_columns, CandidateModel.id) < tuple_(*last_key)
+            )
+        else:
+            filters.append(CandidateModel.id > last_key[0])
+
+    if status:
+        filters.append(CandidateModel.status == status)
+
+    if position:
+        filters.append(CandidateModel.position == position)
+
+    if min_rating is not None:
+        filters.append(CandidateModel.average_rating >= min_rating)
+
+    # candidates without the summary have nothing to be ranked by
+    filters.extend(column.is_not(None) for column in sort_columns)
+
+    def sort_key(id_column, *value_columns):
+        if not value_columns:
+            return (id_column,)
+        return (*(column.desc() for column in value_columns), id_column.desc())
+
+    # keyset pagination on the primary key, or on (summary column, id) read
+    # backwards from its index, so every page costs the same no matter how
+    # deep into the table it is. One extra row is fetched only to know
+    # whether another page exists
+    def page_query(*columns):
+        return (
+            select(*columns)
+            .where(*filters)
+            .order_by(*sort_key(CandidateModel.id, *sort_columns))
+            .limit(limit + 1)
+        )
+
+    if if_none_match:
+        page = page_query(
+            CandidateModel.id, CandidateModel.version, *sort_columns
+        ).subquery()
+        version_query_result = await db.execute(
+            select(
+                page.c.id,
+                page.c.version,
+                InterviewModel.id,
+                InterviewModel.version,
+                FeedbackModel.id,
+                FeedbackModel.version,
+            )
+            .select_from(page)
+            .outerjoin(InterviewModel, InterviewModel.candidate_id == page.c.id)
+            .outerjoin(FeedbackModel, FeedbackModel.interview_id == InterviewModel.id)
+            .order_by(
+                *sort_key(page.c.id, *(page.c[column.key] for column in sort_columns)),
+                InterviewModel.id,
+            )
+        )
+        check_etag(
+            if_none_match, make_etag(tuple(row) for row in version_query_result.all())
+        )
+
     candidate_query_result = await db.execute(
-        select(CandidateModel).options(
+        page_query(CandidateModel).options(
             selectinload(CandidateModel.interviews).selectinload(
                 InterviewModel.feedback
             )
@@ -63,6 +502,26 @@ async def list_candidates(db: AsyncSession = Depends(get_db)):
 
     candidates = candidate_query_result.scalars().all()
 
+    etag = make_etag(
+        row
+        for candidate in candidates
+        for row in candidate_version_rows(
+            candidate.id, candidate.version, candidate.interviews
+        )
+    )
+    check_etag(if_none_match, etag)
+    response.headers["ETag"] = etag
+
+    next_cursor = None
+    if len(candidates) > limit:
+        candidates = candidates[:limit]
+        cursor = {"id": candidates[-1].id}
+        if sort_columns:
+            cursor.update(
+                sort=sort.value, value=getattr(candidates[-1], sort_columns[0].key)
+            )
+        next_cursor = encode_cursor(cursor)
+
     data: List[CandidateListDataResponse] = [
         CandidateListDataResponse.model_validate(candidate) for candidate in candidates
     ]
@@ -71,26 +530,159 @@ async def list_candidates(db: AsyncSession = Depends(get_db)):
         "status": True,
         "message": "Candidates retrieved successfully",
         "data": data,
+        "next_cursor": next_cursor,
     }
 
-    return result
+    return fast_response(CandidateListResponse, result, response)
+
+
+@candidate_router.get("/search", response_model=CandidateSearchResponse)
+@coalesced
+async def search_candidates(
+    q: Annotated[
+        str,
+        Query(
+            min_length=1,
+            max_length=200,
+            description="words to look for, as prefixes, in names, emails, "
+            "positions and feedback comments",
+        ),
+    ],
+    limit: Annotated[int, Query(ge=1, le=MAX_PAGE_SIZE)] = DEFAULT_PAGE_SIZE,
+    after: Annotated[
+        Optional[str], Query(description="next_cursor from the previous page")
+    ] = None,
+    db: AsyncSession = Depends(get_read_db),
+):
+    query = match_query(q)
+    if query is None:
+        raise HTTPException(status_code=400, detail="Search text must contain a word")
+
+    rank = search_rank()
+    filters = [search_match(query)]
+
+    if after:
+        try:
+            cursor = decode_cursor(after)
+            last_key = (float(cursor["rank"]), int(cursor["rowid"]))
+        except (InvalidCursor, KeyError, TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        filters.append(tuple_(rank, candidate_search.c.rowid) > tuple_(*last_key))
+
+    # the FTS5 index finds and ranks the matches, then each one is joined to
+    # its candidate by primary key. Keyset pagination on (rank, rowid)
+    search_query_result = await db.execute(
+        select(
+            CandidateModel.id,
+            CandidateModel.name,
+            CandidateModel.email,
+            CandidateModel.position,
+            CandidateModel.status,
+            CandidateModel.interview_count,
+            CandidateModel.feedback_count,
+            CandidateModel.average_rating,
+            CandidateModel.last_interview_at,
+            rank.label("rank"),
+            search_snippet().label("snippet"),
+            candidate_search.c.rowid.label("search_rowid"),
+        )
+        .select_from(candidate_search)
+        .join(
+            CandidateSearchRowModel,
+            CandidateSearchRowModel.search_rowid == candidate_search.c.rowid,
+        )
+        .join(CandidateModel, CandidateModel.id == CandidateSearchRowModel.candidate_id)
+        .where(*filters)
+        .order_by(rank, candidate_search.c.rowid)
+        .limit(limit + 1)
+    )
+    rows = search_query_result.all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(
+            {"rank": rows[-1].rank, "rowid": rows[-1].search_rowid}
+        )
+
+    truncated_query_result = await db.execute(select(search_truncated(query)))
+
+    result = {
+        "status": True,
+        "message": "Candidates retrieved successfully",
+        "data": [CandidateSearchData.model_validate(row) for row in rows],
+        "next_cursor": next_cursor,
+        "truncated": truncated_query_result.scalar(),
+    }
+    return fast_response(CandidateSearchResponse, result)
+
+
+async def iter_candidates_ndjson(
+    db: AsyncSession, chunk_size: int = EXPORT_CHUNK_SIZE
+) -> AsyncIterator[str]:
+    """
+    Yield every candidate with its interviews and feedback as NDJSON,
+    one chunk of lines per server-side batch of rows.
+    """
+    candidate_stream = await db.stream_scalars(
+        select(CandidateModel)
+        .options(
+            selectinload(CandidateModel.interviews).selectinload(
+                InterviewModel.feedback
+            )
+        )
+        .order_by(CandidateModel.id)
+        .execution_options(yield_per=chunk_size)
+    )
+
+    async for candidates in candidate_stream.partitions():
+        yield "".join(
+            CandidateListDataResponse.model_validate(candidate).model_dump_json()
+            + "\n"
+            for candidate in candidates
+        )
+
+
+@candidate_router.get("/export")
+async def export_candidates(request: Request):
+    # the export outlives the request dependencies, so it owns its session
+    read_session = read_sessionmaker(request.cookies.get(LAST_WRITE_COOKIE))
+
+    async def stream():
+        async with read_session() as db:
+            async for chunk in iter_candidates_ndjson(db):
+                yield chunk
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
 
 
 @candidate_router.patch("/{id}", response_model=CandidateCreateResponse)
 async def update_candidate_status(
     id: str, status_update: CandidateStatusUpdate, db: AsyncSession = Depends(get_db)
 ):
-    candidate_query_result = await db.execute(
-        select(CandidateModel).where(CandidateModel.id == id)
+    # marking an already hired candidate as hired keeps the original time
+    hired_at = _hired_at(status_update.status)
+    if hired_at is not None:
+        hired_at = func.coalesce(CandidateModel.hired_at, hired_at)
+
+    # bulk UPDATE bypasses the ORM version counter, so bump it here
+    update_query_result = await db.execute(
+        update(CandidateModel)
+        .where(CandidateModel.id == id)
+        .values(
+            status=status_update.status,
+            hired_at=hired_at,
+            version=CandidateModel.version + 1,
+        )
+        .returning(CandidateModel)
     )
-    candidate = candidate_query_result.scalars().first()
+    candidate = update_query_result.scalars().first()
 
     if not candidate:
         raise HTTPException(status_code=404, detail="Candidate not found")
 
-    candidate.status = status_update.status
     await db.commit()
-    await db.refresh(candidate)
+    read_cache.invalidate_tags(candidate_tag(id))
 
     result = {
         "status": True,
@@ -103,15 +695,15 @@ async def update_candidate_status(
 
 @candidate_router.delete("/{id}", status_code=204)
 async def delete_candidate(id: str, db: AsyncSession = Depends(get_db)):
-    candidate_query_result = await db.execute(
-        select(CandidateModel).where(CandidateModel.id == id)
+    # interviews and feedback go with it through ON DELETE CASCADE
+    delete_query_result = await db.execute(
+        delete(CandidateModel).where(CandidateModel.id == id)
     )
-    candidate = candidate_query_result.scalars().first()
 
-    if not candidate:
+    if delete_query_result.rowcount == 0:
         raise HTTPException(status_code=404, detail="Candidate not found")
 
-    await db.delete(candidate)
     await db.commit()
+    read_cache.invalidate_tags(candidate_tag(id))
 
     return  # No content response (204 No Content)
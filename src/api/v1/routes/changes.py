@@ -0,0 +1,53 @@
+from typing import Annotated, Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from settings import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from src.change_feed import change_broker, load_changes
+from src.database import get_read_db
+from src.responses import fast_response
+from src.schemas.changes import ChangeFeedResponse
+from src.singleflight import coalesced
+
+change_router = APIRouter()
+
+
+@change_router.get("", response_model=ChangeFeedResponse)
+@coalesced
+async def list_changes(
+    since: Annotated[
+        int, Query(ge=0, description="next_since from the previous page")
+    ] = 0,
+    limit: Annotated[int, Query(ge=1, le=MAX_PAGE_SIZE)] = DEFAULT_PAGE_SIZE,
+    db: AsyncSession = Depends(get_read_db),
+):
+    result = {
+        "status": True,
+        "message": "Changes retrieved successfully",
+        "data": await load_changes(db, since, limit),
+    }
+    return fast_response(ChangeFeedResponse, result)
+
+
+@change_router.get("/stream")
+async def stream_changes(
+    since: Annotated[
+        Optional[int],
+        Query(ge=0, description="seq of the last change seen, default: from now on"),
+    ] = None,
+    last_event_id: Annotated[Optional[str], Header()] = None,
+):
+    # sent by EventSource when it reconnects, and newer than since
+    if last_event_id is not None:
+        try:
+            since = int(last_event_id)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid Last-Event-ID")
+
+    return StreamingResponse(
+        change_broker.stream(since),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,15 +1,28 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import select
+from typing import Annotated, Optional, Tuple
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Response
+from sqlalchemy import exists, literal, select
+from sqlalchemy.dialects.sqlite import insert
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
 
-from src.database import FeedbackModel, InterviewModel, get_db
+from src.cache import candidate_tag, interview_tag, read_cache
+from src.database import (
+    FeedbackModel,
+    InterviewModel,
+    get_db,
+    get_read_db,
+    read_target,
+)
+from src.etag import check_etag, make_etag
+from src.responses import fast_response
 from src.schemas.feedback import (
     FeedbackCreate,
     FeedbackCreateData,
     FeedbackCreateResponse,
+    FeedbackViewData,
     FeedbackViewResponse,
 )
+from src.singleflight import coalesced
 
 feedback_router = APIRouter()
 
@@ -18,27 +31,33 @@ feedback_router = APIRouter()
 async def submit_feedback(
     interview_id: int, feedback_data: FeedbackCreate, db: AsyncSession = Depends(get_db)
 ):
-
-    interview_query_result = await db.execute(
-        select(InterviewModel)
-        .where(InterviewModel.id == interview_id)
-        .options(selectinload(InterviewModel.feedback))  # preload ก่อน!
+    # inserts only when the interview exists and has no feedback yet
+    insert_query_result = await db.execute(
+        insert(FeedbackModel)
+        .from_select(
+            ["interview_id", "rating", "comment"],
+            select(
+                literal(interview_id, FeedbackModel.interview_id.type),
+                literal(feedback_data.rating, FeedbackModel.rating.type),
+                literal(feedback_data.comment, FeedbackModel.comment.type),
+            ).where(exists().where(InterviewModel.id == interview_id)),
+        )
+        .on_conflict_do_nothing(index_elements=[FeedbackModel.interview_id])
+        .returning(FeedbackModel)
     )
-    interview = interview_query_result.scalars().first()
+    feedback = insert_query_result.scalars().first()
 
-    if not interview:
-        raise HTTPException(status_code=404, detail="Interview not found")
-
-    if interview.feedback:
+    if not feedback:
+        # nothing inserted, one more query only to tell the two cases apart
+        interview_query_result = await db.execute(
+            select(InterviewModel.id).where(InterviewModel.id == interview_id)
+        )
+        if interview_query_result.first() is None:
+            raise HTTPException(status_code=404, detail="Interview not found")
         raise HTTPException(status_code=400, detail="Feedback already exists")
 
-    # use model_dump instead .dict()
-    feedback = FeedbackModel(interview_id=interview_id, **feedback_data.model_dump())
-
-    db.add(feedback)
-
     await db.commit()
-    await db.refresh(feedback)
+    read_cache.invalidate_tags(interview_tag(interview_id))
 
     result = {
         "status": True,
@@ -49,18 +68,62 @@ async def submit_feedback(
     return result
 
 
-@feedback_router.get("", response_model=FeedbackViewResponse)
-async def view_feedback(interview_id: int, db: AsyncSession = Depends(get_db)):
+async def _feedback_etag(interview_id: int, db: AsyncSession) -> str:
+    version_query_result = await db.execute(
+        select(FeedbackModel.id, FeedbackModel.version).where(
+            FeedbackModel.interview_id == interview_id
+        )
+    )
+    version_row = version_query_result.first()
+    if not version_row:
+        raise HTTPException(status_code=404, detail="Feedback not found")
+
+    return make_etag([tuple(version_row)])
+
+
+async def _load_feedback(
+    interview_id: int, db: AsyncSession
+) -> Tuple[str, str, FeedbackViewData]:
+    # candidate_id comes along so the cache entry can be dropped when the
+    # candidate (and with it the interview and feedback) is deleted
     feedback_query_result = await db.execute(
-        select(FeedbackModel).where(FeedbackModel.interview_id == interview_id)
+        select(FeedbackModel, InterviewModel.candidate_id)
+        .join(InterviewModel, InterviewModel.id == FeedbackModel.interview_id)
+        .where(FeedbackModel.interview_id == interview_id)
     )
-    feedback = feedback_query_result.scalars().first()
-    if not feedback:
+    row = feedback_query_result.first()
+    if not row:
         raise HTTPException(status_code=404, detail="Feedback not found")
 
+    feedback, candidate_id = row
+    etag = make_etag([(feedback.id, feedback.version)])
+    return candidate_id, etag, FeedbackViewData.model_validate(feedback)
+
+
+@feedback_router.get("", response_model=FeedbackViewResponse)
+@coalesced
+async def view_feedback(
+    interview_id: int,
+    response: Response,
+    if_none_match: Annotated[Optional[str], Header()] = None,
+    db: AsyncSession = Depends(get_read_db),
+):
+    async def load():
+        if if_none_match:
+            check_etag(if_none_match, await _feedback_etag(interview_id, db))
+        return await _load_feedback(interview_id, db)
+
+    _, etag, feedback = await read_cache.get_or_load(
+        ("interview_feedback", read_target(db), interview_id),
+        load,
+        tags=lambda cached: [interview_tag(interview_id), candidate_tag(cached[0])],
+    )
+    check_etag(if_none_match, etag)
+    response.headers["ETag"] = etag
+
     result = {
         "status": True,
         "message": "Feedback retrieved successfully",
         "data": feedback,
     }
-    return result
+    return fast_response(FeedbackViewResponse, result, response)
@@ -1,15 +1,31 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import select
+import datetime
+from typing import Annotated, List, Optional, Tuple
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Response
+from sqlalchemy import exists, insert, literal, select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
-from src.database import CandidateModel, InterviewModel, get_db
+from src.cache import candidate_tag, interview_tag, read_cache
+from src.database import (
+    CandidateModel,
+    FeedbackModel,
+    InterviewModel,
+    get_db,
+    get_read_db,
+    read_target,
+)
+from src.etag import candidate_version_rows, check_etag, make_etag
+from src.responses import fast_response
+from src.scheduling import overlapping, scheduled_time
 from src.schemas.interview import (
     CandiateInterviewListResponse,
     InterviewCreate,
     InterviewCreateData,
     InterviewCreateResponse,
+    InterviewListData,
 )
+from src.singleflight import coalesced
 
 interview_router = APIRouter()
 
@@ -18,26 +34,54 @@ interview_router = APIRouter()
 async def create_schedule_interview(
     candidate_id: str, interview: InterviewCreate, db: AsyncSession = Depends(get_db)
 ):
-    # Check candidate exist
-    candidate_query_result = await db.execute(
-        select(CandidateModel).where(CandidateModel.id == candidate_id)
+    scheduled_at = scheduled_time(interview.scheduled_at)
+    ends_at = scheduled_at + datetime.timedelta(minutes=interview.duration_minutes)
+
+    # INSERT ... SELECT ... WHERE: no row is inserted (or returned) when the
+    # candidate does not exist or the interviewer is already booked. A single
+    # statement, so two requests cannot both take the same slot
+    insert_query_result = await db.execute(
+        insert(InterviewModel)
+        .from_select(
+            [
+                "candidate_id",
+                "interviewer",
+                "scheduled_at",
+                "duration_minutes",
+                "result",
+            ],
+            select(
+                literal(candidate_id, InterviewModel.candidate_id.type),
+                literal(interview.interviewer, InterviewModel.interviewer.type),
+                literal(scheduled_at, InterviewModel.scheduled_at.type),
+                literal(
+                    interview.duration_minutes, InterviewModel.duration_minutes.type
+                ),
+                literal(interview.result, InterviewModel.result.type),
+            ).where(
+                exists().where(CandidateModel.id == candidate_id),
+                ~exists().where(
+                    overlapping(interview.interviewer, scheduled_at, ends_at)
+                ),
+            ),
+        )
+        .returning(InterviewModel)
     )
+    db_interview = insert_query_result.scalars().first()
 
-    candidate = candidate_query_result.scalars().first()
+    if not db_interview:
+        # nothing inserted, one more query only to tell the two cases apart
+        candidate_query_result = await db.execute(
+            select(CandidateModel.id).where(CandidateModel.id == candidate_id)
+        )
+        if candidate_query_result.first() is None:
+            raise HTTPException(status_code=404, detail="Candidate not found")
+        raise HTTPException(
+            status_code=409, detail="Interviewer is already booked at this time"
+        )
 
-    if not candidate:
-        raise HTTPException(status_code=404, detail="Candidate not found")
-
-    # Create interview
-    db_interview = InterviewModel(
-        candidate_id=candidate_id,
-        interviewer=interview.interviewer,
-        scheduled_at=interview.scheduled_at,
-        result=interview.result,
-    )
-    db.add(db_interview)
     await db.commit()
-    await db.refresh(db_interview)
+    read_cache.invalidate_tags(candidate_tag(candidate_id))
 
     result = {
         "status": True,
@@ -48,10 +92,32 @@ async def create_schedule_interview(
     return result
 
 
-@interview_router.get("", response_model=CandiateInterviewListResponse)
-async def list_candidate_interviews(
-    candidate_id: str, db: AsyncSession = Depends(get_db)
-):
+async def _candidate_interviews_etag(candidate_id: str, db: AsyncSession) -> str:
+    version_query_result = await db.execute(
+        select(
+            CandidateModel.id,
+            CandidateModel.version,
+            InterviewModel.id,
+            InterviewModel.version,
+            FeedbackModel.id,
+            FeedbackModel.version,
+        )
+        .outerjoin(InterviewModel, InterviewModel.candidate_id == CandidateModel.id)
+        .outerjoin(FeedbackModel, FeedbackModel.interview_id == InterviewModel.id)
+        .where(CandidateModel.id == candidate_id)
+        .order_by(InterviewModel.id)
+    )
+    version_rows = version_query_result.all()
+
+    if not version_rows:
+        raise HTTPException(status_code=404, detail="Candidate not found")
+
+    return make_etag(tuple(row) for row in version_rows)
+
+
+async def _load_candidate_interviews(
+    candidate_id: str, db: AsyncSession
+) -> Tuple[str, List[InterviewListData]]:
     candidate_query_result = await db.execute(
         select(CandidateModel).where(CandidateModel.id == candidate_id)
     )
@@ -64,12 +130,46 @@ async def list_candidate_interviews(
         select(InterviewModel)
         .where(InterviewModel.candidate_id == candidate_id)
         .options(selectinload(InterviewModel.feedback))  # preload feedback
+        .order_by(InterviewModel.id)
     )
     interview_results = interview_query_result.scalars().all()
 
+    etag = make_etag(
+        candidate_version_rows(candidate.id, candidate.version, interview_results)
+    )
+    return etag, [
+        InterviewListData.model_validate(interview) for interview in interview_results
+    ]
+
+
+@interview_router.get("", response_model=CandiateInterviewListResponse)
+@coalesced
+async def list_candidate_interviews(
+    candidate_id: str,
+    response: Response,
+    if_none_match: Annotated[Optional[str], Header()] = None,
+    db: AsyncSession = Depends(get_read_db),
+):
+    async def load():
+        # a conditional GET is answered from the version query alone
+        if if_none_match:
+            check_etag(if_none_match, await _candidate_interviews_etag(candidate_id, db))
+        return await _load_candidate_interviews(candidate_id, db)
+
+    etag, interviews = await read_cache.get_or_load(
+        ("candidate_interviews", read_target(db), candidate_id),
+        load,
+        tags=lambda cached: [
+            candidate_tag(candidate_id),
+            *(interview_tag(interview.id) for interview in cached[1]),
+        ],
+    )
+    check_etag(if_none_match, etag)
+    response.headers["ETag"] = etag
+
     result = {
         "status": True,
         "message": "Interviews retrieved successfully",
-        "data": interview_results,
+        "data": interviews,
     }
-    return result
+    return fast_response(CandiateInterviewListResponse, result, response)
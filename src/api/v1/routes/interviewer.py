@@ -0,0 +1,79 @@
+import datetime
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from settings import (
+    DEFAULT_INTERVIEW_DURATION_MINUTES,
+    MAX_FREE_SLOT_WINDOW_DAYS,
+    MAX_INTERVIEW_DURATION_MINUTES,
+)
+from src.database import InterviewModel, get_read_db
+from src.responses import fast_response
+from src.scheduling import free_slots, naive, overlapping
+from src.schemas.interviewer import FreeSlot, FreeSlotsData, FreeSlotsResponse
+from src.singleflight import coalesced
+
+interviewer_router = APIRouter()
+
+
+@interviewer_router.get("/{interviewer}/free-slots", response_model=FreeSlotsResponse)
+@coalesced
+async def list_free_slots(
+    interviewer: str,
+    start: datetime.datetime,
+    end: datetime.datetime,
+    duration_minutes: Annotated[
+        int,
+        Query(
+            ge=1,
+            le=MAX_INTERVIEW_DURATION_MINUTES,
+            description="shortest free slot to return",
+        ),
+    ] = DEFAULT_INTERVIEW_DURATION_MINUTES,
+    db: AsyncSession = Depends(get_read_db),
+):
+    window_start, window_end = naive(start), naive(end)
+    if window_end <= window_start:
+        raise HTTPException(status_code=400, detail="end must be after start")
+    if window_end - window_start > datetime.timedelta(days=MAX_FREE_SLOT_WINDOW_DAYS):
+        raise HTTPException(
+            status_code=400,
+            detail=f"Window must not exceed {MAX_FREE_SLOT_WINDOW_DAYS} days",
+        )
+
+    # only the interviews overlapping the window, read in index order
+    interview_query_result = await db.execute(
+        select(InterviewModel.scheduled_at, InterviewModel.duration_minutes)
+        .where(overlapping(interviewer, window_start, window_end))
+        .order_by(InterviewModel.scheduled_at)
+    )
+    busy = (
+        (scheduled_at, scheduled_at + datetime.timedelta(minutes=minutes))
+        for scheduled_at, minutes in interview_query_result.all()
+    )
+
+    slots = free_slots(
+        busy,
+        window_start,
+        window_end,
+        datetime.timedelta(minutes=duration_minutes),
+    )
+
+    result = {
+        "status": True,
+        "message": "Free slots retrieved successfully",
+        "data": FreeSlotsData(
+            interviewer=interviewer,
+            start=window_start,
+            end=window_end,
+            duration_minutes=duration_minutes,
+            slots=[
+                FreeSlot(start=slot_start, end=slot_end)
+                for slot_start, slot_end in slots
+            ],
+        ),
+    }
+    return fast_response(FreeSlotsResponse, result)
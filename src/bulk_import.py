@@ -0,0 +1,303 @@
+"""
+Offline bulk import of historical interviews and their feedback.
+
+A CSV or JSONL file holds one interview per row, identified by the email of
+its candidate, with optional feedback:
+
+    candidate_email,interviewer,scheduled_at,duration_minutes,result,rating,comment
+
+Rows stream through a generator pipeline (read, validate with InterviewCreate
+and FeedbackCreate, resolve the candidate in an in-memory email map, batch)
+and every batch is inserted in one transaction together with the checkpoint
+of the file, so an interrupted import resumes after the last committed batch.
+Invalid rows and unknown candidates are logged and skipped. History is taken
+as is: interviewer overlaps are not checked.
+
+run it with
+    python -m src.bulk_import interviews.csv feedback-2019.jsonl
+"""
+
+import argparse
+import asyncio
+import csv
+import json
+import os
+import time
+from dataclasses import dataclass
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import Connection, delete, insert, select, text
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from settings import IMPORT_BATCH_SIZE, logger
+from src.database import (
+    CandidateModel,
+    FeedbackModel,
+    ImportCheckpointModel,
+    InterviewModel,
+    SuspendedTriggerModel,
+    engine,
+)
+from src.models.models import (
+    FEEDBACK_OUTBOX_TRIGGER,
+    FEEDBACK_SEARCH_TRIGGER,
+    search_comments_sql,
+)
+from src.scheduling import scheduled_time
+from src.schemas.feedback import FeedbackCreate
+from src.schemas.interview import InterviewCreate
+
+INTERVIEW_FIELDS = ("interviewer", "scheduled_at", "duration_minutes", "result")
+FEEDBACK_FIELDS = ("rating", "comment")
+
+# suspended while a batch inserts its feedback: the search trigger collects
+# all the comments of the candidate again for every feedback row, quadratic
+# over a candidate's history, so a batch indexes them once instead; and
+# historical feedback is not news to the HR systems (outbox)
+SUSPENDED_TRIGGERS = (FEEDBACK_SEARCH_TRIGGER, FEEDBACK_OUTBOX_TRIGGER)
+
+
+@dataclass
+class ImportRow:
+    candidate_id: str
+    interview: InterviewCreate
+    feedback: Optional[FeedbackCreate]
+
+
+@dataclass
+class ImportReport:
+    source: str
+    rows_done: int = 0
+    imported: int = 0
+    rejected: int = 0
+    resumed_at: int = 0
+    seconds: float = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        processed = self.rows_done - self.resumed_at
+        return processed / self.seconds if self.seconds else 0.0
+
+
+def read_records(path: str) -> Iterator[Any]:
+    """
+    Stream the records of a .csv or .jsonl file as dicts. JSONL lines that
+    are not valid JSON are kept as strings so they are rejected like any
+    invalid record.
+    """
+    with open(path, newline="", encoding="utf-8") as file:
+        if path.endswith(".csv"):
+            yield from csv.DictReader(file)
+        elif path.endswith((".jsonl", ".ndjson")):
+            for line in file:
+                if not line.strip():
+                    continue
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    yield line
+        else:
+            raise ValueError(f"Unsupported import file (.csv or .jsonl): {path}")
+
+
+def _present(record: dict, fields: Tuple[str, ...]) -> dict:
+    # empty CSV cells fall back to the schema defaults
+    return {
+        field: record[field]
+        for field in fields
+        if record.get(field) is not None and record[field] != ""
+    }
+
+
+def parse_records(
+    records: Iterable[Tuple[int, Any]], candidate_ids: Dict[str, str], source: str
+) -> Iterator[Tuple[int, Optional[ImportRow]]]:
+    """
+    Validate numbered records, yielding (number, row), or (number, None) for a
+    rejected record so that it still counts towards the checkpoint.
+    """
+    for number, record in records:
+        if not isinstance(record, dict):
+            logger.warning(f"{source} row {number}: not a JSON object")
+            yield number, None
+            continue
+
+        candidate_id = candidate_ids.get(record.get("candidate_email") or "")
+        if candidate_id is None:
+            logger.warning(f"{source} row {number}: unknown candidate email")
+            yield number, None
+            continue
+
+        try:
+            interview = InterviewCreate(**_present(record, INTERVIEW_FIELDS))
+            feedback_fields = _present(record, FEEDBACK_FIELDS)
+            feedback = FeedbackCreate(**feedback_fields) if feedback_fields else None
+        except ValidationError as exc:
+            error = exc.errors()[0]
+            location = ".".join(str(part) for part in error["loc"])
+            logger.warning(f"{source} row {number}: {location}: {error['msg']}")
+            yield number, None
+            continue
+
+        yield number, ImportRow(candidate_id, interview, feedback)
+
+
+def batched(iterable: Iterable, size: int) -> Iterator[list]:
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def load_candidate_ids(connection: Connection) -> Dict[str, str]:
+    candidates = connection.execute(select(CandidateModel.email, CandidateModel.id))
+    return {email: candidate_id for email, candidate_id in candidates}
+
+
+def get_checkpoint(connection: Connection, source: str) -> int:
+    rows_done = connection.execute(
+        select(ImportCheckpointModel.rows_done).where(
+            ImportCheckpointModel.source == source
+        )
+    ).scalar()
+    return rows_done or 0
+
+
+def insert_batch(
+    connection: Connection, rows: List[ImportRow], source: str, rows_done: int
+) -> None:
+    """Insert the interviews and feedback of a batch and move the checkpoint."""
+    checkpoint = sqlite_insert(ImportCheckpointModel).values(
+        source=source, rows_done=rows_done
+    )
+    connection.execute(
+        checkpoint.on_conflict_do_update(
+            index_elements=[ImportCheckpointModel.source],
+            set_={
+                "rows_done": checkpoint.excluded.rows_done,
+                "updated_at": checkpoint.excluded.updated_at,
+            },
+        )
+    )
+    if not rows:
+        return
+
+    # multi-row INSERT ... RETURNING statements, the ids come back in the
+    # order of the rows (sorted on InterviewModel.import_sentinel)
+    interview_query_result = connection.execute(
+        insert(InterviewModel).returning(
+            InterviewModel.id, sort_by_parameter_order=True
+        ),
+        [
+            {
+                "candidate_id": row.candidate_id,
+                "interviewer": row.interview.interviewer,
+                "scheduled_at": scheduled_time(row.interview.scheduled_at),
+                "duration_minutes": row.interview.duration_minutes,
+                "result": row.interview.result,
+            }
+            for row in rows
+        ],
+    )
+    interview_ids = interview_query_result.scalars().all()
+
+    feedbacks = [
+        {
+            "interview_id": interview_id,
+            "rating": row.feedback.rating,
+            "comment": row.feedback.comment,
+        }
+        for interview_id, row in zip(interview_ids, rows)
+        if row.feedback is not None
+    ]
+    if not feedbacks:
+        return
+
+    # suspended for this transaction only: the rows are deleted before the
+    # commit, and a failed batch rolls them back with everything else
+    connection.execute(
+        insert(SuspendedTriggerModel),
+        [{"name": trigger_name} for trigger_name in SUSPENDED_TRIGGERS],
+    )
+    connection.execute(insert(FeedbackModel), feedbacks)
+    connection.execute(
+        text(search_comments_sql(":candidate_id")),
+        [
+            {"candidate_id": candidate_id}
+            for candidate_id in {
+                row.candidate_id for row in rows if row.feedback is not None
+            }
+        ],
+    )
+    connection.execute(
+        delete(SuspendedTriggerModel).where(
+            SuspendedTriggerModel.name.in_(SUSPENDED_TRIGGERS)
+        )
+    )
+
+
+async def import_file(
+    path: str,
+    engine: AsyncEngine = engine,
+    batch_size: int = IMPORT_BATCH_SIZE,
+    source: Optional[str] = None,
+    restart: bool = False,
+) -> ImportReport:
+    """
+    Import a file, resuming from its checkpoint unless restart is set. The
+    checkpoint is kept under source, the absolute path of the file by default.
+    """
+    report = ImportReport(source=source or os.path.abspath(path))
+    started_at = time.perf_counter()
+
+    async with engine.connect() as conn:
+        candidate_ids = await conn.run_sync(load_candidate_ids)
+        if not restart:
+            report.resumed_at = await conn.run_sync(get_checkpoint, report.source)
+    report.rows_done = report.resumed_at
+
+    records = islice(enumerate(read_records(path), 1), report.resumed_at, None)
+    for batch in batched(parse_records(records, candidate_ids, path), batch_size):
+        rows = [row for _, row in batch if row is not None]
+        rows_done = batch[-1][0]
+        async with engine.begin() as conn:
+            await conn.run_sync(insert_batch, rows, report.source, rows_done)
+
+        report.rows_done = rows_done
+        report.imported += len(rows)
+        report.rejected += len(batch) - len(rows)
+        report.seconds = time.perf_counter() - started_at
+        logger.info(
+            f"{path}: {report.rows_done} rows done, {report.imported} imported, "
+            f"{report.rows_per_second:.0f} rows/s"
+        )
+
+    report.seconds = time.perf_counter() - started_at
+    return report
+
+
+async def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("paths", nargs="+", help=".csv or .jsonl files")
+    parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+    parser.add_argument(
+        "--restart", action="store_true", help="ignore the checkpoints"
+    )
+    args = parser.parse_args(argv)
+
+    for path in args.paths:
+        report = await import_file(
+            path, batch_size=args.batch_size, restart=args.restart
+        )
+        logger.info(
+            f"{path}: imported {report.imported} interviews, rejected "
+            f"{report.rejected} rows, resumed at row {report.resumed_at}, "
+            f"{report.rows_per_second:.0f} rows/s"
+        )
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
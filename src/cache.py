@@ -0,0 +1,183 @@
+"""
+In-process read cache for hot GET routes.
+
+Entries expire after a TTL, the least recently used entry is evicted once the
+cache is full, and every entry can carry tags (e.g. "candidate:<id>") so a
+write route can drop everything derived from the rows it changed.
+"""
+
+import time
+from collections import OrderedDict
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Hashable,
+    Iterable,
+    Optional,
+    Set,
+)
+
+from settings import (
+    ANALYTICS_CACHE_MAX_ENTRIES,
+    ANALYTICS_CACHE_TTL_SECONDS,
+    READ_CACHE_BACKEND,
+    READ_CACHE_MAX_ENTRIES,
+    READ_CACHE_TTL_SECONDS,
+)
+
+MISSING = object()
+
+
+def candidate_tag(candidate_id: str) -> str:
+    return f"candidate:{candidate_id}"
+
+
+def interview_tag(interview_id: int) -> str:
+    return f"interview:{interview_id}"
+
+
+class ReadCache:
+    """
+    Cache interface used by the routes. This base class caches nothing, so
+    it doubles as the backend for READ_CACHE_BACKEND=none.
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        # bumped by every invalidation, see get_or_load
+        self.generation = 0
+
+    def get(self, key: Hashable) -> Any:
+        self.misses += 1
+        return MISSING
+
+    def set(self, key: Hashable, value: Any, tags: Iterable[str] = ()) -> None:
+        pass
+
+    def invalidate(self, *keys: Hashable) -> None:
+        self.generation += 1
+
+    def invalidate_tags(self, *tags: str) -> None:
+        self.generation += 1
+
+    def clear(self) -> None:
+        self.generation += 1
+
+    def __len__(self) -> int:
+        return 0
+
+    async def get_or_load(
+        self,
+        key: Hashable,
+        loader: Callable[[], Awaitable[Any]],
+        tags: Optional[Callable[[Any], Iterable[str]]] = None,
+    ) -> Any:
+        value = self.get(key)
+        if value is not MISSING:
+            return value
+
+        generation = self.generation
+        value = await loader()
+
+        # a write committed while we were loading may have invalidated what
+        # we just read, so only store it if nothing was invalidated meanwhile
+        if generation == self.generation:
+            self.set(key, value, tags(value) if tags else ())
+
+        return value
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self)}
+
+
+class TTLCache(ReadCache):
+    def __init__(
+        self,
+        max_entries: int,
+        ttl_seconds: float,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        super().__init__()
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        # key -> (expires_at, value, tags), least recently used first
+        self._entries: OrderedDict = OrderedDict()
+        self._tag_keys: Dict[str, Set[Hashable]] = {}
+
+    def get(self, key: Hashable) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return MISSING
+
+        expires_at, value, _ = entry
+        if expires_at <= self.clock():
+            self._remove(key)
+            self.misses += 1
+            return MISSING
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, tags: Iterable[str] = ()) -> None:
+        if key in self._entries:
+            self._remove(key)
+
+        tags = tuple(tags)
+        self._entries[key] = (self.clock() + self.ttl_seconds, value, tags)
+        for tag in tags:
+            self._tag_keys.setdefault(tag, set()).add(key)
+
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+
+    def invalidate(self, *keys: Hashable) -> None:
+        super().invalidate(*keys)
+        for key in keys:
+            self._remove(key)
+
+    def invalidate_tags(self, *tags: str) -> None:
+        super().invalidate_tags(*tags)
+        for tag in tags:
+            for key in self._tag_keys.pop(tag, set()):
+                self._remove(key)
+
+    def clear(self) -> None:
+        super().clear()
+        self._entries.clear()
+        self._tag_keys.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _remove(self, key: Hashable) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+
+        for tag in entry[2]:
+            keys = self._tag_keys.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tag_keys[tag]
+
+
+def create_read_cache(backend: str = READ_CACHE_BACKEND) -> ReadCache:
+    if backend == "memory":
+        return TTLCache(READ_CACHE_MAX_ENTRIES, READ_CACHE_TTL_SECONDS)
+    if backend == "none":
+        return ReadCache()
+    raise ValueError(f"Unknown read cache backend: {backend}")
+
+
+read_cache = create_read_cache()
+
+# analytics results are only as fresh as ANALYTICS_CACHE_TTL_SECONDS, writes
+# do not invalidate them
+analytics_cache = TTLCache(ANALYTICS_CACHE_MAX_ENTRIES, ANALYTICS_CACHE_TTL_SECONDS)
@@ -0,0 +1,337 @@
+"""
+The change feed: entries of the change_log table (written by triggers, see
+src.models.models) with the current state of the rows they name.
+
+GET /api/v1/changes pages through it for delta sync: the changes to a row
+within a page collapse into its current state. GET /api/v1/changes/stream
+pushes every entry as a server-sent event instead, with the row as it was
+written (and the previous status of a candidate), so that no transition is
+lost: one poller per process tails the change log, every SSE_POLL_SECONDS
+and right after every commit made in this process, and fans the events out
+to the streams through bounded queues. A stream whose queue is full is
+closed instead of slowing the others down, and its client resumes from the
+Last-Event-ID it has seen, as the event ids are the change log sequence
+numbers.
+"""
+
+import asyncio
+import json
+from typing import AsyncIterator, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import event, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, sessionmaker
+
+from settings import (
+    MAX_PAGE_SIZE,
+    SSE_HEARTBEAT_SECONDS,
+    SSE_POLL_SECONDS,
+    SSE_QUEUE_SIZE,
+    logger,
+)
+from src.database import (
+    AsyncSessionLocal,
+    CandidateModel,
+    ChangeLogModel,
+    FeedbackModel,
+    InterviewModel,
+)
+from src.metrics import registry
+from src.schemas.candidate import CandidateCreateDataResponse
+from src.schemas.changes import (
+    ChangeData,
+    ChangeEntityEnum,
+    ChangeEventData,
+    ChangeEventsData,
+    ChangeFeedData,
+    ChangeOperationEnum,
+)
+from src.schemas.feedback import FeedbackViewData
+from src.schemas.interview import InterviewCreateData
+
+# entity -> (model, primary key type, schema of the current row)
+CHANGE_ENTITIES = {
+    ChangeEntityEnum.CANDIDATE: (CandidateModel, str, CandidateCreateDataResponse),
+    ChangeEntityEnum.INTERVIEW: (InterviewModel, int, InterviewCreateData),
+    ChangeEntityEnum.FEEDBACK: (FeedbackModel, int, FeedbackViewData),
+}
+
+# queued in place of the events a stream could not keep up with
+DROPPED = object()
+
+
+async def load_changes(db: AsyncSession, since: int, limit: int) -> ChangeFeedData:
+    """The changes after the sequence number since, at most limit entries."""
+    change_query_result = await db.execute(
+        select(ChangeLogModel)
+        .where(ChangeLogModel.seq > since)
+        .order_by(ChangeLogModel.seq)
+        .limit(limit + 1)
+    )
+    entries = change_query_result.scalars().all()
+
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+
+    # several changes to the same row within a page collapse into the last one
+    latest: Dict[Tuple[str, str], ChangeLogModel] = {}
+    for entry in entries:
+        latest.pop((entry.entity, entry.entity_id), None)
+        latest[(entry.entity, entry.entity_id)] = entry
+
+    # load the current state of every upserted row, one query per entity
+    current_rows: Dict[Tuple[str, str], object] = {}
+    for entity, (model, id_type, schema) in CHANGE_ENTITIES.items():
+        entity_ids = [
+            id_type(entry.entity_id)
+            for (entry_entity, _), entry in latest.items()
+            if entry_entity == entity and entry.operation == ChangeOperationEnum.UPSERT
+        ]
+        if not entity_ids:
+            continue
+
+        row_query_result = await db.execute(
+            select(model).where(model.id.in_(entity_ids))
+        )
+        for row in row_query_result.scalars().all():
+            current_rows[(entity.value, str(row.id))] = schema.model_validate(row)
+
+    changes: List[ChangeData] = []
+    for key, entry in latest.items():
+        if entry.operation == ChangeOperationEnum.UPSERT and key not in current_rows:
+            # deleted later on, its tombstone follows in this or a later page
+            continue
+
+        changes.append(
+            ChangeData(
+                seq=entry.seq,
+                entity=entry.entity,
+                entity_id=entry.entity_id,
+                operation=entry.operation,
+                changed_at=entry.changed_at,
+                data=current_rows.get(key),
+            )
+        )
+
+    return ChangeFeedData(
+        changes=changes,
+        next_since=entries[-1].seq if entries else since,
+        has_more=has_more,
+    )
+
+
+async def load_events(db: AsyncSession, since: int, limit: int) -> ChangeEventsData:
+    """
+    Every entry after the sequence number since, at most limit, each with the
+    row logged by its trigger; the rows themselves are not read.
+    """
+    event_query_result = await db.execute(
+        select(ChangeLogModel)
+        .where(ChangeLogModel.seq > since)
+        .order_by(ChangeLogModel.seq)
+        .limit(limit + 1)
+    )
+    entries = event_query_result.scalars().all()
+
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+
+    events: List[ChangeEventData] = []
+    for entry in entries:
+        data, previous_status = None, None
+        if entry.data is not None:
+            row = json.loads(entry.data)
+            previous_status = row.pop("previous_status", None)
+            _, _, schema = CHANGE_ENTITIES[ChangeEntityEnum(entry.entity)]
+            data = schema.model_validate(row)
+
+        events.append(
+            ChangeEventData(
+                seq=entry.seq,
+                entity=entry.entity,
+                entity_id=entry.entity_id,
+                operation=entry.operation,
+                changed_at=entry.changed_at,
+                data=data,
+                previous_status=previous_status,
+            )
+        )
+
+    return ChangeEventsData(
+        events=events,
+        next_since=entries[-1].seq if entries else since,
+        has_more=has_more,
+    )
+
+
+def format_event(change_event: ChangeEventData) -> str:
+    return (
+        f"id: {change_event.seq}\n"
+        f"event: {change_event.entity.value}\n"
+        f"data: {change_event.model_dump_json()}\n\n"
+    )
+
+
+class Subscription:
+    def __init__(self, queue_size: int):
+        self.queue: asyncio.Queue = asyncio.Queue(queue_size)
+
+
+class ChangeBroker:
+    """Fans the changes found by a single poller out to every subscription."""
+
+    def __init__(
+        self,
+        sessions: sessionmaker = AsyncSessionLocal,
+        poll_seconds: float = SSE_POLL_SECONDS,
+        queue_size: int = SSE_QUEUE_SIZE,
+        heartbeat_seconds: float = SSE_HEARTBEAT_SECONDS,
+    ):
+        self.sessions = sessions
+        self.poll_seconds = poll_seconds
+        self.queue_size = queue_size
+        self.heartbeat_seconds = heartbeat_seconds
+        self.subscriptions: Set[Subscription] = set()
+        # sequence number of the last change published
+        self.last_seq = 0
+        self._poller: Optional[asyncio.Task] = None
+        self._polling: Optional[asyncio.Future] = None
+        self._wakeup: Optional[asyncio.Event] = None
+
+    def notify(self) -> None:
+        """Poll now rather than at the end of the interval."""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def publish(self, change_event: ChangeEventData) -> None:
+        for subscription in list(self.subscriptions):
+            try:
+                subscription.queue.put_nowait(change_event)
+            except asyncio.QueueFull:
+                self._drop(subscription)
+
+    def _drop(self, subscription: Subscription) -> None:
+        self.subscriptions.discard(subscription)
+        dropped_subscriptions.inc()
+        while not subscription.queue.empty():
+            subscription.queue.get_nowait()
+        subscription.queue.put_nowait(DROPPED)
+
+    async def _subscribe(self) -> Subscription:
+        if self._poller is None or self._poller.done():
+            self._polling = asyncio.get_running_loop().create_future()
+            self._wakeup = asyncio.Event()
+            self._poller = asyncio.ensure_future(self._poll(self._polling))
+
+        subscription = Subscription(self.queue_size)
+        self.subscriptions.add(subscription)
+        try:
+            # the poller starts at the end of the change log
+            await asyncio.shield(self._polling)
+        except BaseException:
+            self._unsubscribe(subscription)
+            raise
+        return subscription
+
+    def _unsubscribe(self, subscription: Subscription) -> None:
+        self.subscriptions.discard(subscription)
+        if not self.subscriptions and self._poller is not None:
+            self._poller.cancel()
+            self._poller = None
+            self._wakeup = None
+
+    async def _poll(self, polling: asyncio.Future) -> None:
+        try:
+            async with self.sessions() as db:
+                head_query_result = await db.execute(
+                    select(func.coalesce(func.max(ChangeLogModel.seq), 0))
+                )
+                self.last_seq = head_query_result.scalar()
+        except Exception as exc:
+            polling.set_exception(exc)
+            # the subscribers see the exception, nobody awaits this task
+            polling.exception()
+            return
+        polling.set_result(None)
+
+        wakeup = self._wakeup
+        while True:
+            try:
+                await asyncio.wait_for(wakeup.wait(), self.poll_seconds)
+            except asyncio.TimeoutError:
+                pass
+            wakeup.clear()
+
+            try:
+                async with self.sessions() as db:
+                    has_more = True
+                    while has_more:
+                        page = await load_events(db, self.last_seq, MAX_PAGE_SIZE)
+                        for change_event in page.events:
+                            self.publish(change_event)
+                        self.last_seq = page.next_since
+                        has_more = page.has_more
+            except Exception:
+                logger.exception("change stream poll failed")
+
+    async def stream(self, since: Optional[int] = None) -> AsyncIterator[str]:
+        """
+        Server-sent events of the changes after since, or of the changes from
+        now on, with a comment line every heartbeat_seconds while idle.
+        """
+        subscription = await self._subscribe()
+        getter: Optional[asyncio.Future] = None
+        try:
+            last_seq = self.last_seq if since is None else since
+
+            # catch up from the change log, the events published in the
+            # meantime wait in the queue
+            has_more = last_seq < self.last_seq
+            while has_more:
+                async with self.sessions() as db:
+                    page = await load_events(db, last_seq, MAX_PAGE_SIZE)
+                for change_event in page.events:
+                    yield format_event(change_event)
+                last_seq = page.next_since
+                has_more = page.has_more
+
+            while True:
+                # the same get() is awaited across heartbeats, cancelling it
+                # on a timeout could lose the event it just took
+                if getter is None:
+                    getter = asyncio.ensure_future(subscription.queue.get())
+                done, _ = await asyncio.wait({getter}, timeout=self.heartbeat_seconds)
+                if not done:
+                    yield ": keep-alive\n\n"
+                    continue
+                change_event, getter = getter.result(), None
+
+                if change_event is DROPPED:
+                    return
+                # already sent while catching up
+                if change_event.seq <= last_seq:
+                    continue
+                yield format_event(change_event)
+                last_seq = change_event.seq
+        finally:
+            if getter is not None:
+                getter.cancel()
+            self._unsubscribe(subscription)
+
+
+change_broker = ChangeBroker()
+
+dropped_subscriptions = registry.counter(
+    "sse_dropped_subscriptions_total",
+    "Change streams closed because their client did not keep up.",
+)
+registry.gauge(
+    "sse_subscriptions",
+    "Open change streams.",
+    lambda: {(): len(change_broker.subscriptions)},
+)
+
+
+@event.listens_for(Session, "after_commit")
+def _notify_change_broker(session):
+    change_broker.notify()
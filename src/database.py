@@ -1,18 +1,168 @@
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+import itertools
+import time
+from functools import partial
+from typing import Dict, Optional
+
+from fastapi import Request, Response
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
 from sqlalchemy.orm import declarative_base, sessionmaker
 
-from settings import DATABASE_URL
+from settings import (
+    DATABASE_REPLICA_URLS,
+    DATABASE_URL,
+    DB_ENGINE_OPTIONS,
+    READ_YOUR_WRITES_SECONDS,
+)
+
+SQLITE_PRAGMAS = (
+    "journal_mode",
+    "synchronous",
+    "busy_timeout",
+    "cache_size",
+    "mmap_size",
+)
+
+
+def _set_sqlite_pragmas(options: dict, dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    for pragma in SQLITE_PRAGMAS:
+        cursor.execute(f"PRAGMA {pragma} = {options[pragma]}")
+    # SQLite only enforces foreign keys (and ON DELETE CASCADE) when asked to
+    cursor.execute("PRAGMA foreign_keys = ON")
+    cursor.close()
+
+
+def create_engine_from_profile(
+    url: str, options: dict = DB_ENGINE_OPTIONS
+) -> AsyncEngine:
+    """
+    Create an async engine configured by an engine profile from settings.py
+    (pool sizing, and SQLite pragmas set by a connect hook).
+    """
+    database_url = make_url(url)
+    is_sqlite = database_url.get_backend_name() == "sqlite"
+    is_memory = is_sqlite and database_url.database in (None, "", ":memory:")
+
+    engine_kwargs = {}
+    # in-memory SQLite uses a single shared connection (StaticPool)
+    if not is_memory:
+        engine_kwargs.update(
+            pool_size=options["pool_size"],
+            max_overflow=options["max_overflow"],
+            pool_timeout=options["pool_timeout"],
+        )
+
+    # Set echo=True for debugging purposes, can be set to False in production
+    engine = create_async_engine(database_url, echo=False, **engine_kwargs)
+
+    if is_sqlite:
+        event.listen(
+            engine.sync_engine, "connect", partial(_set_sqlite_pragmas, options)
+        )
+
+    return engine
+
+
+# Session.info key of the read target ("primary" or "replica") of a session,
+# see read_target
+READ_TARGET = "read_target"
 
-# Set echo=True for debugging purposes, can be set to False in production
-engine = create_async_engine(DATABASE_URL, echo=False)
-AsyncSessionLocal = sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+engine = create_engine_from_profile(DATABASE_URL)
+AsyncSessionLocal = sessionmaker(
+    engine,
+    expire_on_commit=False,
+    class_=AsyncSession,
+    info={READ_TARGET: "primary"},
+)
+
+replica_engines = [create_engine_from_profile(url) for url in DATABASE_REPLICA_URLS]
+_replica_sessions = itertools.cycle(
+    [
+        sessionmaker(
+            replica,
+            expire_on_commit=False,
+            class_=AsyncSession,
+            info={READ_TARGET: "replica"},
+        )
+        for replica in replica_engines
+    ]
+)
+
+# every engine by name, for the pool metrics
+engines: Dict[str, AsyncEngine] = {
+    "primary": engine,
+    **{f"replica-{index}": each for index, each in enumerate(replica_engines, 1)},
+}
+
+# unix time of the client's last write, see get_read_db
+LAST_WRITE_COOKIE = "last_write_at"
 
 Base = declarative_base()
 
 
-async def get_db():
+async def get_db(response: Response):
+    """
+    Session on the primary, for the routes that write. The client is sent a
+    LAST_WRITE_COOKIE so that its next reads see what it wrote.
+    """
+    response.set_cookie(
+        LAST_WRITE_COOKIE,
+        f"{time.time():.3f}",
+        max_age=max(1, round(READ_YOUR_WRITES_SECONDS)),
+        httponly=True,
+    )
     async with AsyncSessionLocal() as session:
         yield session
 
+
+def read_sessionmaker(last_write_at: Optional[str] = None) -> sessionmaker:
+    """
+    Sessions on the next replica, or on the primary when no replica is
+    configured or the client wrote (LAST_WRITE_COOKIE) within
+    READ_YOUR_WRITES_SECONDS, as the replicas may not have its write yet.
+    """
+    if not replica_engines:
+        return AsyncSessionLocal
+
+    if last_write_at:
+        try:
+            wrote_seconds_ago = time.time() - float(last_write_at)
+        except ValueError:
+            wrote_seconds_ago = 0.0
+        if wrote_seconds_ago < READ_YOUR_WRITES_SECONDS:
+            return AsyncSessionLocal
+
+    return next(_replica_sessions)
+
+
+def read_target(session: AsyncSession) -> str:
+    """
+    "replica" for the sessions of a replica, which may lag behind the primary,
+    "primary" otherwise. Results cached or shared between requests are kept
+    apart by it, so a read of a lagging replica never answers a read that was
+    routed to the primary to see its client's writes.
+    """
+    return session.info.get(READ_TARGET, "primary")
+
+
+async def get_read_db(request: Request):
+    """Session for the routes that only read, see read_sessionmaker."""
+    async with read_sessionmaker(request.cookies.get(LAST_WRITE_COOKIE))() as session:
+        yield session
+
 # cannot move this import to the top because of Base will not know CandidateModel, FeedbackModel, InterviewModel !!!
-from src.models.models import CandidateModel, FeedbackModel, InterviewModel
+from src.models.models import (
+    CandidateModel,
+    CandidateSearchRowModel,
+    ChangeLogModel,
+    FeedbackModel,
+    IdempotencyKeyModel,
+    ImportCheckpointModel,
+    InterviewModel,
+    OutboxMessageModel,
+    SchemaMigrationModel,
+    SuspendedTriggerModel,
+)
@@ -0,0 +1,68 @@
+"""
+ETag / If-None-Match helpers.
+
+ETags are derived from the version columns of the rows behind a response, so
+a conditional GET can be answered after one query that reads only ids and
+versions, without loading or serializing the object graph.
+"""
+
+import hashlib
+from typing import Any, Iterable, List, Optional, Tuple
+
+from fastapi import Request, Response
+
+
+class NotModified(Exception):
+    def __init__(self, etag: str):
+        self.etag = etag
+
+
+def make_etag(rows: Iterable[Any]) -> str:
+    digest = hashlib.blake2b(digest_size=12)
+    for row in rows:
+        digest.update(repr(row).encode())
+    return f'W/"{digest.hexdigest()}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+
+    # If-None-Match uses the weak comparison
+    opaque_tag = etag.removeprefix("W/")
+    return any(
+        tag.strip().removeprefix("W/") == opaque_tag for tag in if_none_match.split(",")
+    )
+
+
+def check_etag(if_none_match: Optional[str], etag: str) -> None:
+    if etag_matches(if_none_match, etag):
+        raise NotModified(etag)
+
+
+async def not_modified_handler(request: Request, exc: NotModified) -> Response:
+    return Response(status_code=304, headers={"ETag": exc.etag})
+
+
+def candidate_version_rows(
+    candidate_id: str, candidate_version: int, interviews: Iterable[Any]
+) -> List[Tuple]:
+    """
+    (candidate id, version, interview id, version, feedback id, version) rows
+    for loaded ORM objects, in the same shape and order as the version queries
+    (candidates LEFT JOIN interviews LEFT JOIN feedbacks ORDER BY interview id).
+    """
+    rows = [
+        (
+            candidate_id,
+            candidate_version,
+            interview.id,
+            interview.version,
+            interview.feedback.id if interview.feedback else None,
+            interview.feedback.version if interview.feedback else None,
+        )
+        for interview in sorted(interviews, key=lambda interview: interview.id)
+    ]
+    return rows or [(candidate_id, candidate_version, None, None, None, None)]
@@ -0,0 +1,245 @@
+"""
+Idempotency-Key support for POST routes.
+
+The first POST with a given Idempotency-Key claims the key in the
+idempotency_keys table, runs the route and stores its response (status, body
+and REPLAYED_HEADERS). A retry with the same key and body gets the stored response back
+through a primary key lookup without running the route again, a retry with
+another body is refused with 422, and a retry arriving while the first
+request is still running with 409. Server errors are not stored, the key is
+released so the request can be retried.
+
+purge the expired keys manually with
+    python -m src.idempotency
+"""
+
+import asyncio
+import datetime
+import hashlib
+import json
+from typing import List, Optional
+
+from sqlalchemy import Connection, delete, select, update
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.ext.asyncio import AsyncEngine
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse, Response
+
+from settings import (
+    IDEMPOTENCY_KEY_TTL_SECONDS,
+    IDEMPOTENCY_LOCK_SECONDS,
+    IDEMPOTENCY_PURGE_BATCH,
+    logger,
+)
+from src.database import IdempotencyKeyModel, engine
+
+IDEMPOTENCY_KEY_HEADER = "idempotency-key"
+MAX_IDEMPOTENCY_KEY_LENGTH = 255
+# response headers stored with the key: the ETag and Location of what was
+# created, and the last_write_at cookie that routes the client's next reads
+REPLAYED_HEADERS = ("etag", "location", "set-cookie")
+
+idempotency_keys = IdempotencyKeyModel.__table__
+
+
+def _now() -> datetime.datetime:
+    # naive UTC, as DateTime columns are read back from SQLite
+    return datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+
+
+def purge_expired_keys(connection: Connection, limit: Optional[int] = None) -> int:
+    """Delete expired keys, the oldest `limit` ones, and return their count."""
+    expired = (
+        select(idempotency_keys.c.key_hash)
+        .where(idempotency_keys.c.expires_at <= _now())
+        .order_by(idempotency_keys.c.expires_at)
+        .limit(limit)
+    )
+    return connection.execute(
+        delete(idempotency_keys).where(idempotency_keys.c.key_hash.in_(expired))
+    ).rowcount
+
+
+async def _read_body(receive) -> bytes:
+    chunks = []
+    while True:
+        message = await receive()
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body", False):
+            return b"".join(chunks)
+
+
+class IdempotencyMiddleware:
+    def __init__(
+        self,
+        app,
+        engine: AsyncEngine = engine,
+        ttl_seconds: float = IDEMPOTENCY_KEY_TTL_SECONDS,
+        lock_seconds: float = IDEMPOTENCY_LOCK_SECONDS,
+    ):
+        self.app = app
+        self.engine = engine
+        self.ttl = datetime.timedelta(seconds=ttl_seconds)
+        self.lock = datetime.timedelta(seconds=lock_seconds)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST":
+            await self.app(scope, receive, send)
+            return
+
+        key = Headers(scope=scope).get(IDEMPOTENCY_KEY_HEADER)
+        if key is None:
+            await self.app(scope, receive, send)
+            return
+
+        if not key or len(key) > MAX_IDEMPOTENCY_KEY_LENGTH:
+            response = JSONResponse(
+                {"detail": "Idempotency-Key must be 1 to 255 characters long"},
+                status_code=400,
+            )
+            await response(scope, receive, send)
+            return
+
+        body = await _read_body(receive)
+        key_hash = hashlib.sha256(
+            f"{scope['method']} {scope['path']}\n{key}".encode()
+        ).digest()
+        request_hash = hashlib.sha256(body).digest()
+
+        stored = await self._claim(key_hash, request_hash)
+        if stored is not None:
+            await self._replay(stored, request_hash)(scope, receive, send)
+            return
+
+        body_received = False
+
+        async def receive_body():
+            nonlocal body_received
+            if body_received:
+                return await receive()
+            body_received = True
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        # the response is held back until it is stored, so a retry made as
+        # soon as the client has it is already answered from the table
+        messages = []
+
+        async def hold_response(message):
+            messages.append(message)
+
+        try:
+            await self.app(scope, receive_body, hold_response)
+        except BaseException:
+            await self._release(key_hash)
+            raise
+
+        status_code = messages[0]["status"]
+        if status_code >= 500:
+            await self._release(key_hash)
+        else:
+            response_body = b"".join(
+                message.get("body", b"")
+                for message in messages
+                if message["type"] == "http.response.body"
+            )
+            # ASGI header names are lowercase
+            response_headers = [
+                [name.decode("latin-1"), value.decode("latin-1")]
+                for name, value in messages[0].get("headers", [])
+                if name.decode("latin-1") in REPLAYED_HEADERS
+            ]
+            await self._store(key_hash, status_code, response_body, response_headers)
+
+        for message in messages:
+            await send(message)
+
+    async def _claim(self, key_hash: bytes, request_hash: bytes):
+        """Claim the key, or return the row of the request that holds it."""
+        now = _now()
+        claim = insert(idempotency_keys).values(
+            key_hash=key_hash, request_hash=request_hash, expires_at=now + self.lock
+        )
+        # an expired key is claimed again, whether it was stored or abandoned
+        claim = claim.on_conflict_do_update(
+            index_elements=[idempotency_keys.c.key_hash],
+            set_={
+                "request_hash": claim.excluded.request_hash,
+                "status_code": None,
+                "body": None,
+                "headers": None,
+                "expires_at": claim.excluded.expires_at,
+            },
+            where=idempotency_keys.c.expires_at <= now,
+        )
+        async with self.engine.begin() as conn:
+            if (await conn.execute(claim)).rowcount:
+                return None
+            stored_query_result = await conn.execute(
+                select(
+                    idempotency_keys.c.request_hash,
+                    idempotency_keys.c.status_code,
+                    idempotency_keys.c.body,
+                    idempotency_keys.c.headers,
+                ).where(idempotency_keys.c.key_hash == key_hash)
+            )
+            return stored_query_result.one()
+
+    def _replay(self, stored, request_hash: bytes) -> Response:
+        if stored.request_hash != request_hash:
+            return JSONResponse(
+                {"detail": "Idempotency-Key was already used for another request"},
+                status_code=422,
+            )
+        if stored.status_code is None:
+            return JSONResponse(
+                {"detail": "A request with this Idempotency-Key is in progress"},
+                status_code=409,
+                headers={"Retry-After": "1"},
+            )
+        response = Response(
+            content=stored.body,
+            status_code=stored.status_code,
+            media_type="application/json",
+            headers={"Idempotent-Replayed": "true"},
+        )
+        # keys stored before migration 15 have no headers
+        for name, value in json.loads(stored.headers or "[]"):
+            response.headers.append(name, value)
+        return response
+
+    async def _store(
+        self,
+        key_hash: bytes,
+        status_code: int,
+        body: bytes,
+        headers: List[List[str]],
+    ) -> None:
+        async with self.engine.begin() as conn:
+            await conn.execute(
+                update(idempotency_keys)
+                .where(idempotency_keys.c.key_hash == key_hash)
+                .values(
+                    status_code=status_code,
+                    body=body,
+                    headers=json.dumps(headers),
+                    expires_at=_now() + self.ttl,
+                )
+            )
+            await conn.run_sync(purge_expired_keys, IDEMPOTENCY_PURGE_BATCH)
+
+    async def _release(self, key_hash: bytes) -> None:
+        async with self.engine.begin() as conn:
+            await conn.execute(
+                delete(idempotency_keys).where(idempotency_keys.c.key_hash == key_hash)
+            )
+
+
+async def main():
+    async with engine.begin() as conn:
+        purged = await conn.run_sync(purge_expired_keys)
+    await engine.dispose()
+    logger.info(f"purged {purged} expired idempotency keys")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
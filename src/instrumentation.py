@@ -0,0 +1,232 @@
+"""
+Per-request database instrumentation.
+
+Engine events count every statement executed while a `QueryStats` is active
+in the current context; the ASGI middleware activates one per HTTP request and
+reports it as response headers (opt-in), a structured log line for requests
+over the slow threshold, and Prometheus metrics. The connection pools of the
+primary and replica engines are reported as gauges.
+"""
+
+import json
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Dict, Iterator, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
+
+from settings import QUERY_STATS_HEADERS, SLOW_REQUEST_DB_MS, logger
+from src.database import engines
+from src.metrics import registry
+
+# statements longer than this are truncated in log lines
+MAX_LOGGED_STATEMENT_LENGTH = 500
+
+# transaction control is not counted: the sqlite3 driver sends BEGIN and
+# COMMIT without SQLAlchemy seeing them, and savepoints (tests run every
+# session in one) would otherwise add to the count of the same work
+TRANSACTION_CONTROL_PREFIXES = (
+    "BEGIN",
+    "SAVEPOINT",
+    "RELEASE SAVEPOINT",
+    "ROLLBACK TO SAVEPOINT",
+)
+
+
+@dataclass
+class QueryStats:
+    count: int = 0
+    total_seconds: float = 0.0
+    slowest_seconds: float = 0.0
+    slowest_statement: Optional[str] = None
+
+    def record(self, statement: str, seconds: float) -> None:
+        self.count += 1
+        self.total_seconds += seconds
+        if seconds >= self.slowest_seconds:
+            self.slowest_seconds = seconds
+            self.slowest_statement = statement
+
+
+_current_stats: ContextVar[Optional[QueryStats]] = ContextVar(
+    "query_stats", default=None
+)
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    """
+    Count the statements run in this context (SQLAlchemy propagates the
+    context into the greenlets that run the async drivers).
+    """
+    stats = QueryStats()
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+
+# listening on the Engine class covers every engine, including test engines
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started_at", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started_at = conn.info["query_started_at"].pop()
+    stats = _current_stats.get()
+    if stats is not None and not statement.startswith(TRANSACTION_CONTROL_PREFIXES):
+        stats.record(statement, time.perf_counter() - started_at)
+
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(exception_context):
+    # a failed statement never reaches after_cursor_execute
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("query_started_at"):
+        conn.info["query_started_at"].pop()
+
+
+http_requests = registry.counter(
+    "http_requests_total",
+    "HTTP requests by route and status code.",
+    ("method", "route", "status"),
+)
+http_request_duration = registry.histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency.",
+    ("method", "route"),
+)
+db_queries = registry.histogram(
+    "db_queries_per_request",
+    "Database statements executed per HTTP request.",
+    ("method", "route"),
+    buckets=(0, 1, 2, 3, 5, 10, 25, 50, 100),
+)
+db_duration = registry.histogram(
+    "db_duration_seconds_per_request",
+    "Total database time per HTTP request.",
+    ("method", "route"),
+)
+
+
+def _pool_connections() -> Dict[Tuple[str, str], float]:
+    samples = {}
+    for name, each in engines.items():
+        pool = each.sync_engine.pool
+        # in-memory databases share a single connection (StaticPool)
+        if not isinstance(pool, QueuePool):
+            continue
+        samples[(name, "checked_out")] = pool.checkedout()
+        samples[(name, "idle")] = pool.checkedin()
+        # negative while the pool itself is not full yet
+        samples[(name, "overflow")] = max(pool.overflow(), 0)
+    return samples
+
+
+def _pool_size() -> Dict[Tuple[str], float]:
+    return {
+        (name,): each.sync_engine.pool.size()
+        for name, each in engines.items()
+        if isinstance(each.sync_engine.pool, QueuePool)
+    }
+
+
+registry.gauge(
+    "db_pool_connections",
+    "Database connections per engine by state: checked out, idle in the "
+    "pool, and checked out beyond the pool size.",
+    _pool_connections,
+    ("engine", "state"),
+)
+registry.gauge(
+    "db_pool_size",
+    "Connections each engine keeps in its pool.",
+    _pool_size,
+    ("engine",),
+)
+
+
+def _route_label(scope) -> str:
+    # the route template keeps the label cardinality bounded
+    route = scope.get("route")
+    return getattr(route, "path", "unmatched")
+
+
+class QueryInstrumentationMiddleware:
+    def __init__(
+        self,
+        app,
+        add_headers: bool = QUERY_STATS_HEADERS,
+        slow_request_db_ms: float = SLOW_REQUEST_DB_MS,
+    ):
+        self.app = app
+        self.add_headers = add_headers
+        self.slow_request_db_ms = slow_request_db_ms
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        started_at = time.perf_counter()
+
+        with track_queries() as stats:
+
+            async def send_with_stats(message):
+                nonlocal status_code
+                if message["type"] == "http.response.start":
+                    status_code = message["status"]
+                    # streamed bodies run more queries after the headers are sent
+                    if self.add_headers:
+                        message["headers"] = list(message.get("headers", [])) + [
+                            (b"x-db-query-count", str(stats.count).encode()),
+                            (
+                                b"x-db-time-ms",
+                                f"{stats.total_seconds * 1000:.3f}".encode(),
+                            ),
+                        ]
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_stats)
+            finally:
+                seconds = time.perf_counter() - started_at
+                self._report(scope, status_code, stats, seconds)
+
+    def _report(self, scope, status_code: int, stats: QueryStats, seconds: float):
+        method = scope["method"]
+        route = _route_label(scope)
+
+        http_requests.inc((method, route, str(status_code)))
+        http_request_duration.observe(seconds, (method, route))
+        db_queries.observe(stats.count, (method, route))
+        db_duration.observe(stats.total_seconds, (method, route))
+
+        db_ms = stats.total_seconds * 1000
+        if db_ms >= self.slow_request_db_ms:
+            logger.warning(
+                "slow request "
+                + json.dumps(
+                    {
+                        "method": method,
+                        "path": scope["path"],
+                        "route": route,
+                        "status": status_code,
+                        "duration_ms": round(seconds * 1000, 3),
+                        "query_count": stats.count,
+                        "db_time_ms": round(db_ms, 3),
+                        "slowest_query_ms": round(stats.slowest_seconds * 1000, 3),
+                        "slowest_query": (stats.slowest_statement or "")[
+                            :MAX_LOGGED_STATEMENT_LENGTH
+                        ],
+                    }
+                )
+            )
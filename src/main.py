@@ -1,23 +1,55 @@
+import asyncio
+
 from fastapi import FastAPI
-from src.database import Base, engine
+from settings import OUTBOX_DISPATCHER, SCHEMA_STARTUP_MODE
+from src.database import engine
+from src.etag import NotModified, not_modified_handler
+from src.idempotency import IdempotencyMiddleware
+from src.instrumentation import QueryInstrumentationMiddleware
+from src.metrics import metrics_router
+from src.migrations import check_schema, upgrade_database
+from src.outbox import OutboxDispatcher, make_sink
 from src.api.v1.routes.health_check import health_check_router
 from src.api.v1.routes.candidate import candidate_router
 from src.api.v1.routes.interview import interview_router
+from src.api.v1.routes.interviewer import interviewer_router
 from src.api.v1.routes.feedback import feedback_router
-from contextlib import asynccontextmanager
+from src.api.v1.routes.changes import change_router
+from src.api.v1.routes.analytics import analytics_router
+from contextlib import asynccontextmanager, suppress
 
 
-# Database setup
+# Database setup, see SCHEMA_STARTUP_MODE
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+    if SCHEMA_STARTUP_MODE == "upgrade":
+        await upgrade_database(engine)
+    elif SCHEMA_STARTUP_MODE == "check":
+        async with engine.connect() as conn:
+            await conn.run_sync(check_schema)
+    elif SCHEMA_STARTUP_MODE != "skip":
+        raise ValueError(f"Unknown schema startup mode: {SCHEMA_STARTUP_MODE}")
+
+    # the outbox dispatcher, unless it runs as a process of its own
+    dispatcher = None
+    if OUTBOX_DISPATCHER:
+        dispatcher = asyncio.ensure_future(OutboxDispatcher(make_sink()).run())
     yield
+    if dispatcher is not None:
+        dispatcher.cancel()
+        with suppress(asyncio.CancelledError):
+            await dispatcher
 
 app = FastAPI(lifespan=lifespan)
+app.add_exception_handler(NotModified, not_modified_handler)
+app.add_middleware(IdempotencyMiddleware)
+app.add_middleware(QueryInstrumentationMiddleware)
 
+app.include_router(metrics_router)
 app.include_router(health_check_router, prefix="/api/v1")
 app.include_router(candidate_router, prefix="/api/v1/candidates", tags=["candidates"])
 app.include_router(interview_router, prefix="/api/v1/candidates/{candidate_id}/interviews", tags=["interviews"])
+app.include_router(interviewer_router, prefix="/api/v1/interviewers", tags=["interviewers"])
 app.include_router(feedback_router, prefix="/api/v1/interviews/{interview_id}/feedback", tags=["feedback"])
-
+app.include_router(change_router, prefix="/api/v1/changes", tags=["changes"])
+app.include_router(analytics_router, prefix="/api/v1/analytics", tags=["analytics"])
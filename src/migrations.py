@@ -0,0 +1,362 @@
+"""
+Versioned schema migrations.
+
+Base.metadata.create_all only creates tables that do not exist yet, it never
+adds indexes or columns to existing tables. Every schema change that has to
+reach an existing database is therefore appended to MIGRATIONS, and the
+versions applied to a database are recorded in the schema_migrations table.
+New tables get a migration as well, even one without steps: a database at
+HEAD_VERSION skips create_all altogether.
+
+run it manually with
+    python -m src.migrations
+"""
+
+import asyncio
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Sequence
+
+from sqlalchemy import Connection, Table, func, inspect, select, text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from settings import DEFAULT_INTERVIEW_DURATION_MINUTES, logger
+from src.database import (
+    Base,
+    FeedbackModel,
+    InterviewModel,
+    SchemaMigrationModel,
+    engine,
+)
+from src.models.models import (
+    CHANGE_LOG_TABLES,
+    FEEDBACK_OUTBOX_TRIGGER,
+    FEEDBACK_SEARCH_TRIGGER,
+    create_candidate_search,
+    create_change_log_triggers,
+    create_outbox_triggers,
+    create_summary_triggers,
+)
+from src.search import rebuild_candidate_search
+from src.summaries import rebuild_summaries
+
+Step = Callable[[Connection], None]
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    description: str
+    steps: Sequence[Step]
+
+    def upgrade(self, connection: Connection) -> None:
+        for step in self.steps:
+            step(connection)
+
+
+def _sql(statement: str) -> Step:
+    def step(connection: Connection) -> None:
+        connection.execute(text(statement))
+
+    return step
+
+
+def _add_column(table_name: str, column_name: str, column_ddl: str) -> Step:
+    # tables created by create_all in the same upgrade already have the column
+    def step(connection: Connection) -> None:
+        columns = inspect(connection).get_columns(table_name)
+        if column_name not in {column["name"] for column in columns}:
+            connection.execute(
+                text(f"ALTER TABLE {table_name} ADD COLUMN {column_name} {column_ddl}")
+            )
+
+    return step
+
+
+def _rebuild_table(table: Table, where: Optional[str] = None) -> Step:
+    """
+    SQLite cannot alter constraints of an existing table: copy its rows aside
+    (only the ones matching `where`), drop it, create it again from its
+    current definition and copy back the columns both versions have. Indexes
+    come back with the table; triggers go with the old one and are created
+    again by a later step.
+    """
+
+    def step(connection: Connection) -> None:
+        copy_name = f"_{table.name}_copy"
+        existing_columns = {
+            column["name"] for column in inspect(connection).get_columns(table.name)
+        }
+        columns = ", ".join(
+            column.name for column in table.columns if column.name in existing_columns
+        )
+
+        connection.exec_driver_sql(
+            f"CREATE TEMP TABLE {copy_name} AS SELECT {columns} FROM {table.name} "
+            "WHERE 0"
+        )
+        # pysqlite opens the transaction at this first INSERT, and
+        # defer_foreign_keys only lasts until the end of a transaction
+        connection.exec_driver_sql(
+            f"INSERT INTO {copy_name} SELECT {columns} FROM {table.name}"
+            + (f" WHERE {where}" if where else "")
+        )
+        # dropping a parent table orphans its child rows until they are copied
+        # back, so check foreign keys at commit only
+        connection.exec_driver_sql("PRAGMA defer_foreign_keys = ON")
+        connection.exec_driver_sql(f"DROP TABLE {table.name}")
+        table.create(connection)
+        connection.exec_driver_sql(
+            f"INSERT INTO {table.name} ({columns}) SELECT {columns} FROM {copy_name}"
+        )
+        connection.exec_driver_sql(f"DROP TABLE {copy_name}")
+
+    return step
+
+
+MIGRATIONS: List[Migration] = [
+    Migration(
+        1,
+        "index hot lookup columns",
+        [
+            _sql(
+                "CREATE INDEX IF NOT EXISTS ix_candidates_status_id "
+                "ON candidates (status, id)"
+            ),
+            _sql(
+                "CREATE INDEX IF NOT EXISTS ix_candidates_position_id "
+                "ON candidates (position, id)"
+            ),
+            _sql(
+                "CREATE INDEX IF NOT EXISTS ix_interviews_candidate_id_scheduled_at "
+                "ON interviews (candidate_id, scheduled_at)"
+            ),
+        ],
+    ),
+    Migration(
+        2,
+        "row version columns for ETags",
+        [
+            _add_column(table_name, "version", "INTEGER NOT NULL DEFAULT 1")
+            for table_name in ("candidates", "interviews", "feedbacks")
+        ],
+    ),
+    Migration(3, "change log triggers", [create_change_log_triggers]),
+    Migration(
+        4,
+        "cascade candidate and interview deletes in the database",
+        [
+            # rows whose parent is already gone cannot satisfy the foreign key
+            _rebuild_table(
+                InterviewModel.__table__,
+                where="candidate_id IN (SELECT id FROM candidates)",
+            ),
+            _rebuild_table(
+                FeedbackModel.__table__,
+                where="interview_id IN (SELECT id FROM interviews)",
+            ),
+            create_change_log_triggers,
+        ],
+    ),
+    Migration(
+        5,
+        "interview duration and interviewer calendar index",
+        [
+            _add_column(
+                "interviews",
+                "duration_minutes",
+                f"INTEGER NOT NULL DEFAULT {DEFAULT_INTERVIEW_DURATION_MINUTES}",
+            ),
+            _sql(
+                "CREATE INDEX IF NOT EXISTS ix_interviews_interviewer_scheduled_at "
+                "ON interviews (interviewer, scheduled_at)"
+            ),
+        ],
+    ),
+    Migration(
+        6,
+        "candidate timestamps and hiring funnel index",
+        [
+            # existing candidates have no known creation or hire time and
+            # stay out of the time-to-hire figures
+            _add_column("candidates", "created_at", "DATETIME"),
+            _add_column("candidates", "hired_at", "DATETIME"),
+            _sql(
+                "CREATE INDEX IF NOT EXISTS ix_candidates_position_status "
+                "ON candidates (position, status)"
+            ),
+        ],
+    ),
+    Migration(
+        7,
+        "candidate interview and feedback summaries",
+        [
+            *(
+                _add_column("candidates", column_name, column_ddl)
+                for column_name, column_ddl in (
+                    ("interview_count", "INTEGER NOT NULL DEFAULT 0"),
+                    ("feedback_count", "INTEGER NOT NULL DEFAULT 0"),
+                    ("rating_total", "INTEGER NOT NULL DEFAULT 0"),
+                    ("average_rating", "FLOAT"),
+                    ("last_interview_at", "DATETIME"),
+                )
+            ),
+            # the change log now ignores updates that leave version alone,
+            # so that the summaries filled in below are not logged as changes
+            *(
+                _sql(f"DROP TRIGGER IF EXISTS trg_{table_name}_update_change_log")
+                for table_name in CHANGE_LOG_TABLES.values()
+            ),
+            create_change_log_triggers,
+            create_summary_triggers,
+            rebuild_summaries,
+            _sql(
+                "CREATE INDEX IF NOT EXISTS ix_candidates_average_rating_id "
+                "ON candidates (average_rating, id)"
+            ),
+            _sql(
+                "CREATE INDEX IF NOT EXISTS ix_candidates_last_interview_at_id "
+                "ON candidates (last_interview_at, id)"
+            ),
+        ],
+    ),
+    Migration(
+        8,
+        "candidate full-text search",
+        [create_candidate_search, rebuild_candidate_search],
+    ),
+    # the tables themselves come from create_all
+    Migration(9, "idempotency keys", []),
+    Migration(10, "import checkpoints", []),
+    Migration(11, "outbox", [create_outbox_triggers]),
+    Migration(
+        12,
+        "interviews scheduled in whole seconds",
+        [
+            # the stored format is YYYY-MM-DD HH:MM:SS.ffffff
+            _sql(
+                "UPDATE interviews "
+                "SET scheduled_at = substr(scheduled_at, 1, 19) || '.000000' "
+                "WHERE substr(scheduled_at, 21) NOT IN ('', '000000')"
+            ),
+        ],
+    ),
+    Migration(
+        13,
+        "suspendable feedback triggers",
+        [
+            _sql(f"DROP TRIGGER IF EXISTS {FEEDBACK_SEARCH_TRIGGER}"),
+            _sql(f"DROP TRIGGER IF EXISTS {FEEDBACK_OUTBOX_TRIGGER}"),
+            create_candidate_search,
+            create_outbox_triggers,
+        ],
+    ),
+    Migration(
+        14,
+        "change log entries with the row as written",
+        [
+            _add_column("change_log", "data", "VARCHAR"),
+            *(
+                _sql(f"DROP TRIGGER IF EXISTS trg_{table_name}_{event}_change_log")
+                for table_name in CHANGE_LOG_TABLES.values()
+                for event in ("insert", "update", "delete")
+            ),
+            create_change_log_triggers,
+        ],
+    ),
+    Migration(
+        15,
+        "idempotency keys with response headers",
+        [_add_column("idempotency_keys", "headers", "VARCHAR")],
+    ),
+    Migration(
+        16,
+        "interview insert sentinel",
+        [_add_column("interviews", "import_sentinel", "INTEGER")],
+    ),
+]
+
+HEAD_VERSION = MIGRATIONS[-1].version
+
+
+def get_schema_version(connection: Connection) -> int:
+    if not inspect(connection).has_table(SchemaMigrationModel.__tablename__):
+        return 0
+
+    version = connection.execute(
+        select(func.max(SchemaMigrationModel.version))
+    ).scalar()
+    return version or 0
+
+
+def _record(connection: Connection, migration: Migration) -> None:
+    connection.execute(
+        SchemaMigrationModel.__table__.insert().values(
+            version=migration.version, description=migration.description
+        )
+    )
+
+
+def upgrade(connection: Connection) -> int:
+    """
+    Bring the database up to HEAD_VERSION and return the version it was at.
+
+    A brand-new database gets the current schema from create_all and is
+    stamped with every migration, an existing one gets create_all for any
+    new tables plus the migrations it has not applied yet.
+    """
+    is_new_database = not inspect(connection).has_table("candidates")
+    current_version = 0 if is_new_database else get_schema_version(connection)
+    if current_version == HEAD_VERSION:
+        return current_version
+
+    Base.metadata.create_all(connection)
+
+    for migration in MIGRATIONS:
+        if migration.version <= current_version:
+            continue
+        if not is_new_database:
+            logger.info(
+                f"applying migration {migration.version}: {migration.description}"
+            )
+            migration.upgrade(connection)
+        _record(connection, migration)
+
+    return current_version
+
+
+def check_schema(connection: Connection) -> int:
+    """
+    Return the schema version of the database, raise if it is not
+    HEAD_VERSION. For app workers that must not migrate the database.
+    """
+    version = get_schema_version(connection)
+    if version != HEAD_VERSION:
+        raise RuntimeError(
+            f"database schema is at version {version}, the app needs "
+            f"{HEAD_VERSION}: run python -m src.migrations"
+        )
+    return version
+
+
+async def upgrade_database(engine: AsyncEngine) -> int:
+    """
+    Run upgrade in a BEGIN IMMEDIATE transaction, which takes the write lock
+    before the schema version is read. Concurrent upgrades, e.g. several
+    workers started with SCHEMA_STARTUP_MODE=upgrade, wait for each other and
+    the later ones find the database at HEAD_VERSION.
+    """
+    async with engine.connect() as conn:
+        await conn.exec_driver_sql("BEGIN IMMEDIATE")
+        previous_version = await conn.run_sync(upgrade)
+        await conn.commit()
+    return previous_version
+
+
+async def main():
+    previous_version = await upgrade_database(engine)
+    await engine.dispose()
+    logger.info(f"schema upgraded from version {previous_version} to {HEAD_VERSION}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -6,13 +6,20 @@ from sqlalchemy import (
     Column,
     DateTime,
     Enum,
+    Float,
     ForeignKey,
+    Index,
     Integer,
+    LargeBinary,
     String,
     UniqueConstraint,
+    event,
+    func,
+    insert_sentinel,
 )
 from sqlalchemy.orm import relationship
 
+from settings import DEFAULT_INTERVIEW_DURATION_MINUTES
 from src.database import Base
 
 
@@ -25,6 +32,16 @@ class CandidateStatus(str, enum.Enum):
 
 class CandidateModel(Base):
     __tablename__ = "candidates"
+    __table_args__ = (
+        # filters on status / position followed by keyset pagination on id
+        Index("ix_candidates_status_id", "status", "id"),
+        Index("ix_candidates_position_id", "position", "id"),
+        # covers the hiring funnel GROUP BY position, status
+        Index("ix_candidates_position_status", "position", "status"),
+        # list views sorted by a summary column, keyset paginated on id
+        Index("ix_candidates_average_rating_id", "average_rating", "id"),
+        Index("ix_candidates_last_interview_at_id", "last_interview_at", "id"),
+    )
 
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
 
@@ -32,21 +49,67 @@ class CandidateModel(Base):
     email = Column(String, unique=True, nullable=False)
     position = Column(String, nullable=False)
     status = Column(Enum(CandidateStatus), nullable=False)
+    # bumped by the ORM on every UPDATE, the ETags are derived from it
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+    # time-to-hire analytics; both are NULL for candidates created before the
+    # columns existed. hired_at is set when the status becomes hired and
+    # cleared when it changes to anything else
+    created_at = Column(
+        DateTime,
+        nullable=True,
+        default=lambda: datetime.datetime.now(datetime.timezone.utc),
+    )
+    hired_at = Column(DateTime, nullable=True)
+    # summary of the candidate's interviews and feedback, maintained by the
+    # triggers in summary_trigger_ddl and rebuilt by python -m src.summaries.
+    # They do not bump version, so they are neither a change for the change
+    # log nor a conflict for the ORM
+    interview_count = Column(Integer, nullable=False, default=0, server_default="0")
+    feedback_count = Column(Integer, nullable=False, default=0, server_default="0")
+    rating_total = Column(Integer, nullable=False, default=0, server_default="0")
+    average_rating = Column(Float, nullable=True)
+    last_interview_at = Column(DateTime, nullable=True)
 
+    # ON DELETE CASCADE removes the children in the database
     interviews = relationship(
         "InterviewModel",
         back_populates="candidate",
         cascade="all, delete-orphan",
+        passive_deletes=True,
     )
 
+    __mapper_args__ = {"version_id_col": version}
+
 
 class InterviewModel(Base):
     __tablename__ = "interviews"
+    __table_args__ = (
+        # also serves plain candidate_id lookups (leftmost prefix)
+        Index(
+            "ix_interviews_candidate_id_scheduled_at", "candidate_id", "scheduled_at"
+        ),
+        # interviewer calendar: overlap checks and free-slot search are range
+        # scans over one interviewer's scheduled_at
+        Index("ix_interviews_interviewer_scheduled_at", "interviewer", "scheduled_at"),
+    )
+
     id = Column(Integer, primary_key=True, autoincrement=True)
-    candidate_id = Column(String, ForeignKey("candidates.id"), nullable=False)
+    candidate_id = Column(
+        String, ForeignKey("candidates.id", ondelete="CASCADE"), nullable=False
+    )
     interviewer = Column(String, nullable=False)
     scheduled_at = Column(DateTime, nullable=False, default=datetime.datetime.now(datetime.timezone.utc))
     result = Column(String, nullable=True)
+    duration_minutes = Column(
+        Integer,
+        nullable=False,
+        default=DEFAULT_INTERVIEW_DURATION_MINUTES,
+        server_default=str(DEFAULT_INTERVIEW_DURATION_MINUTES),
+    )
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+    # the position of the row in its multi-row INSERT, which SQLAlchemy uses
+    # to return the ids of an executemany in parameter order (bulk import)
+    import_sentinel = insert_sentinel("import_sentinel")
 
     # relationships
     candidate = relationship("CandidateModel", back_populates="interviews")
@@ -55,8 +118,11 @@ class InterviewModel(Base):
         back_populates="interview",
         uselist=False,
         cascade="all, delete-orphan",
+        passive_deletes=True,
     )
 
+    __mapper_args__ = {"version_id_col": version}
+
 
 class FeedbackModel(Base):
     __tablename__ = "feedbacks"
@@ -65,8 +131,435 @@ class FeedbackModel(Base):
     )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
-    interview_id = Column(Integer, ForeignKey("interviews.id"), nullable=False)
+    interview_id = Column(
+        Integer, ForeignKey("interviews.id", ondelete="CASCADE"), nullable=False
+    )
     rating = Column(Integer, nullable=False)
     comment = Column(String, nullable=False)
+    version = Column(Integer, nullable=False, default=1, server_default="1")
 
     interview = relationship("InterviewModel", back_populates="feedback")
+
+    __mapper_args__ = {"version_id_col": version}
+
+
+class CandidateSearchRowModel(Base):
+    __tablename__ = "candidate_search_rows"
+
+    # rowid of the candidate in the candidate_search FTS5 table. The implicit
+    # rowid of candidates (string primary key) may change on VACUUM, so the
+    # index is keyed by this stable integer instead
+    search_rowid = Column(Integer, primary_key=True, autoincrement=True)
+    candidate_id = Column(String, unique=True, nullable=False)
+
+
+class IdempotencyKeyModel(Base):
+    __tablename__ = "idempotency_keys"
+    __table_args__ = (
+        Index("ix_idempotency_keys_expires_at", "expires_at"),
+        # rows are only ever looked up by key_hash, so the table is stored as
+        # that primary key b-tree alone
+        {"sqlite_with_rowid": False},
+    )
+
+    # sha256 of the method, path and Idempotency-Key header
+    key_hash = Column(LargeBinary, primary_key=True)
+    # sha256 of the request body, a key is only replayed for the same body
+    request_hash = Column(LargeBinary, nullable=False)
+    # all NULL while the first request is still being processed
+    status_code = Column(Integer)
+    body = Column(LargeBinary)
+    # JSON list of the [name, value] response headers that are replayed
+    headers = Column(String)
+    expires_at = Column(DateTime, nullable=False)
+
+
+class ImportCheckpointModel(Base):
+    __tablename__ = "import_checkpoints"
+
+    # one row per imported file (python -m src.bulk_import), updated in the
+    # transaction of every batch, so an interrupted import resumes after the
+    # last committed row
+    source = Column(String, primary_key=True)
+    rows_done = Column(Integer, nullable=False)
+    updated_at = Column(
+        DateTime,
+        nullable=False,
+        default=lambda: datetime.datetime.now(datetime.timezone.utc),
+        onupdate=lambda: datetime.datetime.now(datetime.timezone.utc),
+    )
+
+
+class OutboxMessageModel(Base):
+    __tablename__ = "outbox"
+    __table_args__ = (Index("ix_outbox_next_attempt_at", "next_attempt_at"),)
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    # "candidate.hired", "candidate.rejected" or "feedback.submitted"
+    event = Column(String, nullable=False)
+    # JSON document, written by the triggers of outbox_trigger_ddl
+    payload = Column(String, nullable=False)
+    created_at = Column(
+        DateTime, nullable=False, server_default=func.current_timestamp()
+    )
+    attempts = Column(Integer, nullable=False, default=0, server_default="0")
+    # moved forward while a dispatcher holds the message and after a failed
+    # attempt, NULL once the message has been given up
+    next_attempt_at = Column(
+        DateTime, nullable=True, server_default=func.current_timestamp()
+    )
+    last_error = Column(String, nullable=True)
+
+
+class SuspendedTriggerModel(Base):
+    __tablename__ = "suspended_triggers"
+
+    # triggers guarded by suspendable() skip their work while their name is
+    # in this table. Rows are only ever inserted and deleted again inside one
+    # transaction (see src.bulk_import), so no other connection sees them
+    name = Column(String, primary_key=True)
+
+
+class SchemaMigrationModel(Base):
+    __tablename__ = "schema_migrations"
+
+    version = Column(Integer, primary_key=True, autoincrement=False)
+    description = Column(String, nullable=False)
+    applied_at = Column(
+        DateTime,
+        nullable=False,
+        default=lambda: datetime.datetime.now(datetime.timezone.utc),
+    )
+
+
+class ChangeLogModel(Base):
+    __tablename__ = "change_log"
+
+    # global, monotonically increasing change sequence number
+    seq = Column(Integer, primary_key=True, autoincrement=True)
+    entity = Column(String, nullable=False)
+    entity_id = Column(String, nullable=False)
+    operation = Column(String, nullable=False)
+    changed_at = Column(
+        DateTime, nullable=False, server_default=func.current_timestamp()
+    )
+    # JSON of the row as written (as deleted, for deletes), plus the
+    # previous_* values of CHANGE_LOG_PREVIOUS_COLUMNS for updates. NULL for
+    # the entries logged before the column existed
+    data = Column(String, nullable=True)
+
+
+# the change log is written by triggers, so every INSERT / UPDATE / DELETE is
+# recorded in the same transaction as the change itself, whether it comes
+# from the ORM, a bulk statement or a cascade
+CHANGE_LOG_TABLES = {
+    "candidate": "candidates",
+    "interview": "interviews",
+    "feedback": "feedbacks",
+}
+
+
+# columns of the row logged in change_log.data
+CHANGE_LOG_COLUMNS = {
+    "candidate": ("id", "name", "email", "position", "status", "hired_at"),
+    "interview": (
+        "id",
+        "candidate_id",
+        "interviewer",
+        "scheduled_at",
+        "duration_minutes",
+        "result",
+    ),
+    "feedback": ("id", "interview_id", "rating", "comment"),
+}
+# columns whose value before an update is logged as well, as previous_<name>
+CHANGE_LOG_PREVIOUS_COLUMNS = {"candidate": ("status",)}
+
+
+def _change_log_data(entity: str, row: str, event_name: str) -> str:
+    pairs = [f"'{name}', {row}.{name}" for name in CHANGE_LOG_COLUMNS[entity]]
+    if event_name == "update":
+        pairs.extend(
+            f"'previous_{name}', OLD.{name}"
+            for name in CHANGE_LOG_PREVIOUS_COLUMNS.get(entity, ())
+        )
+    return f"json_object({', '.join(pairs)})"
+
+
+def change_log_trigger_ddl():
+    for entity, table_name in CHANGE_LOG_TABLES.items():
+        for event_name, row, operation in (
+            ("insert", "NEW", "upsert"),
+            ("update", "NEW", "upsert"),
+            ("delete", "OLD", "delete"),
+        ):
+            # every write path bumps version, writes that do not (the
+            # candidate summaries) are not changes of the row
+            when = ""
+            if event_name == "update":
+                when = "WHEN NEW.version IS NOT OLD.version "
+            yield (
+                "CREATE TRIGGER IF NOT EXISTS "
+                f"trg_{table_name}_{event_name}_change_log "
+                f"AFTER {event_name.upper()} ON {table_name} "
+                f"{when}"
+                "BEGIN "
+                "INSERT INTO change_log (entity, entity_id, operation, data) "
+                f"VALUES ('{entity}', {row}.id, '{operation}', "
+                f"{_change_log_data(entity, row, event_name)}); "
+                "END"
+            )
+
+
+def create_change_log_triggers(connection):
+    for statement in change_log_trigger_ddl():
+        connection.exec_driver_sql(statement)
+
+
+def _candidate_feedbacks(aggregate: str) -> str:
+    return (
+        f"(SELECT {aggregate} FROM feedbacks "
+        "JOIN interviews ON interviews.id = feedbacks.interview_id "
+        "WHERE interviews.candidate_id = candidates.id)"
+    )
+
+
+def summary_recompute_sql(where: str) -> str:
+    """
+    UPDATE recomputing the summary columns of the candidates matching `where`
+    from their interviews and feedback, a few index lookups per candidate.
+    """
+    return (
+        "UPDATE candidates SET "
+        "interview_count = (SELECT count(*) FROM interviews "
+        "WHERE interviews.candidate_id = candidates.id), "
+        "last_interview_at = (SELECT max(scheduled_at) FROM interviews "
+        "WHERE interviews.candidate_id = candidates.id), "
+        f"feedback_count = {_candidate_feedbacks('count(*)')}, "
+        f"rating_total = {_candidate_feedbacks('coalesce(sum(feedbacks.rating), 0)')}, "
+        f"average_rating = {_candidate_feedbacks('avg(feedbacks.rating)')} "
+        f"WHERE {where}"
+    )
+
+
+def summary_trigger_ddl():
+    # inserts, the hot path, adjust the counters in place. Deletes and
+    # updates recompute the candidate, which stays correct whatever order
+    # SQLite runs the cascaded deletes in: the feedback of a deleted
+    # interview no longer joins to the candidate
+    yield (
+        "CREATE TRIGGER IF NOT EXISTS trg_interviews_insert_summary "
+        "AFTER INSERT ON interviews "
+        "BEGIN "
+        "UPDATE candidates SET "
+        "interview_count = interview_count + 1, "
+        "last_interview_at = "
+        "max(coalesce(last_interview_at, NEW.scheduled_at), NEW.scheduled_at) "
+        "WHERE id = NEW.candidate_id; "
+        "END"
+    )
+    yield (
+        "CREATE TRIGGER IF NOT EXISTS trg_feedbacks_insert_summary "
+        "AFTER INSERT ON feedbacks "
+        "BEGIN "
+        "UPDATE candidates SET "
+        "feedback_count = feedback_count + 1, "
+        "rating_total = rating_total + NEW.rating, "
+        "average_rating = (rating_total + NEW.rating) * 1.0 / (feedback_count + 1) "
+        "WHERE id = (SELECT candidate_id FROM interviews "
+        "WHERE id = NEW.interview_id); "
+        "END"
+    )
+    for table_name, event_name, where in (
+        ("interviews", "DELETE", "id = OLD.candidate_id"),
+        (
+            "interviews",
+            "UPDATE OF candidate_id, scheduled_at",
+            "id IN (OLD.candidate_id, NEW.candidate_id)",
+        ),
+        (
+            "feedbacks",
+            "DELETE",
+            "id = (SELECT candidate_id FROM interviews WHERE id = OLD.interview_id)",
+        ),
+        (
+            "feedbacks",
+            "UPDATE OF interview_id, rating",
+            "id IN (SELECT candidate_id FROM interviews "
+            "WHERE id IN (OLD.interview_id, NEW.interview_id))",
+        ),
+    ):
+        yield (
+            "CREATE TRIGGER IF NOT EXISTS "
+            f"trg_{table_name}_{event_name.split()[0].lower()}_summary "
+            f"AFTER {event_name} ON {table_name} "
+            "BEGIN "
+            f"{summary_recompute_sql(where)}; "
+            "END"
+        )
+
+
+def create_summary_triggers(connection):
+    for statement in summary_trigger_ddl():
+        connection.exec_driver_sql(statement)
+
+
+# feedback triggers the bulk import suspends
+FEEDBACK_SEARCH_TRIGGER = "trg_feedbacks_insert_search"
+FEEDBACK_OUTBOX_TRIGGER = "trg_feedbacks_insert_outbox"
+
+
+def suspendable(trigger_name: str) -> str:
+    """WHEN clause of a trigger that SuspendedTriggerModel can turn off."""
+    return (
+        "WHEN NOT EXISTS (SELECT 1 FROM suspended_triggers "
+        f"WHERE name = '{trigger_name}') "
+    )
+
+
+# full-text index of the candidates: one row per candidate with its name,
+# email, position and the comments of all its feedback, written by triggers
+CANDIDATE_SEARCH_TABLE = "candidate_search"
+
+
+def _search_row(candidate_id: str) -> str:
+    return (
+        "(SELECT search_rowid FROM candidate_search_rows "
+        f"WHERE candidate_id = {candidate_id})"
+    )
+
+
+def search_comments_sql(candidate_id: str) -> str:
+    return (
+        f"UPDATE {CANDIDATE_SEARCH_TABLE} SET comments = coalesce(("
+        "SELECT group_concat(feedbacks.comment, ' ') FROM feedbacks "
+        "JOIN interviews ON interviews.id = feedbacks.interview_id "
+        f"WHERE interviews.candidate_id = {candidate_id}), '') "
+        f"WHERE rowid = {_search_row(candidate_id)}"
+    )
+
+
+def candidate_search_ddl():
+    # prefix indexes answer the 2 and 3 character prefix queries of
+    # search-as-you-type without scanning the term list
+    yield (
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {CANDIDATE_SEARCH_TABLE} "
+        "USING fts5(name, email, position, comments, prefix='2 3', "
+        "tokenize='unicode61 remove_diacritics 2')"
+    )
+    yield (
+        "CREATE TRIGGER IF NOT EXISTS trg_candidates_insert_search "
+        "AFTER INSERT ON candidates "
+        "BEGIN "
+        "INSERT INTO candidate_search_rows (candidate_id) VALUES (NEW.id); "
+        f"INSERT INTO {CANDIDATE_SEARCH_TABLE} "
+        "(rowid, name, email, position, comments) "
+        f"VALUES ({_search_row('NEW.id')}, NEW.name, NEW.email, NEW.position, ''); "
+        "END"
+    )
+    yield (
+        "CREATE TRIGGER IF NOT EXISTS trg_candidates_update_search "
+        "AFTER UPDATE OF name, email, position ON candidates "
+        "BEGIN "
+        f"UPDATE {CANDIDATE_SEARCH_TABLE} "
+        "SET name = NEW.name, email = NEW.email, position = NEW.position "
+        f"WHERE rowid = {_search_row('NEW.id')}; "
+        "END"
+    )
+    yield (
+        "CREATE TRIGGER IF NOT EXISTS trg_candidates_delete_search "
+        "AFTER DELETE ON candidates "
+        "BEGIN "
+        f"DELETE FROM {CANDIDATE_SEARCH_TABLE} WHERE rowid = {_search_row('OLD.id')}; "
+        "DELETE FROM candidate_search_rows WHERE candidate_id = OLD.id; "
+        "END"
+    )
+    # feedback comments are collected again for the candidate, like the
+    # summaries; the feedback of a deleted interview no longer joins to it
+    feedback_candidate = (
+        "(SELECT candidate_id FROM interviews WHERE id = {}.interview_id)"
+    )
+    for table_name, event_name, candidate_ids in (
+        ("feedbacks", "INSERT", [feedback_candidate.format("NEW")]),
+        (
+            "feedbacks",
+            "UPDATE OF comment, interview_id",
+            [feedback_candidate.format("OLD"), feedback_candidate.format("NEW")],
+        ),
+        ("feedbacks", "DELETE", [feedback_candidate.format("OLD")]),
+        ("interviews", "DELETE", ["OLD.candidate_id"]),
+        (
+            "interviews",
+            "UPDATE OF candidate_id",
+            ["OLD.candidate_id", "NEW.candidate_id"],
+        ),
+    ):
+        statements = "".join(
+            f"{search_comments_sql(candidate_id)}; " for candidate_id in candidate_ids
+        )
+        trigger_name = f"trg_{table_name}_{event_name.split()[0].lower()}_search"
+        # the bulk import indexes the comments of a batch at once instead
+        when = ""
+        if trigger_name == FEEDBACK_SEARCH_TRIGGER:
+            when = suspendable(trigger_name)
+        yield (
+            f"CREATE TRIGGER IF NOT EXISTS {trigger_name} "
+            f"AFTER {event_name} ON {table_name} "
+            f"{when}"
+            f"BEGIN {statements}END"
+        )
+
+
+def create_candidate_search(connection):
+    for statement in candidate_search_ddl():
+        connection.exec_driver_sql(statement)
+
+
+# side effects of a write (notifying HR systems, sending emails) are queued
+# in the outbox in the transaction of the write, and sent by src.outbox
+def outbox_trigger_ddl():
+    yield (
+        "CREATE TRIGGER IF NOT EXISTS trg_candidates_update_outbox "
+        "AFTER UPDATE OF status ON candidates "
+        "WHEN NEW.status IS NOT OLD.status "
+        "AND NEW.status IN ('hired', 'rejected') "
+        "BEGIN "
+        "INSERT INTO outbox (event, payload) VALUES ('candidate.' || NEW.status, "
+        "json_object('candidate_id', NEW.id, 'name', NEW.name, "
+        "'email', NEW.email, 'position', NEW.position, 'status', NEW.status, "
+        "'hired_at', NEW.hired_at)); "
+        "END"
+    )
+    # historical feedback loaded by the bulk import is not news
+    yield (
+        f"CREATE TRIGGER IF NOT EXISTS {FEEDBACK_OUTBOX_TRIGGER} "
+        "AFTER INSERT ON feedbacks "
+        f"{suspendable(FEEDBACK_OUTBOX_TRIGGER)}"
+        "BEGIN "
+        "INSERT INTO outbox (event, payload) SELECT 'feedback.submitted', "
+        "json_object('feedback_id', NEW.id, 'interview_id', NEW.interview_id, "
+        "'candidate_id', interviews.candidate_id, "
+        "'interviewer', interviews.interviewer, "
+        "'rating', NEW.rating, 'comment', NEW.comment) "
+        "FROM interviews WHERE interviews.id = NEW.interview_id; "
+        "END"
+    )
+
+
+def create_outbox_triggers(connection):
+    for statement in outbox_trigger_ddl():
+        connection.exec_driver_sql(statement)
+
+
+@event.listens_for(Base.metadata, "after_create")
+def _create_triggers(target, connection, **kw):
+    create_change_log_triggers(connection)
+    create_summary_triggers(connection)
+    create_candidate_search(connection)
+    create_outbox_triggers(connection)
+
+
+@event.listens_for(Base.metadata, "after_drop")
+def _drop_candidate_search(target, connection, **kw):
+    # not part of the metadata, so drop_all leaves it behind otherwise
+    connection.exec_driver_sql(f"DROP TABLE IF EXISTS {CANDIDATE_SEARCH_TABLE}")
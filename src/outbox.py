@@ -0,0 +1,317 @@
+"""
+Dispatcher of the transactional outbox.
+
+Triggers queue a message in the outbox table in the transaction of the write
+that calls for it (see outbox_trigger_ddl), so a message exists exactly when
+its write was committed, and the request never waits for the HR system or
+the email service. The dispatcher claims due messages in batches, sends them
+to a sink with limited concurrency, deletes the sent ones and schedules the
+failed ones again with exponential backoff, until OUTBOX_MAX_ATTEMPTS. A
+claim only holds for OUTBOX_LEASE_SECONDS, so dispatchers in several workers
+share the outbox and the messages of a dead one are sent by the others.
+Delivery is at least once: sinks get the message id to discard duplicates.
+
+run it as a process of its own (with OUTBOX_DISPATCHER=false in the app) with
+    python -m src.outbox
+"""
+
+import asyncio
+import datetime
+import json
+import urllib.request
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Set
+
+from sqlalchemy import delete, event, select, update
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.orm import Session
+
+from settings import (
+    OUTBOX_BACKOFF_SECONDS,
+    OUTBOX_BATCH_SIZE,
+    OUTBOX_CONCURRENCY,
+    OUTBOX_LEASE_SECONDS,
+    OUTBOX_MAX_ATTEMPTS,
+    OUTBOX_MAX_BACKOFF_SECONDS,
+    OUTBOX_POLL_SECONDS,
+    OUTBOX_SEND_TIMEOUT_SECONDS,
+    OUTBOX_SINK,
+    OUTBOX_WEBHOOK_URL,
+    logger,
+)
+from src.database import OutboxMessageModel, engine
+from src.metrics import registry
+
+outbox = OutboxMessageModel.__table__
+
+# longer errors are truncated in last_error
+MAX_ERROR_LENGTH = 500
+
+outbox_messages = registry.counter(
+    "outbox_messages_total",
+    "Outbox messages by event and outcome (sent, retried, dead).",
+    ("event", "outcome"),
+)
+outbox_dispatch_lag = registry.histogram(
+    "outbox_dispatch_lag_seconds",
+    "Time from the write that queued an outbox message to its delivery.",
+    ("event",),
+    buckets=(0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 300, 900, 3600),
+)
+
+
+def _now() -> datetime.datetime:
+    # naive UTC, like current_timestamp in SQLite
+    return datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+
+
+@dataclass
+class OutboxMessage:
+    id: int
+    event: str
+    payload: Dict[str, Any]
+    created_at: datetime.datetime
+    attempts: int
+
+    def to_json(self) -> bytes:
+        return json.dumps(
+            {"id": self.id, "event": self.event, "payload": self.payload}
+        ).encode()
+
+
+class LoggingSink:
+    """Logs every message, the default until a real sink is configured."""
+
+    async def send(self, message: OutboxMessage) -> None:
+        logger.info(f"outbox {message.event} {message.to_json().decode()}")
+
+
+class WebhookSink:
+    """POSTs every message as JSON, with the message id as Idempotency-Key."""
+
+    def __init__(self, url: str, timeout: float = OUTBOX_SEND_TIMEOUT_SECONDS):
+        if not url:
+            raise ValueError("OUTBOX_WEBHOOK_URL is required by the webhook sink")
+        self.url = url
+        self.timeout = timeout
+
+    def _post(self, message: OutboxMessage) -> None:
+        request = urllib.request.Request(
+            self.url,
+            data=message.to_json(),
+            headers={
+                "Content-Type": "application/json",
+                "Idempotency-Key": f"outbox-{message.id}",
+            },
+            method="POST",
+        )
+        # raises on connection errors and on 4xx / 5xx responses
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            response.read()
+
+    async def send(self, message: OutboxMessage) -> None:
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self._post, message)
+
+
+class StubSink:
+    """Keeps the messages in memory, failing the first `failures` sends."""
+
+    def __init__(self, failures: int = 0):
+        self.failures = failures
+        self.sent: List[OutboxMessage] = []
+
+    async def send(self, message: OutboxMessage) -> None:
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("stub sink failure")
+        self.sent.append(message)
+
+
+def make_sink(name: str = OUTBOX_SINK):
+    if name == "log":
+        return LoggingSink()
+    if name == "webhook":
+        return WebhookSink(OUTBOX_WEBHOOK_URL)
+    if name == "stub":
+        return StubSink()
+    raise ValueError(f"Unknown outbox sink: {name}")
+
+
+def backoff_seconds(attempts: int) -> float:
+    """Delay before the next attempt of a message that failed `attempts` times."""
+    return min(
+        OUTBOX_BACKOFF_SECONDS * 2 ** (attempts - 1), OUTBOX_MAX_BACKOFF_SECONDS
+    )
+
+
+# running dispatchers, woken up by every commit in this process
+_dispatchers: Set["OutboxDispatcher"] = set()
+
+
+class OutboxDispatcher:
+    def __init__(
+        self,
+        sink,
+        engine: AsyncEngine = engine,
+        batch_size: int = OUTBOX_BATCH_SIZE,
+        concurrency: int = OUTBOX_CONCURRENCY,
+        max_attempts: int = OUTBOX_MAX_ATTEMPTS,
+        lease_seconds: float = OUTBOX_LEASE_SECONDS,
+        send_timeout_seconds: float = OUTBOX_SEND_TIMEOUT_SECONDS,
+        poll_seconds: float = OUTBOX_POLL_SECONDS,
+    ):
+        self.sink = sink
+        self.engine = engine
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.max_attempts = max_attempts
+        self.lease = datetime.timedelta(seconds=lease_seconds)
+        self.send_timeout_seconds = send_timeout_seconds
+        self.poll_seconds = poll_seconds
+        self._wakeup: Optional[asyncio.Event] = None
+
+    def notify(self) -> None:
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def claim(self) -> List[OutboxMessage]:
+        """Take up to batch_size due messages for the lease."""
+        now = _now()
+        due = (
+            select(outbox.c.id)
+            .where(outbox.c.next_attempt_at <= now)
+            .order_by(outbox.c.next_attempt_at)
+            .limit(self.batch_size)
+        )
+        async with self.engine.begin() as conn:
+            claim_query_result = await conn.execute(
+                update(outbox)
+                .where(outbox.c.id.in_(due))
+                .values(next_attempt_at=now + self.lease)
+                .returning(
+                    outbox.c.id,
+                    outbox.c.event,
+                    outbox.c.payload,
+                    outbox.c.created_at,
+                    outbox.c.attempts,
+                )
+            )
+            rows = claim_query_result.all()
+
+        return sorted(
+            (
+                OutboxMessage(
+                    id=row.id,
+                    event=row.event,
+                    payload=json.loads(row.payload),
+                    created_at=row.created_at,
+                    attempts=row.attempts,
+                )
+                for row in rows
+            ),
+            key=lambda message: message.id,
+        )
+
+    async def _send(
+        self, message: OutboxMessage, semaphore: asyncio.Semaphore
+    ) -> Optional[str]:
+        """Send a message, and return the error if it failed."""
+        async with semaphore:
+            try:
+                await asyncio.wait_for(
+                    self.sink.send(message), self.send_timeout_seconds
+                )
+            except Exception as exc:
+                return f"{type(exc).__name__}: {exc}"[:MAX_ERROR_LENGTH]
+        return None
+
+    async def dispatch_once(self) -> int:
+        """Claim, send and settle one batch, and return its size."""
+        messages = await self.claim()
+        if not messages:
+            return 0
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+        errors = await asyncio.gather(
+            *(self._send(message, semaphore) for message in messages)
+        )
+
+        now = _now()
+        sent_ids = []
+        async with self.engine.begin() as conn:
+            for message, error in zip(messages, errors):
+                if error is None:
+                    sent_ids.append(message.id)
+                    outbox_messages.inc((message.event, "sent"))
+                    outbox_dispatch_lag.observe(
+                        (now - message.created_at).total_seconds(), (message.event,)
+                    )
+                    continue
+
+                attempts = message.attempts + 1
+                if attempts >= self.max_attempts:
+                    next_attempt_at = None
+                    outbox_messages.inc((message.event, "dead"))
+                    logger.error(
+                        f"outbox message {message.id} ({message.event}) given up "
+                        f"after {attempts} attempts: {error}"
+                    )
+                else:
+                    next_attempt_at = now + datetime.timedelta(
+                        seconds=backoff_seconds(attempts)
+                    )
+                    outbox_messages.inc((message.event, "retried"))
+                await conn.execute(
+                    update(outbox)
+                    .where(outbox.c.id == message.id)
+                    .values(
+                        attempts=attempts,
+                        next_attempt_at=next_attempt_at,
+                        last_error=error,
+                    )
+                )
+            if sent_ids:
+                await conn.execute(delete(outbox).where(outbox.c.id.in_(sent_ids)))
+
+        return len(messages)
+
+    async def run(self) -> None:
+        """Dispatch until cancelled, right away while batches come back full."""
+        self._wakeup = asyncio.Event()
+        _dispatchers.add(self)
+        try:
+            while True:
+                try:
+                    dispatched = await self.dispatch_once()
+                except Exception:
+                    logger.exception("outbox dispatch failed")
+                    dispatched = 0
+                if dispatched == self.batch_size:
+                    continue
+
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_seconds)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+        finally:
+            _dispatchers.discard(self)
+            self._wakeup = None
+
+
+@event.listens_for(Session, "after_commit")
+def _notify_dispatchers(session):
+    for dispatcher in _dispatchers:
+        dispatcher.notify()
+
+
+async def main():
+    try:
+        await OutboxDispatcher(make_sink()).run()
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
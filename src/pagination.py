@@ -0,0 +1,29 @@
+import base64
+import json
+from typing import Any, Dict
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(values: Dict[str, Any]) -> str:
+    """
+    Encode the keyset position of the last returned row into an opaque,
+    url-safe cursor string.
+    """
+    raw = json.dumps(values, separators=(",", ":"), default=str).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Dict[str, Any]:
+    padding = "=" * (-len(cursor) % 4)
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + padding))
+    except (ValueError, TypeError) as exc:
+        raise InvalidCursor("Invalid cursor") from exc
+
+    if not isinstance(values, dict):
+        raise InvalidCursor("Invalid cursor")
+
+    return values
@@ -0,0 +1,46 @@
+"""
+Opt-in fast response path, enabled with FAST_JSON_RESPONSES=true.
+
+When a route returns a dict, FastAPI validates it against response_model a
+second time, converts the result to python primitives and only then encodes
+it as JSON. fast_response validates the payload once through a cached
+TypeAdapter (models that are already validated are passed through) and
+serializes it to JSON bytes with pydantic-core in a single step.
+"""
+
+from functools import lru_cache
+from typing import Any, Optional
+
+from fastapi import Response
+from pydantic import TypeAdapter
+
+from settings import FAST_JSON_RESPONSES
+
+
+@lru_cache(maxsize=None)
+def type_adapter(response_model: Any) -> TypeAdapter:
+    return TypeAdapter(response_model)
+
+
+def fast_response(
+    response_model: Any, payload: Any, response: Optional[Response] = None
+) -> Any:
+    """
+    Return the payload untouched unless the fast path is on, otherwise a
+    ready-made JSON Response carrying the headers set on `response`.
+    """
+    if not FAST_JSON_RESPONSES:
+        return payload
+
+    adapter = type_adapter(response_model)
+    content = adapter.dump_json(adapter.validate_python(payload, from_attributes=True))
+
+    headers = None
+    if response is not None:
+        headers = {
+            name: value
+            for name, value in response.headers.items()
+            if name != "content-length"
+        }
+
+    return Response(content=content, media_type="application/json", headers=headers)
@@ -0,0 +1,86 @@
+"""
+Interviewer calendar helpers.
+
+Interviews are [scheduled_at, scheduled_at + duration_minutes) intervals. An
+interview overlapping a given window must start before the window ends and at
+most MAX_INTERVIEW_DURATION_MINUTES before it starts, so both the overlap
+check and the free-slot search are bounded range scans on the
+(interviewer, scheduled_at) index instead of a scan of the whole calendar.
+"""
+
+import datetime
+from typing import Iterable, List, Tuple
+
+from sqlalchemy import DateTime, String, and_, func
+from sqlalchemy.sql.elements import ColumnElement
+
+from settings import MAX_INTERVIEW_DURATION_MINUTES
+from src.database import InterviewModel
+
+Interval = Tuple[datetime.datetime, datetime.datetime]
+
+
+def naive(value: datetime.datetime) -> datetime.datetime:
+    # scheduled_at is stored as naive UTC: aware values are converted, so the
+    # same instant given with different offsets is the same time. Naive
+    # values are taken as UTC already
+    if value.tzinfo is not None:
+        value = value.astimezone(datetime.timezone.utc)
+    return value.replace(tzinfo=None)
+
+
+def scheduled_time(value: datetime.datetime) -> datetime.datetime:
+    """
+    scheduled_at as stored: naive UTC, in whole seconds, as SQLite's
+    datetime() in interview_ends_at drops fractional seconds.
+    """
+    return naive(value).replace(microsecond=0)
+
+
+def interview_ends_at() -> ColumnElement:
+    return func.datetime(
+        InterviewModel.scheduled_at,
+        "+" + InterviewModel.duration_minutes.cast(String) + " minutes",
+        type_=DateTime,
+    )
+
+
+def overlapping(
+    interviewer: str, starts_at: datetime.datetime, ends_at: datetime.datetime
+) -> ColumnElement:
+    """
+    WHERE clause matching the interviewer's interviews that overlap
+    [starts_at, ends_at); back-to-back interviews do not overlap.
+    """
+    earliest_start = starts_at - datetime.timedelta(
+        minutes=MAX_INTERVIEW_DURATION_MINUTES
+    )
+    return and_(
+        InterviewModel.interviewer == interviewer,
+        InterviewModel.scheduled_at > earliest_start,
+        InterviewModel.scheduled_at < ends_at,
+        interview_ends_at() > starts_at,
+    )
+
+
+def free_slots(
+    busy: Iterable[Interval],
+    window_start: datetime.datetime,
+    window_end: datetime.datetime,
+    min_duration: datetime.timedelta,
+) -> List[Interval]:
+    """
+    Gaps of at least `min_duration` between the busy intervals (sorted by
+    start) inside [window_start, window_end).
+    """
+    slots = []
+    free_from = window_start
+    for busy_start, busy_end in busy:
+        free_until = min(busy_start, window_end)
+        if free_until - free_from >= min_duration:
+            slots.append((free_from, free_until))
+        free_from = max(free_from, busy_end)
+
+    if window_end - free_from >= min_duration:
+        slots.append((free_from, window_end))
+    return slots
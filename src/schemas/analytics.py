@@ -0,0 +1,64 @@
+import datetime
+from typing import Dict, List, Optional
+
+from pydantic import BaseModel
+
+from src.schemas.candidate import CandidateStatusEnum
+
+
+class FunnelPositionData(BaseModel):
+    position: str
+    total: int
+    # every status is listed, with 0 when no candidate has it
+    statuses: Dict[CandidateStatusEnum, int]
+
+
+class FunnelData(BaseModel):
+    generated_at: datetime.datetime
+    positions: List[FunnelPositionData]
+
+
+class FunnelResponse(BaseModel):
+    status: bool
+    message: str
+    data: Optional[FunnelData] = None
+
+
+class InterviewerRatingData(BaseModel):
+    interviewer: str
+    interviews: int
+    feedbacks: int
+    # None until the interviewer has at least one feedback
+    average_rating: Optional[float] = None
+    min_rating: Optional[int] = None
+    max_rating: Optional[int] = None
+
+
+class InterviewerRatingsData(BaseModel):
+    generated_at: datetime.datetime
+    interviewers: List[InterviewerRatingData]
+
+
+class InterviewerRatingsResponse(BaseModel):
+    status: bool
+    message: str
+    data: Optional[InterviewerRatingsData] = None
+
+
+class TimeToHirePositionData(BaseModel):
+    position: str
+    hired: int
+    average_days: float
+    min_days: float
+    max_days: float
+
+
+class TimeToHireData(BaseModel):
+    generated_at: datetime.datetime
+    positions: List[TimeToHirePositionData]
+
+
+class TimeToHireResponse(BaseModel):
+    status: bool
+    message: str
+    data: Optional[TimeToHireData] = None
@@ -22,6 +22,13 @@ class CandidateCreate(BaseModel):
 class CandidateStatusUpdate(BaseModel):
     status: CandidateStatusEnum
 
+
+class CandidateSortEnum(str, enum.Enum):
+    ID = "id"
+    # highest first; candidates without the summary yet are left out
+    AVERAGE_RATING = "average_rating"
+    LAST_INTERVIEW_AT = "last_interview_at"
+
 class CandidateCreateDataResponse(BaseModel):
     id: str
     name: str
@@ -65,6 +72,10 @@ class CandidateListDataResponse(BaseModel):
     email: str
     position: str
     status: CandidateStatusEnum
+    interview_count: int = 0
+    feedback_count: int = 0
+    average_rating: Optional[float] = None
+    last_interview_at: Optional[datetime.datetime] = None
     interviews: List[InterviewResponse] = []
 
     class Config:
@@ -75,4 +86,96 @@ class CandidateListDataResponse(BaseModel):
 class CandidateListResponse(BaseModel):
     status: bool
     message: str
-    data: List[CandidateListDataResponse]
\ No newline at end of file
+    data: List[CandidateListDataResponse]
+    next_cursor: Optional[str] = None
+
+
+class CandidateSearchData(BaseModel):
+    id: str
+    name: str
+    email: str
+    position: str
+    status: CandidateStatusEnum
+    interview_count: int = 0
+    feedback_count: int = 0
+    average_rating: Optional[float] = None
+    last_interview_at: Optional[datetime.datetime] = None
+    # bm25 score, the lower the better the match
+    rank: float
+    # best matching fragment, matches in [brackets]
+    snippet: str
+
+    class Config:
+        from_attributes = True
+
+
+class CandidateSearchResponse(BaseModel):
+    status: bool
+    message: str
+    data: List[CandidateSearchData]
+    next_cursor: Optional[str] = None
+    # more than SEARCH_MAX_MATCHES candidates matched: only the first ones
+    # (the oldest) were ranked, a narrower search may find better matches
+    truncated: bool = False
+
+
+class CandidateBulkRowStatusEnum(str, enum.Enum):
+    CREATED = "created"
+    DUPLICATE = "duplicate"
+    INVALID = "invalid"
+
+
+class CandidateBulkRowResult(BaseModel):
+    index: int
+    status: CandidateBulkRowStatusEnum
+    id: Optional[str] = None
+    email: Optional[str] = None
+    error: Optional[str] = None
+
+
+class CandidateBulkCreateData(BaseModel):
+    created: int
+    duplicate: int
+    invalid: int
+    results: List[CandidateBulkRowResult]
+
+
+class CandidateBulkCreateResponse(BaseModel):
+    status: bool
+    message: str
+    data: CandidateBulkCreateData
+
+
+class CandidateBulkFilter(BaseModel):
+    status: Optional[CandidateStatusEnum] = None
+    position: Optional[str] = None
+
+
+class CandidateBulkSelection(BaseModel):
+    # either a list of candidate ids or a filter, never both
+    ids: Optional[List[str]] = None
+    filter: Optional[CandidateBulkFilter] = None
+
+
+class CandidateBulkStatusUpdate(CandidateBulkSelection):
+    status: CandidateStatusEnum
+
+
+class CandidateBulkUpdateData(BaseModel):
+    updated: int
+
+
+class CandidateBulkUpdateResponse(BaseModel):
+    status: bool
+    message: str
+    data: CandidateBulkUpdateData
+
+
+class CandidateBulkDeleteData(BaseModel):
+    deleted: int
+
+
+class CandidateBulkDeleteResponse(BaseModel):
+    status: bool
+    message: str
+    data: CandidateBulkDeleteData
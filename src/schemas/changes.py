@@ -0,0 +1,65 @@
+import datetime
+import enum
+from typing import List, Optional, Union
+
+from pydantic import BaseModel
+
+from src.schemas.candidate import CandidateCreateDataResponse, CandidateStatusEnum
+from src.schemas.feedback import FeedbackViewData
+from src.schemas.interview import InterviewCreateData
+
+
+class ChangeEntityEnum(str, enum.Enum):
+    CANDIDATE = "candidate"
+    INTERVIEW = "interview"
+    FEEDBACK = "feedback"
+
+
+class ChangeOperationEnum(str, enum.Enum):
+    UPSERT = "upsert"
+    DELETE = "delete"
+
+
+class ChangeData(BaseModel):
+    seq: int
+    entity: ChangeEntityEnum
+    entity_id: str
+    operation: ChangeOperationEnum
+    changed_at: datetime.datetime
+    # current state of the row for upserts, None for delete tombstones
+    data: Optional[
+        Union[CandidateCreateDataResponse, InterviewCreateData, FeedbackViewData]
+    ] = None
+
+
+class ChangeFeedData(BaseModel):
+    changes: List[ChangeData]
+    next_since: int
+    has_more: bool
+
+
+class ChangeFeedResponse(BaseModel):
+    status: bool
+    message: str
+    data: ChangeFeedData
+
+
+class ChangeEventData(BaseModel):
+    seq: int
+    entity: ChangeEntityEnum
+    entity_id: str
+    operation: ChangeOperationEnum
+    changed_at: datetime.datetime
+    # the row as written, or as deleted for deletes. None for the changes
+    # logged before the change log recorded rows
+    data: Optional[
+        Union[CandidateCreateDataResponse, InterviewCreateData, FeedbackViewData]
+    ] = None
+    # status of the candidate before an update, None otherwise
+    previous_status: Optional[CandidateStatusEnum] = None
+
+
+class ChangeEventsData(BaseModel):
+    events: List[ChangeEventData]
+    next_since: int
+    has_more: bool
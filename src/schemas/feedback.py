@@ -28,6 +28,9 @@ class FeedbackViewData(BaseModel):
     rating: int
     comment: str
 
+    class Config:
+        from_attributes = True
+
 
 class FeedbackViewResponse(BaseModel):
     status: bool
@@ -1,12 +1,17 @@
 import datetime
 from typing import Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+
+from settings import DEFAULT_INTERVIEW_DURATION_MINUTES, MAX_INTERVIEW_DURATION_MINUTES
 
 
 class InterviewCreate(BaseModel):
     interviewer: str
     scheduled_at: datetime.datetime
+    duration_minutes: int = Field(
+        DEFAULT_INTERVIEW_DURATION_MINUTES, ge=1, le=MAX_INTERVIEW_DURATION_MINUTES
+    )
     result: Optional[str] = None
 
 
@@ -14,6 +19,7 @@ class InterviewCreateData(BaseModel):
     id: int
     interviewer: str
     scheduled_at: datetime.datetime
+    duration_minutes: int
     result: Optional[str] = None
     candidate_id: str
 
@@ -33,15 +39,22 @@ class FeedbackResponse(BaseModel):
     rating: int
     comment: str
 
+    class Config:
+        from_attributes = True
+
 
 class InterviewListData(BaseModel):
     id: int
     interviewer: str
     scheduled_at: datetime.datetime
+    duration_minutes: int
     result: Optional[str] = None
     candidate_id: str
     feedback: Optional[FeedbackResponse] = None
 
+    class Config:
+        from_attributes = True
+
 
 class CandiateInterviewListResponse(BaseModel):
     status: bool
@@ -0,0 +1,23 @@
+import datetime
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+
+class FreeSlot(BaseModel):
+    start: datetime.datetime
+    end: datetime.datetime
+
+
+class FreeSlotsData(BaseModel):
+    interviewer: str
+    start: datetime.datetime
+    end: datetime.datetime
+    duration_minutes: int
+    slots: List[FreeSlot]
+
+
+class FreeSlotsResponse(BaseModel):
+    status: bool
+    message: str
+    data: Optional[FreeSlotsData] = None
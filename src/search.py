@@ -0,0 +1,134 @@
+"""
+Full-text candidate search on the candidate_search FTS5 table.
+
+Triggers keep the index up to date in the transaction of every candidate,
+interview and feedback write (see candidate_search_ddl). Rebuilding fills it
+again from scratch.
+
+run it manually with
+    python -m src.search
+"""
+
+import asyncio
+import re
+from typing import Optional
+
+from sqlalchemy import Connection, Integer, and_, func, literal_column, select
+from sqlalchemy.sql import column, table
+
+from settings import SEARCH_MAX_MATCHES, logger
+from src.database import engine
+from src.models.models import CANDIDATE_SEARCH_TABLE
+
+candidate_search = table(CANDIDATE_SEARCH_TABLE, column("rowid", Integer))
+
+# bm25 weights of name, email, position and feedback comments
+SEARCH_COLUMN_WEIGHTS = (10.0, 5.0, 2.0, 1.0)
+
+_WORD = re.compile(r"\w+")
+
+
+def match_query(text: str) -> Optional[str]:
+    """
+    FTS5 query requiring every word of the search text, the last one as a
+    prefix since it may still be being typed, e.g. 'jane.doe@exa' ->
+    '"jane" "doe" "exa"*'. A prefix expands to every indexed term starting
+    with it, so only one word is expanded. Quoting the words keeps FTS5
+    operators and punctuation in the text from being parsed as query syntax.
+    """
+    words = _WORD.findall(text)
+    if not words:
+        return None
+    return " ".join(f'"{word}"' for word in words) + "*"
+
+
+def search_rank():
+    # bm25 is negative, the better the match the lower
+    return func.bm25(
+        literal_column(CANDIDATE_SEARCH_TABLE),
+        *(literal_column(repr(weight)) for weight in SEARCH_COLUMN_WEIGHTS),
+    )
+
+
+def search_snippet():
+    # the best matching fragment of any column, matches in [brackets]
+    return func.snippet(
+        literal_column(CANDIDATE_SEARCH_TABLE), -1, "[", "]", "…", 10
+    )
+
+
+def _match(query: str):
+    return literal_column(CANDIDATE_SEARCH_TABLE).op("MATCH")(query)
+
+
+def search_match(query: str):
+    """
+    The matches of `query`, cut off after the first SEARCH_MAX_MATCHES in
+    rowid order: bm25 then ranks a bounded number of rows, while finding the
+    cut-off only walks the doclists, which is cheap. The matches left out
+    are not ranked at all, see search_truncated.
+    """
+    first_matches = (
+        select(candidate_search.c.rowid)
+        .where(_match(query))
+        .order_by(candidate_search.c.rowid)
+        .limit(SEARCH_MAX_MATCHES)
+        .subquery()
+    )
+    return and_(
+        _match(query),
+        candidate_search.c.rowid
+        <= select(func.max(first_matches.c.rowid)).scalar_subquery(),
+    )
+
+
+def search_truncated(query: str):
+    """
+    Whether `query` has more than SEARCH_MAX_MATCHES matches, so that some
+    of them are left out of the ranking by search_match.
+    """
+    return (
+        select(candidate_search.c.rowid)
+        .where(_match(query))
+        .order_by(candidate_search.c.rowid)
+        .offset(SEARCH_MAX_MATCHES)
+        .limit(1)
+        .exists()
+    )
+
+
+def rebuild_candidate_search(connection: Connection) -> int:
+    """Index every candidate again and return their count."""
+    connection.exec_driver_sql(f"DELETE FROM {CANDIDATE_SEARCH_TABLE}")
+    connection.exec_driver_sql("DELETE FROM candidate_search_rows")
+    connection.exec_driver_sql(
+        "INSERT INTO candidate_search_rows (candidate_id) SELECT id FROM candidates"
+    )
+    indexed = connection.exec_driver_sql(
+        f"INSERT INTO {CANDIDATE_SEARCH_TABLE} "
+        "(rowid, name, email, position, comments) "
+        "SELECT candidate_search_rows.search_rowid, candidates.name, "
+        "candidates.email, candidates.position, coalesce(("
+        "SELECT group_concat(feedbacks.comment, ' ') FROM feedbacks "
+        "JOIN interviews ON interviews.id = feedbacks.interview_id "
+        "WHERE interviews.candidate_id = candidates.id), '') "
+        "FROM candidates JOIN candidate_search_rows "
+        "ON candidate_search_rows.candidate_id = candidates.id"
+    ).rowcount
+    # merge the index segments written by the bulk insert
+    connection.exec_driver_sql(
+        f"INSERT INTO {CANDIDATE_SEARCH_TABLE} ({CANDIDATE_SEARCH_TABLE}) "
+        "VALUES ('optimize')"
+    )
+    return indexed
+
+
+async def main():
+    async with engine.begin() as conn:
+        indexed = await conn.run_sync(rebuild_candidate_search)
+    await engine.dispose()
+    logger.info(f"indexed {indexed} candidates for search")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
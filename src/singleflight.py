@@ -0,0 +1,140 @@
+"""
+Request coalescing (single-flight) for read routes.
+
+Concurrent calls of a @coalesced route with the same arguments share one
+execution: the first one (the leader) runs the route, the others wait for its
+result instead of querying the database and serializing the response again.
+Nothing is kept once the leader is done, so this is not a cache: a request
+arriving after that runs the route itself.
+
+The key is the route name, its arguments (the Response left out, the
+database session by its read target) and read_cache.generation, so a request
+arriving after a write invalidated the read cache never shares a result read
+before it, and a read routed to the primary to see its client's writes never
+shares the result of a lagging replica.
+"""
+
+import asyncio
+import copy
+import functools
+import inspect
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+from fastapi import Response
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from settings import REQUEST_COALESCING
+from src.cache import read_cache
+from src.database import read_target
+from src.metrics import registry
+
+coalesced_requests = registry.counter(
+    "coalesced_requests_total",
+    "Requests of coalesced routes by route and role: a leader ran the route, "
+    "a follower shared the result of a leader.",
+    ("route", "role"),
+)
+
+
+class SingleFlight:
+    def __init__(self):
+        # key -> future of the leader's result
+        self._flights: Dict[Hashable, asyncio.Future] = {}
+
+    def __len__(self) -> int:
+        return len(self._flights)
+
+    async def do(
+        self, key: Hashable, fn: Callable[[], Awaitable[Any]]
+    ) -> Tuple[Any, bool]:
+        """
+        Return the result of fn(), or of the call of the same key already in
+        flight, and whether it was shared. Exceptions are shared as well.
+        """
+        while key in self._flights:
+            flight = self._flights[key]
+            try:
+                # shielded: a follower going away must not cancel the leader
+                return await asyncio.shield(flight), True
+            except asyncio.CancelledError:
+                if not flight.cancelled():
+                    raise
+                # the leader went away, the next waiter takes over
+
+        flight = asyncio.get_running_loop().create_future()
+        self._flights[key] = flight
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            flight.cancel()
+            raise
+        except BaseException as exc:
+            flight.set_exception(exc)
+            # retrieved, so a flight without followers logs no warning
+            flight.exception()
+            raise
+        else:
+            flight.set_result(result)
+        finally:
+            del self._flights[key]
+        return result, False
+
+
+flights = SingleFlight()
+
+
+def _own_copy(result: Any) -> Any:
+    # every request sends its own Response, middlewares may edit the headers
+    if isinstance(result, Response):
+        result = copy.copy(result)
+        result.raw_headers = list(result.raw_headers)
+    return result
+
+
+def coalesced(route: Callable) -> Callable:
+    """
+    Coalesce concurrent calls of a read route. Goes below the router
+    decorator; the headers the leader set on its Response parameter are set
+    on the followers' as well.
+    """
+    signature = inspect.signature(route)
+
+    @functools.wraps(route)
+    async def wrapper(*args, **kwargs):
+        if not REQUEST_COALESCING:
+            return await route(*args, **kwargs)
+
+        arguments = signature.bind(*args, **kwargs)
+        arguments.apply_defaults()
+        response = None
+        key = [route.__name__, read_cache.generation]
+        for name, value in arguments.arguments.items():
+            if isinstance(value, Response):
+                response = value
+            elif isinstance(value, AsyncSession):
+                key.append((name, read_target(value)))
+            else:
+                key.append((name, value))
+
+        async def run():
+            result = await route(*args, **kwargs)
+            if response is None:
+                return result, None, []
+            headers = [
+                (name, value)
+                for name, value in response.headers.items()
+                if name != "content-length"
+            ]
+            return result, response.status_code, headers
+
+        (result, status_code, headers), shared = await flights.do(tuple(key), run)
+        coalesced_requests.inc((route.__name__, "follower" if shared else "leader"))
+
+        if shared and response is not None:
+            if status_code is not None:
+                response.status_code = status_code
+            for name, value in headers:
+                response.headers[name] = value
+        return _own_copy(result)
+
+    return wrapper
@@ -0,0 +1,35 @@
+"""
+Candidate summary columns: interview_count, feedback_count, rating_total,
+average_rating and last_interview_at.
+
+Triggers keep them up to date in the transaction of every interview and
+feedback write (see summary_trigger_ddl). Rebuilding recomputes them from
+scratch, e.g. after rows were changed with the triggers dropped.
+
+run it manually with
+    python -m src.summaries
+"""
+
+import asyncio
+
+from sqlalchemy import Connection
+
+from settings import logger
+from src.database import engine
+from src.models.models import summary_recompute_sql
+
+
+def rebuild_summaries(connection: Connection) -> int:
+    """Recompute the summaries of every candidate and return their count."""
+    return connection.exec_driver_sql(summary_recompute_sql("1")).rowcount
+
+
+async def main():
+    async with engine.begin() as conn:
+        rebuilt = await conn.run_sync(rebuild_summaries)
+    await engine.dispose()
+    logger.info(f"rebuilt the summaries of {rebuilt} candidates")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
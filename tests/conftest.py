@@ -1,19 +1,54 @@
+import os
+
 import pytest_asyncio
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import sessionmaker
 
-from src.database import Base
+from src.api.v1.routes.candidate import create_candidate
+from src.cache import analytics_cache, read_cache
+from src.database import Base, create_engine_from_profile
+from src.schemas.candidate import CandidateCreate
+
+# "rollback": the schema is built once per test run on an in-memory database,
+# and every test runs in a transaction that is rolled back afterwards.
+# "file": test_unit.db, with create_all / drop_all around every test.
+TEST_DB_MODE = os.getenv("TEST_DB_MODE", "rollback")
 
-TEST_DATABASE_URL = "sqlite+aiosqlite:///./test_unit.db"
+# pytest-xdist workers (pytest -n auto) each get a database of their own
+XDIST_WORKER = os.getenv("PYTEST_XDIST_WORKER")
+TEST_DATABASE_URL = (
+    f"sqlite+aiosqlite:///./test_unit_{XDIST_WORKER}.db"
+    if XDIST_WORKER
+    else "sqlite+aiosqlite:///./test_unit.db"
+)
+TEST_MEMORY_DATABASE_URL = "sqlite+aiosqlite://"
 
-test_engine = create_async_engine(TEST_DATABASE_URL, echo=False, future=True)
+# same pragmas as the app engine, foreign keys (ON DELETE CASCADE) included
+test_engine = create_engine_from_profile(TEST_DATABASE_URL)
 TestSessionLocal = sessionmaker(
     bind=test_engine, class_=AsyncSession, expire_on_commit=False
 )
 
+# in-memory SQLite keeps a single connection (StaticPool), so the schema
+# outlives the tests
+memory_engine = create_engine_from_profile(TEST_MEMORY_DATABASE_URL)
+_memory_schema_created = False
 
-@pytest_asyncio.fixture(scope="function")
-async def db_session():
+
+# the sqlite3 driver only sends BEGIN before DML, so a SAVEPOINT would open
+# the outer transaction itself and its RELEASE would commit: take over BEGIN
+@event.listens_for(memory_engine.sync_engine, "connect")
+def _disable_driver_transactions(dbapi_connection, connection_record):
+    dbapi_connection.isolation_level = None
+
+
+@event.listens_for(memory_engine.sync_engine, "begin")
+def _begin(connection):
+    connection.exec_driver_sql("BEGIN")
+
+
+async def _file_session():
     async with test_engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
     async with TestSessionLocal() as session:
@@ -22,3 +57,70 @@ async def db_session():
         print()
         print("Dropping all unittest tables !!!!")
         await conn.run_sync(Base.metadata.drop_all)
+    # pooled connections keep statements prepared against the dropped tables
+    await test_engine.dispose()
+
+
+async def _rollback_session():
+    global _memory_schema_created
+    if not _memory_schema_created:
+        async with memory_engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        _memory_schema_created = True
+
+    async with memory_engine.connect() as conn:
+        await conn.begin()
+        # commits of the code under test release a SAVEPOINT instead
+        async with AsyncSession(
+            bind=conn,
+            expire_on_commit=False,
+            join_transaction_mode="create_savepoint",
+        ) as session:
+            yield session
+        await conn.rollback()
+
+
+@pytest_asyncio.fixture(scope="function")
+async def db_session():
+    sessions = _rollback_session() if TEST_DB_MODE == "rollback" else _file_session()
+    async for session in sessions:
+        yield session
+
+
+@pytest_asyncio.fixture(scope="function")
+async def file_db_session():
+    """
+    A session on test_unit.db whatever TEST_DB_MODE says, for tests whose
+    requests open connections of their own and must see committed data.
+    """
+    async for session in _file_session():
+        yield session
+
+
+@pytest_asyncio.fixture(autouse=True)
+async def clear_read_cache():
+    read_cache.clear()
+    analytics_cache.clear()
+    yield
+    read_cache.clear()
+    analytics_cache.clear()
+
+
+# test modules import these with `from conftest import ...`
+def candidate_data(**fields) -> CandidateCreate:
+    """A CandidateCreate with defaults for the fields a test does not care about."""
+    return CandidateCreate(
+        **{
+            "name": "Test Candidate",
+            "email": "candidate@example.com",
+            "position": "Tester",
+            "status": "applied",
+            **fields,
+        }
+    )
+
+
+async def create_test_candidate(db_session: AsyncSession, **fields) -> str:
+    """Create a candidate through the API route and return its id."""
+    created = await create_candidate(candidate=candidate_data(**fields), db=db_session)
+    return created.data.id
@@ -0,0 +1,171 @@
+import datetime
+
+import pytest
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from conftest import create_test_candidate
+from src.api.v1.routes.analytics import (
+    hiring_funnel,
+    interviewer_ratings,
+    time_to_hire,
+)
+from src.api.v1.routes.candidate import update_candidate_status
+from src.cache import analytics_cache
+from src.instrumentation import track_queries
+from src.models.models import CandidateModel, FeedbackModel, InterviewModel
+from src.schemas.candidate import CandidateStatusEnum, CandidateStatusUpdate
+
+# python -m pytest tests/test_analytics.py
+
+
+@pytest.mark.asyncio
+async def test_hiring_funnel_counts_statuses_per_position(db_session: AsyncSession):
+    await create_test_candidate(db_session, email="a@example.com", position="Dev")
+    await create_test_candidate(
+        db_session, email="b@example.com", position="Dev", status="hired"
+    )
+    await create_test_candidate(
+        db_session, email="c@example.com", position="Dev", status="hired"
+    )
+    await create_test_candidate(
+        db_session, email="d@example.com", position="QA", status="rejected"
+    )
+
+    result = await hiring_funnel(position=None, db=db_session)
+    positions = {row.position: row for row in result["data"].positions}
+
+    assert positions["Dev"].total == 3
+    assert positions["Dev"].statuses == {
+        CandidateStatusEnum.APPLIED: 1,
+        CandidateStatusEnum.INTERVIEWING: 0,
+        CandidateStatusEnum.HIRED: 2,
+        CandidateStatusEnum.REJECTED: 0,
+    }
+    assert positions["QA"].statuses[CandidateStatusEnum.REJECTED] == 1
+
+    filtered = await hiring_funnel(position="QA", db=db_session)
+    assert [row.position for row in filtered["data"].positions] == ["QA"]
+
+
+@pytest.mark.asyncio
+async def test_interviewer_ratings(db_session: AsyncSession):
+    candidate_id = await create_test_candidate(
+        db_session, email="a@example.com", position="Dev"
+    )
+    interviews = [
+        InterviewModel(
+            candidate_id=candidate_id,
+            interviewer=interviewer,
+            scheduled_at=datetime.datetime(2030, 1, 1, hour),
+        )
+        for hour, interviewer in enumerate(["ann", "ann", "ann", "bob"], 9)
+    ]
+    db_session.add_all(interviews)
+    await db_session.flush()
+    db_session.add_all(
+        [
+            FeedbackModel(interview_id=interviews[0].id, rating=5, comment="Great"),
+            FeedbackModel(interview_id=interviews[1].id, rating=2, comment="Meh"),
+        ]
+    )
+    await db_session.commit()
+
+    result = await interviewer_ratings(db=db_session)
+    ann, bob = result["data"].interviewers
+
+    assert (ann.interviewer, ann.interviews, ann.feedbacks) == ("ann", 3, 2)
+    assert (ann.average_rating, ann.min_rating, ann.max_rating) == (3.5, 2, 5)
+    # interviews without feedback are counted, but have no rating yet
+    assert (bob.interviews, bob.feedbacks, bob.average_rating) == (1, 0, None)
+
+
+@pytest.mark.asyncio
+async def test_time_to_hire(db_session: AsyncSession):
+    first_id = await create_test_candidate(
+        db_session, email="a@example.com", position="Dev"
+    )
+    second_id = await create_test_candidate(
+        db_session, email="b@example.com", position="Dev"
+    )
+    await create_test_candidate(db_session, email="c@example.com", position="Dev")
+    # created before the timestamps existed
+    legacy_id = await create_test_candidate(
+        db_session, email="d@example.com", position="Dev", status="hired"
+    )
+
+    now = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+    for candidate_id, days_ago in ((first_id, 10), (second_id, 20)):
+        await db_session.execute(
+            update(CandidateModel)
+            .where(CandidateModel.id == candidate_id)
+            .values(created_at=now - datetime.timedelta(days=days_ago))
+        )
+    await db_session.execute(
+        update(CandidateModel)
+        .where(CandidateModel.id == legacy_id)
+        .values(created_at=None)
+    )
+    await db_session.commit()
+
+    async def hired_at():
+        hired_at_query_result = await db_session.execute(
+            select(CandidateModel.hired_at).where(CandidateModel.id == second_id)
+        )
+        return hired_at_query_result.scalar()
+
+    async def hire(candidate_id):
+        await update_candidate_status(
+            id=candidate_id,
+            status_update=CandidateStatusUpdate(status=CandidateStatusEnum.HIRED),
+            db=db_session,
+        )
+
+    await hire(first_id)
+    await hire(second_id)
+    first_hired_at = await hired_at()
+    assert first_hired_at is not None
+
+    # hiring again keeps the first hire time
+    await hire(second_id)
+    assert await hired_at() == first_hired_at
+
+    result = await time_to_hire(position=None, db=db_session)
+    [dev] = result["data"].positions
+
+    assert dev.position == "Dev"
+    assert dev.hired == 2
+    assert dev.min_days == pytest.approx(10, abs=0.01)
+    assert dev.max_days == pytest.approx(20, abs=0.01)
+    assert dev.average_days == pytest.approx(15, abs=0.01)
+
+    # leaving the hired status clears hired_at
+    await update_candidate_status(
+        id=second_id,
+        status_update=CandidateStatusUpdate(status=CandidateStatusEnum.REJECTED),
+        db=db_session,
+    )
+    analytics_cache.clear()
+    result = await time_to_hire(position="Dev", db=db_session)
+    assert result["data"].positions[0].hired == 1
+
+
+@pytest.mark.asyncio
+async def test_analytics_results_are_cached(db_session: AsyncSession):
+    await create_test_candidate(db_session, email="a@example.com", position="Dev")
+
+    with track_queries() as stats:
+        first = await hiring_funnel(position=None, db=db_session)
+    assert stats.count == 1
+
+    # writes do not invalidate the cache, the result only expires with the TTL
+    await create_test_candidate(db_session, email="b@example.com", position="Dev")
+    with track_queries() as stats:
+        second = await hiring_funnel(position=None, db=db_session)
+    assert stats.count == 0
+    assert second["data"] is first["data"]
+
+    # another filter is another entry
+    with track_queries() as stats:
+        await hiring_funnel(position="Dev", db=db_session)
+    assert stats.count == 1
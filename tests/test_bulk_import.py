@@ -0,0 +1,141 @@
+import json
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from conftest import create_test_candidate
+from src import bulk_import
+from src.bulk_import import import_file
+from src.models.models import (
+    CandidateModel,
+    FeedbackModel,
+    InterviewModel,
+    OutboxMessageModel,
+    SuspendedTriggerModel,
+)
+
+# python -m pytest tests/test_bulk_import.py
+
+CSV_ROWS = """candidate_email,interviewer,scheduled_at,duration_minutes,result,rating,comment
+old@example.com,Alice,2019-03-01T09:00:00,45,passed,4,Good
+old@example.com,Bob,2019-03-02T09:00:00,,,,
+old@example.com,Carol,2019-03-03T09:00:00,30,failed,9,Rating out of range
+nobody@example.com,Dave,2019-03-04T09:00:00,30,,,
+old@example.com,Erin,not a date,30,,,
+"""
+
+
+async def _count(db_session: AsyncSession, model) -> int:
+    count_query_result = await db_session.execute(
+        select(func.count()).select_from(model)
+    )
+    return count_query_result.scalar()
+
+
+@pytest.mark.asyncio
+async def test_import_csv(file_db_session: AsyncSession, tmp_path):
+    candidate_id = await create_test_candidate(file_db_session, email="old@example.com")
+    path = tmp_path / "history.csv"
+    path.write_text(CSV_ROWS)
+
+    report = await import_file(str(path), engine=file_db_session.bind, batch_size=2)
+
+    assert (report.rows_done, report.imported, report.rejected) == (5, 2, 3)
+    interviews = (
+        (await file_db_session.execute(select(InterviewModel).order_by("id")))
+        .scalars()
+        .all()
+    )
+    assert [interview.interviewer for interview in interviews] == ["Alice", "Bob"]
+    assert [interview.duration_minutes for interview in interviews] == [45, 60]
+    feedback = (await file_db_session.execute(select(FeedbackModel))).scalar_one()
+    assert (feedback.interview_id, feedback.rating) == (interviews[0].id, 4)
+
+    # the summary triggers see the imported rows
+    candidate = await file_db_session.get(CandidateModel, candidate_id)
+    await file_db_session.refresh(candidate)
+    assert (candidate.interview_count, candidate.average_rating) == (2, 4.0)
+    # historical feedback does not notify anyone
+    assert await _count(file_db_session, OutboxMessageModel) == 0
+
+    # the feedback triggers were only suspended for the import
+    assert await _count(file_db_session, SuspendedTriggerModel) == 0
+    file_db_session.add(
+        FeedbackModel(interview_id=interviews[1].id, rating=5, comment="Late")
+    )
+    await file_db_session.commit()
+    assert await _count(file_db_session, OutboxMessageModel) == 1
+
+
+@pytest.mark.asyncio
+async def test_interrupted_import_resumes_from_the_checkpoint(
+    file_db_session: AsyncSession, tmp_path, monkeypatch
+):
+    await create_test_candidate(file_db_session, email="old@example.com")
+    path = tmp_path / "history.jsonl"
+    path.write_text(
+        "".join(
+            json.dumps(
+                {
+                    "candidate_email": "old@example.com",
+                    "interviewer": f"Interviewer {index}",
+                    "scheduled_at": f"2019-03-01T{index:02d}:00:00",
+                    "rating": 3,
+                    "comment": "ok",
+                }
+            )
+            + "\n"
+            for index in range(7)
+        )
+    )
+
+    insert_batch = bulk_import.insert_batch
+    batches = []
+
+    def crash_on_the_third_batch(connection, rows, source, rows_done):
+        batches.append(rows_done)
+        if len(batches) == 3:
+            raise RuntimeError("killed")
+        insert_batch(connection, rows, source, rows_done)
+
+    monkeypatch.setattr(bulk_import, "insert_batch", crash_on_the_third_batch)
+    with pytest.raises(RuntimeError):
+        await import_file(str(path), engine=file_db_session.bind, batch_size=2)
+    assert await _count(file_db_session, InterviewModel) == 4
+
+    monkeypatch.setattr(bulk_import, "insert_batch", insert_batch)
+    report = await import_file(str(path), engine=file_db_session.bind, batch_size=2)
+
+    assert (report.resumed_at, report.rows_done, report.imported) == (4, 7, 3)
+    assert await _count(file_db_session, InterviewModel) == 7
+    assert await _count(file_db_session, FeedbackModel) == 7
+
+    # nothing left to do
+    report = await import_file(str(path), engine=file_db_session.bind)
+    assert (report.resumed_at, report.imported) == (7, 0)
+
+
+@pytest.mark.asyncio
+async def test_invalid_jsonl_lines_are_rejected(
+    file_db_session: AsyncSession, tmp_path
+):
+    await create_test_candidate(file_db_session, email="old@example.com")
+    path = tmp_path / "history.jsonl"
+    record = {
+        "candidate_email": "old@example.com",
+        "interviewer": "Alice",
+        "scheduled_at": "2019-03-01T09:00:00",
+    }
+    path.write_text(
+        json.dumps(record)
+        + "\n{not json\n"
+        + "[1, 2]\n"
+        + json.dumps({**record, "interviewer": "Bob"})
+        + "\n"
+    )
+
+    report = await import_file(str(path), engine=file_db_session.bind)
+
+    assert (report.rows_done, report.imported, report.rejected) == (4, 2, 2)
+    assert await _count(file_db_session, InterviewModel) == 2
@@ -0,0 +1,91 @@
+import asyncio
+
+import pytest
+
+from src.cache import MISSING, ReadCache, TTLCache
+
+# python -m pytest tests/test_cache.py
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_ttl_cache_expires_entries():
+    clock = FakeClock()
+    cache = TTLCache(max_entries=10, ttl_seconds=5, clock=clock)
+
+    cache.set("key", "value")
+    assert cache.get("key") == "value"
+
+    clock.now = 5
+    assert cache.get("key") is MISSING
+    assert len(cache) == 0
+    assert cache.stats() == {"hits": 1, "misses": 1, "entries": 0}
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache(max_entries=2, ttl_seconds=60)
+
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")  # "b" is now the least recently used
+    cache.set("c", 3)
+
+    assert cache.get("b") is MISSING
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_ttl_cache_invalidate_tags():
+    cache = TTLCache(max_entries=10, ttl_seconds=60)
+
+    cache.set("interviews:1", [], tags=["candidate:1", "interview:10"])
+    cache.set("feedback:10", {}, tags=["interview:10"])
+    cache.set("interviews:2", [], tags=["candidate:2"])
+
+    cache.invalidate_tags("interview:10")
+
+    assert cache.get("interviews:1") is MISSING
+    assert cache.get("feedback:10") is MISSING
+    assert cache.get("interviews:2") == []
+
+
+@pytest.mark.asyncio
+async def test_get_or_load_does_not_store_value_invalidated_while_loading():
+    cache = TTLCache(max_entries=10, ttl_seconds=60)
+    calls = []
+
+    async def loader():
+        calls.append(1)
+        await asyncio.sleep(0)
+        # a write route commits and invalidates while the read is in flight
+        cache.invalidate_tags("candidate:1")
+        return "stale"
+
+    value = await cache.get_or_load("key", loader, tags=lambda value: ["candidate:1"])
+    assert value == "stale"
+    assert cache.get("key") is MISSING
+
+    async def fresh_loader():
+        return "fresh"
+
+    assert await cache.get_or_load("key", fresh_loader) == "fresh"
+    assert await cache.get_or_load("key", loader) == "fresh"
+    assert len(calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_null_cache_always_loads():
+    cache = ReadCache()
+
+    async def loader():
+        return "value"
+
+    assert await cache.get_or_load("key", loader) == "value"
+    assert await cache.get_or_load("key", loader) == "value"
+    assert cache.stats() == {"hits": 0, "misses": 2, "entries": 0}
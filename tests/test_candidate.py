@@ -1,17 +1,29 @@
+import datetime
+import json
 from unittest.mock import AsyncMock, MagicMock
 
-from fastapi import HTTPException
+from fastapi import HTTPException, Response
 import pytest
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.api.v1.routes.candidate import (
+    bulk_selection_filters,
+    bulk_update_candidate_status,
     create_candidate,
+    import_candidates,
+    iter_candidates_ndjson,
     list_candidates,
+    parse_bulk_body,
     update_candidate_status,
 )
+from src.etag import NotModified
 from src.models.models import CandidateModel, FeedbackModel, InterviewModel
 from src.schemas.candidate import (
+    CandidateBulkFilter,
+    CandidateBulkRowStatusEnum,
+    CandidateBulkSelection,
+    CandidateBulkStatusUpdate,
     CandidateCreate,
     CandidateCreateDataResponse,
     CandidateListDataResponse,
@@ -72,19 +84,22 @@ async def test_create_candidate_with_mock_no_email_duplicate():
         status="applied",
     )
 
-    # จำลองว่าไม่มี email ซ้ำ
+    # จำลองว่าไม่มี email ซ้ำ: INSERT ... RETURNING returns the new row
+    inserted_candidate = CandidateModel(
+        id="mock-id",
+        name="Mock User",
+        email="mock@example.com",
+        position="Python Developer",
+        status="applied",
+    )
     mock_result = MagicMock()
-    mock_result.scalars.return_value.first.return_value = None
+    mock_result.scalars.return_value.first.return_value = inserted_candidate
     mock_db.execute.return_value = mock_result
 
     mock_db.add = MagicMock()
     mock_db.commit = AsyncMock()
     mock_db.refresh = AsyncMock()
 
-    mock_db.refresh.side_effect = lambda obj: setattr(
-        obj, "id", "mock-id"
-    )  # set id after refresh
-
     # Actual
     result = await create_candidate(candidate=candidate_data, db=mock_db)
 
@@ -92,27 +107,19 @@ async def test_create_candidate_with_mock_no_email_duplicate():
     assert result.status is True
     assert result.message == "Candidate created successfully"
     assert isinstance(result.data, CandidateCreateDataResponse)  # check type
+    assert result.data.id == "mock-id"
     assert result.data.email == "mock@example.com"
     assert result.data.name == "Mock User"
 
+    # one INSERT ... ON CONFLICT DO NOTHING RETURNING, no separate lookup
     mock_db.execute.assert_awaited_once()
-    mock_db.add.assert_called_once()
-    # ตรวจสอบว่าถูกเรียก .add() และ object ที่ add มีค่าถูกต้อง
-    added_obj = mock_db.add.call_args[0][0]
-    assert added_obj.id == "mock-id"
-    assert added_obj.name == "Mock User"
-    assert added_obj.email == "mock@example.com"
-    assert added_obj.position == "Python Developer"
-    assert added_obj.status == "applied"
+    statement = mock_db.execute.call_args[0][0]
+    assert statement.is_insert
+    assert statement.compile().params["email"] == "mock@example.com"
 
+    mock_db.add.assert_not_called()
     mock_db.commit.assert_awaited_once()
-    mock_db.refresh.assert_awaited_once()
-    refresh_obj = mock_db.refresh.call_args[0][0]
-    assert refresh_obj.id == "mock-id"
-    assert refresh_obj.name == "Mock User"
-    assert refresh_obj.email == "mock@example.com"
-    assert refresh_obj.position == "Python Developer"
-    assert refresh_obj.status == "applied"
+    mock_db.refresh.assert_not_awaited()
 
 
 @pytest.mark.asyncio
@@ -126,17 +133,9 @@ async def test_create_candidate_with_mock_duplicate_email():
         status="applied",
     )
 
-    # จำลองว่าพบ email ซ้ำใน database
-    duplicate_candidate = CandidateModel(
-        id="existing-id",
-        name="Existing",
-        email="duplicate@example.com",
-        position="Python Developer",
-        status="applied",
-    )
-
+    # จำลองว่าพบ email ซ้ำใน database: the insert is skipped, no row returned
     mock_result = MagicMock()
-    mock_result.scalars.return_value.first.return_value = duplicate_candidate
+    mock_result.scalars.return_value.first.return_value = None
     mock_db.execute.return_value = mock_result
 
     # Act & Assert
@@ -174,6 +173,9 @@ async def test_list_candidates():
         email="mock@example.com",
         position="Python Developer",
         status="applied",
+        interview_count=1,
+        feedback_count=1,
+        average_rating=5.0,
         interviews=[interview],
     )
 
@@ -187,7 +189,7 @@ async def test_list_candidates():
     mock_db = AsyncMock()
     mock_db.execute.return_value = mock_result
 
-    response = await list_candidates(db=mock_db)
+    response = await list_candidates(response=Response(), db=mock_db)
 
     assert response["status"] is True
     assert response["message"] == "Candidates retrieved successfully"
@@ -205,21 +207,21 @@ async def test_list_candidates():
 @pytest.mark.asyncio
 async def test_update_candidate_status_success_with_mock():
     candidate_id = "mock-id"
-    old_candidate = CandidateModel(
+    updated_candidate = CandidateModel(
         id=candidate_id,
         name="Mock User",
         email="mock@example.com",
         position="Python Developer",
-        status="applied",
+        status="interviewing",
     )
 
     status_update = CandidateStatusUpdate(status=CandidateStatusEnum.INTERVIEWING)
 
     # Mock db session
     mock_db = AsyncMock()
-    # mock db.execute().scalars().first() ให้ return candidate
+    # mock UPDATE ... RETURNING ให้ return candidate ที่ update แล้ว
     mock_result = MagicMock()
-    mock_result.scalars.return_value.first.return_value = old_candidate
+    mock_result.scalars.return_value.first.return_value = updated_candidate
     mock_db.execute.return_value = mock_result
 
     mock_db.commit = AsyncMock()
@@ -236,12 +238,10 @@ async def test_update_candidate_status_success_with_mock():
     assert response["data"].id == candidate_id
 
     mock_db.execute.assert_awaited_once()
+    statement = mock_db.execute.call_args[0][0]
+    assert statement.is_update
     mock_db.commit.assert_awaited_once()
-    refresh_obj = mock_db.refresh.call_args[0][0]
-    assert refresh_obj.status == CandidateStatusEnum.INTERVIEWING
-    assert refresh_obj.id == candidate_id
-
-    mock_db.refresh.assert_awaited_once()
+    mock_db.refresh.assert_not_awaited()
 
 
 @pytest.mark.asyncio
@@ -252,7 +252,7 @@ async def test_update_candidate_status_not_found():
     # Mock db session
     mock_db = AsyncMock()
 
-    # ให้ simulate เหมือนไม่เจอ candidate
+    # ให้ simulate เหมือนไม่เจอ candidate: UPDATE matched no row
     mock_result = MagicMock()
     mock_result.scalars.return_value.first.return_value = None
     mock_db.execute.return_value = mock_result
@@ -269,3 +269,256 @@ async def test_update_candidate_status_not_found():
     mock_db.execute.assert_awaited_once()
     mock_db.commit.assert_not_awaited()
     mock_db.refresh.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_list_candidates_keyset_pagination_with_db(db_session: AsyncSession):
+    for index in range(5):
+        await create_candidate(
+            candidate=CandidateCreate(
+                name=f"User {index}",
+                email=f"user{index}@example.com",
+                position="Tester" if index % 2 else "Developer",
+                status="applied",
+            ),
+            db=db_session,
+        )
+
+    seen_ids = []
+    after = None
+    while True:
+        response = await list_candidates(
+            response=Response(), limit=2, after=after, db=db_session
+        )
+        assert len(response["data"]) <= 2
+        seen_ids.extend(candidate.id for candidate in response["data"])
+        after = response["next_cursor"]
+        if after is None:
+            break
+
+    assert len(seen_ids) == 5
+    assert seen_ids == sorted(seen_ids)
+
+    response = await list_candidates(
+        response=Response(), position="Tester", db=db_session
+    )
+    assert len(response["data"]) == 2
+    assert all(candidate.position == "Tester" for candidate in response["data"])
+    assert response["next_cursor"] is None
+
+    response = await list_candidates(
+        response=Response(), status=CandidateStatusEnum.HIRED, db=db_session
+    )
+    assert response["data"] == []
+
+
+@pytest.mark.asyncio
+async def test_list_candidates_invalid_cursor():
+    mock_db = AsyncMock()
+
+    with pytest.raises(HTTPException) as exc_info:
+        await list_candidates(response=Response(), after="not-a-cursor", db=mock_db)
+
+    assert exc_info.value.status_code == 400
+    assert exc_info.value.detail == "Invalid cursor"
+
+    mock_db.execute.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_iter_candidates_ndjson_with_db(db_session: AsyncSession):
+    candidate = CandidateModel(
+        name="Export User",
+        email="export@example.com",
+        position="Tester",
+        status="applied",
+    )
+    candidate.interviews = [
+        InterviewModel(
+            interviewer="Interviewer A",
+            scheduled_at=datetime.datetime(2025, 7, 1, 8, 0),
+            feedback=FeedbackModel(rating=4, comment="Solid"),
+        ),
+        InterviewModel(
+            interviewer="Interviewer B",
+            scheduled_at=datetime.datetime(2025, 7, 2, 8, 0),
+        ),
+    ]
+    db_session.add(candidate)
+    for index in range(4):
+        db_session.add(
+            CandidateModel(
+                name=f"User {index}",
+                email=f"user{index}@example.com",
+                position="Developer",
+                status="applied",
+            )
+        )
+    await db_session.commit()
+
+    chunks = [chunk async for chunk in iter_candidates_ndjson(db_session, chunk_size=2)]
+    lines = [json.loads(line) for line in "".join(chunks).splitlines()]
+
+    assert len(chunks) == 3
+    assert len(lines) == 5
+    assert [line["id"] for line in lines] == sorted(line["id"] for line in lines)
+
+    exported = next(line for line in lines if line["email"] == "export@example.com")
+    assert len(exported["interviews"]) == 2
+    feedbacks = [interview["feedback"] for interview in exported["interviews"]]
+    assert {"rating": 4, "comment": "Solid"}.items() <= next(
+        feedback for feedback in feedbacks if feedback
+    ).items()
+
+
+def test_parse_bulk_body_json_and_ndjson():
+    assert parse_bulk_body(b'[{"a": 1}, {"a": 2}]', "application/json") == [
+        {"a": 1},
+        {"a": 2},
+    ]
+    assert parse_bulk_body(
+        b'{"a": 1}\n\nnot json\n{"a": 2}\n', "application/x-ndjson"
+    ) == [{"a": 1}, "not json", {"a": 2}]
+
+    with pytest.raises(ValueError):
+        parse_bulk_body(b'{"a": 1}', "application/json")
+
+
+@pytest.mark.asyncio
+async def test_import_candidates_with_db(db_session: AsyncSession):
+    await create_candidate(
+        candidate=CandidateCreate(
+            name="Existing",
+            email="existing@example.com",
+            position="Tester",
+            status="applied",
+        ),
+        db=db_session,
+    )
+
+    items = [
+        {"name": "A", "email": "a@example.com", "position": "Dev", "status": "applied"},
+        {"name": "B", "email": "existing@example.com", "position": "Dev", "status": "applied"},
+        {"name": "C", "email": "c@example.com", "position": "Dev", "status": "unknown"},
+        {"name": "D", "email": "a@example.com", "position": "Dev", "status": "hired"},
+        "not json",
+        {"name": "E", "email": "e@example.com", "position": "Dev", "status": "hired"},
+    ]
+
+    data = await import_candidates(items, db_session, chunk_size=2)
+
+    assert (data.created, data.duplicate, data.invalid) == (2, 2, 2)
+    assert [row.status for row in data.results] == [
+        CandidateBulkRowStatusEnum.CREATED,
+        CandidateBulkRowStatusEnum.DUPLICATE,
+        CandidateBulkRowStatusEnum.INVALID,
+        CandidateBulkRowStatusEnum.DUPLICATE,
+        CandidateBulkRowStatusEnum.INVALID,
+        CandidateBulkRowStatusEnum.CREATED,
+    ]
+    assert data.results[0].id is not None
+    assert data.results[2].error.startswith("status:")
+
+    query_result = await db_session.execute(
+        select(CandidateModel).where(CandidateModel.email == "e@example.com")
+    )
+    created = query_result.scalars().one()
+    assert created.id == data.results[5].id
+    assert created.status == CandidateStatusEnum.HIRED
+
+
+@pytest.mark.asyncio
+async def test_bulk_update_candidate_status_with_db(db_session: AsyncSession):
+    ids = []
+    for email, position in [
+        ("dev1@example.com", "Dev"),
+        ("dev2@example.com", "Dev"),
+        ("ops@example.com", "Ops"),
+    ]:
+        created = await create_candidate(
+            candidate=CandidateCreate(
+                name="Bulk", email=email, position=position, status="interviewing"
+            ),
+            db=db_session,
+        )
+        ids.append(created.data.id)
+
+    by_filter = CandidateBulkStatusUpdate(
+        filter=CandidateBulkFilter(position="Dev"), status="hired"
+    )
+    result = await bulk_update_candidate_status(status_update=by_filter, db=db_session)
+    assert result["data"].updated == 2
+    # already hired, nothing to update
+    result = await bulk_update_candidate_status(status_update=by_filter, db=db_session)
+    assert result["data"].updated == 0
+
+    result = await bulk_update_candidate_status(
+        status_update=CandidateBulkStatusUpdate(
+            ids=[ids[1], ids[2], "missing"], status="rejected"
+        ),
+        db=db_session,
+    )
+    assert result["data"].updated == 2
+
+    query_result = await db_session.execute(
+        select(CandidateModel).order_by(CandidateModel.email)
+    )
+    candidates = query_result.scalars().all()
+    for candidate in candidates:
+        await db_session.refresh(candidate)
+    assert [
+        (candidate.status, candidate.hired_at is not None, candidate.version)
+        for candidate in candidates
+    ] == [
+        (CandidateStatusEnum.HIRED, True, 2),
+        (CandidateStatusEnum.REJECTED, False, 3),
+        (CandidateStatusEnum.REJECTED, False, 2),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_bulk_selection_filters():
+    selection = CandidateBulkSelection(ids=["a", "b", "c", "a", "d", "e"])
+    assert len(list(bulk_selection_filters(selection, chunk_size=2))) == 3
+    assert len(list(bulk_selection_filters(CandidateBulkSelection(ids=[])))) == 0
+
+    for invalid in [
+        CandidateBulkSelection(),
+        CandidateBulkSelection(ids=["a"], filter=CandidateBulkFilter(position="Dev")),
+        # would select every candidate
+        CandidateBulkSelection(filter=CandidateBulkFilter()),
+    ]:
+        with pytest.raises(HTTPException) as exc_info:
+            list(bulk_selection_filters(invalid))
+        assert exc_info.value.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_list_candidates_etag_changes_with_version(db_session: AsyncSession):
+    result = await create_candidate(
+        candidate=CandidateCreate(
+            name="Etag User",
+            email="etag@example.com",
+            position="Tester",
+            status="applied",
+        ),
+        db=db_session,
+    )
+
+    response = Response()
+    await list_candidates(response=response, db=db_session)
+    etag = response.headers["ETag"]
+
+    with pytest.raises(NotModified):
+        await list_candidates(response=Response(), if_none_match=etag, db=db_session)
+
+    await update_candidate_status(
+        id=result.data.id,
+        status_update=CandidateStatusUpdate(status=CandidateStatusEnum.INTERVIEWING),
+        db=db_session,
+    )
+
+    response = Response()
+    page = await list_candidates(response=response, if_none_match=etag, db=db_session)
+    assert page["data"][0].status == CandidateStatusEnum.INTERVIEWING
+    assert response.headers["ETag"] != etag
@@ -0,0 +1,165 @@
+import asyncio
+import datetime
+import json
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from conftest import create_test_candidate
+from src.api.v1.routes.candidate import delete_candidate
+from src.api.v1.routes.changes import stream_changes
+from src.api.v1.routes.feedback import submit_feedback
+from src.api.v1.routes.interview import create_schedule_interview
+from src.change_feed import ChangeBroker, dropped_subscriptions, load_events
+from src.models.models import CandidateModel
+from src.schemas.changes import ChangeEventData
+from src.schemas.feedback import FeedbackCreate
+from src.schemas.interview import InterviewCreate
+
+# python -m pytest tests/test_change_feed.py
+
+
+def _broker(db_session: AsyncSession, **options) -> ChangeBroker:
+    # the streams read the test database with sessions of their own
+    sessions = sessionmaker(
+        bind=db_session.bind, class_=AsyncSession, expire_on_commit=False
+    )
+    return ChangeBroker(sessions=sessions, **options)
+
+
+def _parse(event: str) -> dict:
+    fields = dict(line.split(": ", 1) for line in event.strip().splitlines())
+    return {**fields, "data": json.loads(fields["data"])}
+
+
+async def _first_of(events) -> str:
+    try:
+        return await asyncio.wait_for(events.__anext__(), 5)
+    finally:
+        await events.aclose()
+
+
+@pytest.mark.asyncio
+async def test_stream_pushes_changes_as_they_happen(file_db_session: AsyncSession):
+    broker = _broker(file_db_session, poll_seconds=60)
+    await create_test_candidate(file_db_session, email="before@example.com")
+
+    events = broker.stream()
+    next_event = asyncio.ensure_future(events.__anext__())
+    while not broker.subscriptions:
+        await asyncio.sleep(0)
+    await asyncio.sleep(0.05)
+
+    candidate_id = await create_test_candidate(
+        file_db_session, email="live@example.com"
+    )
+    for status in ("interviewing", "hired"):
+        await file_db_session.execute(
+            update(CandidateModel)
+            .where(CandidateModel.id == candidate_id)
+            .values(status=status, version=CandidateModel.version + 1)
+        )
+        await file_db_session.commit()
+    broker.notify()
+
+    # the candidate created before subscribing is not replayed, and all the
+    # writes committed before the poll arrive one by one, as they were made
+    received = [_parse(await asyncio.wait_for(next_event, 5))]
+    for _ in range(2):
+        received.append(_parse(await asyncio.wait_for(events.__anext__(), 5)))
+    assert [event["event"] for event in received] == ["candidate"] * 3
+    assert {event["data"]["entity_id"] for event in received} == {candidate_id}
+    assert [
+        (event["data"]["previous_status"], event["data"]["data"]["status"])
+        for event in received
+    ] == [(None, "applied"), ("applied", "interviewing"), ("interviewing", "hired")]
+
+    await events.aclose()
+    assert not broker.subscriptions
+
+
+@pytest.mark.asyncio
+async def test_events_carry_the_rows_as_written(db_session: AsyncSession):
+    candidate_id = await create_test_candidate(db_session, email="written@example.com")
+    interview = await create_schedule_interview(
+        candidate_id=candidate_id,
+        interview=InterviewCreate(
+            interviewer="written@example.com",
+            scheduled_at=datetime.datetime(2030, 1, 1, 9),
+        ),
+        db=db_session,
+    )
+    await submit_feedback(
+        interview_id=interview["data"].id,
+        feedback_data=FeedbackCreate(rating=3, comment="Fine"),
+        db=db_session,
+    )
+    await delete_candidate(id=candidate_id, db=db_session)
+
+    page = await load_events(db_session, since=0, limit=100)
+    upserts, deletes = page.events[:3], page.events[3:]
+    assert [event.entity for event in upserts] == ["candidate", "interview", "feedback"]
+    assert upserts[1].data.scheduled_at == datetime.datetime(2030, 1, 1, 9)
+    assert upserts[2].data.comment == "Fine"
+
+    # the cascade logs a tombstone per row, with the row as it was deleted
+    tombstones = {event.entity: event for event in deletes}
+    assert {event.operation for event in deletes} == {"delete"}
+    assert set(tombstones) == {"candidate", "interview", "feedback"}
+    assert tombstones["candidate"].data.email == "written@example.com"
+
+
+@pytest.mark.asyncio
+async def test_stream_resumes_after_the_last_event_id(file_db_session: AsyncSession):
+    broker = _broker(file_db_session)
+    first_id = await create_test_candidate(file_db_session, email="first@example.com")
+    second_id = await create_test_candidate(file_db_session, email="second@example.com")
+
+    first = _parse(await _first_of(broker.stream(since=0)))
+    assert first["data"]["entity_id"] == first_id
+
+    resumed = _parse(await _first_of(broker.stream(since=int(first["id"]))))
+    assert resumed["data"]["entity_id"] == second_id
+
+
+@pytest.mark.asyncio
+async def test_slow_subscribers_are_dropped(file_db_session: AsyncSession):
+    broker = _broker(file_db_session, poll_seconds=60, queue_size=1)
+    events = broker.stream()
+    next_event = asyncio.ensure_future(events.__anext__())
+    while not broker.subscriptions:
+        await asyncio.sleep(0)
+    await asyncio.sleep(0.05)
+
+    dropped_before = dropped_subscriptions.value()
+    for seq in range(broker.last_seq + 1, broker.last_seq + 4):
+        broker.publish(
+            ChangeEventData(
+                seq=seq,
+                entity="candidate",
+                entity_id="c-1",
+                operation="delete",
+                changed_at=datetime.datetime(2030, 1, 1),
+            )
+        )
+
+    # the stream ends, its client reconnects with Last-Event-ID
+    with pytest.raises(StopAsyncIteration):
+        await asyncio.wait_for(next_event, 5)
+    assert dropped_subscriptions.value() == dropped_before + 1
+    assert not broker.subscriptions
+
+
+@pytest.mark.asyncio
+async def test_stream_route_reads_the_last_event_id():
+    with pytest.raises(HTTPException) as exc_info:
+        await stream_changes(since=None, last_event_id="not-a-number")
+    assert exc_info.value.status_code == 400
+
+    response = await stream_changes(since=None, last_event_id=None)
+    assert response.media_type == "text/event-stream"
+    assert response.headers["cache-control"] == "no-cache"
+    await response.body_iterator.aclose()
@@ -0,0 +1,92 @@
+import datetime
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.api.v1.routes.candidate import (
+    create_candidate,
+    delete_candidate,
+    update_candidate_status,
+)
+from src.api.v1.routes.changes import list_changes
+from src.api.v1.routes.feedback import submit_feedback
+from src.api.v1.routes.interview import create_schedule_interview
+from src.schemas.candidate import (
+    CandidateCreate,
+    CandidateStatusEnum,
+    CandidateStatusUpdate,
+)
+from src.schemas.feedback import FeedbackCreate
+from src.schemas.interview import InterviewCreate
+
+# python -m pytest tests/test_changes.py
+
+
+@pytest.mark.asyncio
+async def test_list_changes_with_db(db_session: AsyncSession):
+    kept = await create_candidate(
+        candidate=CandidateCreate(
+            name="Kept", email="kept@example.com", position="Tester", status="applied"
+        ),
+        db=db_session,
+    )
+    removed = await create_candidate(
+        candidate=CandidateCreate(
+            name="Removed",
+            email="removed@example.com",
+            position="Tester",
+            status="applied",
+        ),
+        db=db_session,
+    )
+    interview = await create_schedule_interview(
+        candidate_id=removed.data.id,
+        interview=InterviewCreate(
+            interviewer="Interviewer A",
+            scheduled_at=datetime.datetime(2025, 7, 1, 8, 0),
+        ),
+        db=db_session,
+    )
+    await submit_feedback(
+        interview_id=interview["data"].id,
+        feedback_data=FeedbackCreate(rating=5, comment="Great"),
+        db=db_session,
+    )
+
+    first_page = await list_changes(since=0, limit=3, db=db_session)
+    assert first_page["data"].has_more is True
+    assert [change.entity for change in first_page["data"].changes] == [
+        "candidate",
+        "candidate",
+        "interview",
+    ]
+    assert first_page["data"].changes[0].data.email == "kept@example.com"
+    since = first_page["data"].next_since
+
+    await update_candidate_status(
+        id=kept.data.id,
+        status_update=CandidateStatusUpdate(status=CandidateStatusEnum.HIRED),
+        db=db_session,
+    )
+    await delete_candidate(id=removed.data.id, db=db_session)
+
+    second_page = await list_changes(since=since, db=db_session)
+    changes = {
+        (change.entity, change.entity_id): change
+        for change in second_page["data"].changes
+    }
+
+    assert second_page["data"].has_more is False
+    assert changes[("candidate", kept.data.id)].data.status == CandidateStatusEnum.HIRED
+    # the feedback upsert collapses into the tombstone of the cascade delete
+    for key in (
+        ("candidate", removed.data.id),
+        ("interview", str(interview["data"].id)),
+        ("feedback", "1"),
+    ):
+        assert changes[key].operation == "delete"
+        assert changes[key].data is None
+
+    empty_page = await list_changes(since=second_page["data"].next_since, db=db_session)
+    assert empty_page["data"].changes == []
+    assert empty_page["data"].next_since == second_page["data"].next_since
@@ -0,0 +1,184 @@
+import asyncio
+import datetime
+import itertools
+import time
+
+import pytest
+from fastapi import Response
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from settings import DB_ENGINE_PROFILES, READ_YOUR_WRITES_SECONDS
+import src.instrumentation  # noqa: F401, registers the pool gauges
+from src import database
+from src.api.v1.routes.candidate import create_candidate
+from src.api.v1.routes.interview import (
+    create_schedule_interview,
+    list_candidate_interviews,
+)
+from src.database import (
+    READ_TARGET,
+    SQLITE_PRAGMAS,
+    Base,
+    create_engine_from_profile,
+)
+from src.metrics import registry
+from src.schemas.candidate import CandidateCreate
+from src.schemas.interview import InterviewCreate
+
+# python -m pytest tests/test_database.py
+
+
+@pytest.mark.asyncio
+async def test_engine_profile_sets_pragmas_and_pool(tmp_path):
+    options = DB_ENGINE_PROFILES["high-throughput"]
+    engine = create_engine_from_profile(
+        f"sqlite+aiosqlite:///{tmp_path / 'profile.db'}", options
+    )
+
+    async with engine.connect() as conn:
+        pragmas = {
+            pragma: (await conn.execute(text(f"PRAGMA {pragma}"))).scalar()
+            for pragma in SQLITE_PRAGMAS
+        }
+
+    assert engine.pool.size() == options["pool_size"]
+    await engine.dispose()
+
+    assert pragmas == {
+        "journal_mode": "wal",
+        "synchronous": 1,  # NORMAL
+        "busy_timeout": options["busy_timeout"],
+        "cache_size": options["cache_size"],
+        "mmap_size": options["mmap_size"],
+    }
+
+
+@pytest.mark.asyncio
+async def test_engine_profile_in_memory_database():
+    engine = create_engine_from_profile(
+        "sqlite+aiosqlite:///:memory:", DB_ENGINE_PROFILES["default"]
+    )
+
+    async with engine.connect() as conn:
+        busy_timeout = (await conn.execute(text("PRAGMA busy_timeout"))).scalar()
+
+    await engine.dispose()
+
+    assert busy_timeout == DB_ENGINE_PROFILES["default"]["busy_timeout"]
+
+
+@pytest.mark.asyncio
+async def test_reads_go_to_replicas_unless_the_client_just_wrote(
+    tmp_path, monkeypatch
+):
+    primary_path = tmp_path / "primary.db"
+    primary = create_engine_from_profile(f"sqlite+aiosqlite:///{primary_path}")
+    async with primary.begin() as conn:
+        await conn.execute(text("CREATE TABLE items (id INTEGER PRIMARY KEY)"))
+        await conn.execute(text("INSERT INTO items VALUES (1)"))
+    await primary.dispose()
+
+    assert database.read_sessionmaker() is database.AsyncSessionLocal
+
+    replica = create_engine_from_profile(
+        f"sqlite+aiosqlite:///file:{primary_path}?mode=ro&uri=true"
+    )
+    replica_sessions = sessionmaker(replica, class_=AsyncSession)
+    monkeypatch.setattr(database, "replica_engines", [replica])
+    monkeypatch.setattr(
+        database, "_replica_sessions", itertools.cycle([replica_sessions])
+    )
+
+    long_ago = str(time.time() - READ_YOUR_WRITES_SECONDS - 1)
+    assert database.read_sessionmaker() is replica_sessions
+    assert database.read_sessionmaker(long_ago) is replica_sessions
+    assert database.read_sessionmaker(str(time.time())) is database.AsyncSessionLocal
+    assert database.read_sessionmaker("garbage") is database.AsyncSessionLocal
+
+    async with replica_sessions() as session:
+        assert (await session.execute(text("SELECT id FROM items"))).scalar() == 1
+        with pytest.raises(OperationalError, match="readonly"):
+            await session.execute(text("INSERT INTO items VALUES (2)"))
+    await replica.dispose()
+
+
+@pytest.mark.asyncio
+async def test_primary_reads_never_see_a_lagging_replica(tmp_path):
+    primary = create_engine_from_profile(f"sqlite+aiosqlite:///{tmp_path / 'p.db'}")
+    async with primary.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    primary_sessions = sessionmaker(
+        primary,
+        class_=AsyncSession,
+        expire_on_commit=False,
+        info={READ_TARGET: "primary"},
+    )
+
+    async with primary_sessions() as db:
+        created = await create_candidate(
+            candidate=CandidateCreate(
+                name="Lag", email="lag@example.com", position="Dev", status="applied"
+            ),
+            db=db,
+        )
+    candidate_id = created.data.id
+
+    # the replica is a snapshot taken before the write below: it lags
+    replica_path = tmp_path / "replica.db"
+    async with primary.connect() as conn:
+        await conn.exec_driver_sql(f"VACUUM INTO '{replica_path}'")
+    replica = create_engine_from_profile(f"sqlite+aiosqlite:///{replica_path}")
+    replica_sessions = sessionmaker(
+        replica, class_=AsyncSession, info={READ_TARGET: "replica"}
+    )
+
+    async with primary_sessions() as db:
+        await create_schedule_interview(
+            candidate_id=candidate_id,
+            interview=InterviewCreate(
+                interviewer="lag@example.com",
+                scheduled_at=datetime.datetime(2030, 1, 1, 9),
+            ),
+            db=db,
+        )
+
+    async def read(sessions):
+        async with sessions() as db:
+            result = await list_candidate_interviews(
+                candidate_id=candidate_id, response=Response(), db=db
+            )
+        return len(result["data"])
+
+    # concurrent reads of both targets are not coalesced
+    assert await asyncio.gather(read(replica_sessions), read(primary_sessions)) == [
+        0,
+        1,
+    ]
+    # the writer's next read does not hit the entry filled from the replica
+    assert await read(replica_sessions) == 0
+    assert await read(primary_sessions) == 1
+
+    await replica.dispose()
+    await primary.dispose()
+
+
+@pytest.mark.asyncio
+async def test_write_sessions_mark_the_client_as_having_written():
+    response = Response()
+    sessions = database.get_db(response)
+    await sessions.__anext__()
+    await sessions.aclose()
+
+    assert response.headers["set-cookie"].startswith(
+        f"{database.LAST_WRITE_COOKIE}="
+    )
+
+
+def test_pool_metrics_per_engine():
+    rendered = registry.render()
+
+    assert 'db_pool_connections{engine="primary",state="checked_out"}' in rendered
+    assert 'db_pool_size{engine="primary"}' in rendered
@@ -0,0 +1,169 @@
+import asyncio
+
+import httpx
+import pytest
+from fastapi import FastAPI, Response
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from src.api.v1.routes.candidate import candidate_router
+from src.api.v1.routes.interview import interview_router
+from src.database import LAST_WRITE_COOKIE, get_db
+from src.idempotency import IdempotencyMiddleware, _now, purge_expired_keys
+from src.models.models import CandidateModel, IdempotencyKeyModel, InterviewModel
+
+# python -m pytest tests/test_idempotency.py
+
+CANDIDATE = {
+    "name": "Retry Person",
+    "email": "retry@example.com",
+    "position": "Tester",
+    "status": "applied",
+}
+
+
+def _app(engine: AsyncEngine) -> FastAPI:
+    sessions = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+
+    async def get_test_db():
+        async with sessions() as session:
+            yield session
+
+    app = FastAPI()
+    app.add_middleware(IdempotencyMiddleware, engine=engine)
+    app.include_router(candidate_router, prefix="/candidates")
+    app.include_router(
+        interview_router, prefix="/candidates/{candidate_id}/interviews"
+    )
+    app.dependency_overrides[get_db] = get_test_db
+    return app
+
+
+def _client(file_db_session: AsyncSession) -> httpx.AsyncClient:
+    # the requests use their own sessions on the engine of the test database
+    transport = httpx.ASGITransport(app=_app(file_db_session.bind))
+    return httpx.AsyncClient(transport=transport, base_url="http://test")
+
+
+async def _count(file_db_session, model) -> int:
+    count_query_result = await file_db_session.execute(
+        select(func.count()).select_from(model)
+    )
+    return count_query_result.scalar()
+
+
+@pytest.mark.asyncio
+async def test_retries_replay_the_first_response(file_db_session: AsyncSession):
+    headers = {"Idempotency-Key": "create-retry-person"}
+    async with _client(file_db_session) as client:
+        first = await client.post("/candidates/", json=CANDIDATE, headers=headers)
+        retry = await client.post("/candidates/", json=CANDIDATE, headers=headers)
+        # without a key the email check answers
+        unkeyed = await client.post("/candidates/", json=CANDIDATE)
+
+    assert first.status_code == retry.status_code == 201
+    assert retry.json() == first.json()
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert "Idempotent-Replayed" not in first.headers
+    assert unkeyed.status_code == 400
+    assert await _count(file_db_session, CandidateModel) == 1
+
+
+@pytest.mark.asyncio
+async def test_retries_replay_the_stored_headers(file_db_session: AsyncSession):
+    app = _app(file_db_session.bind)
+
+    @app.post("/exports", status_code=202)
+    async def start_export(response: Response):
+        response.headers["Location"] = "/exports/1"
+        response.headers["ETag"] = 'W/"1"'
+        response.headers["X-Request-Id"] = "not stored"
+        response.set_cookie(LAST_WRITE_COOKIE, "1700000000.000")
+        return {"status": True}
+
+    headers = {"Idempotency-Key": "export"}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        first = await client.post("/exports", json={}, headers=headers)
+        retry = await client.post("/exports", json={}, headers=headers)
+
+    assert first.status_code == retry.status_code == 202
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert retry.headers["Location"] == "/exports/1"
+    assert retry.headers["ETag"] == 'W/"1"'
+    assert "X-Request-Id" not in retry.headers
+    # the retry routes the client's next reads like the first request did
+    assert retry.cookies[LAST_WRITE_COOKIE] == "1700000000.000"
+    assert retry.headers["content-type"] == "application/json"
+
+
+@pytest.mark.asyncio
+async def test_key_reused_for_another_request(file_db_session: AsyncSession):
+    headers = {"Idempotency-Key": "reused"}
+    async with _client(file_db_session) as client:
+        await client.post("/candidates/", json=CANDIDATE, headers=headers)
+        other = await client.post(
+            "/candidates/",
+            json={**CANDIDATE, "email": "other@example.com"},
+            headers=headers,
+        )
+        too_long = await client.post(
+            "/candidates/", json=CANDIDATE, headers={"Idempotency-Key": "k" * 256}
+        )
+
+    assert other.status_code == 422
+    assert too_long.status_code == 400
+    assert await _count(file_db_session, CandidateModel) == 1
+
+
+@pytest.mark.asyncio
+async def test_concurrent_retries_create_one_interview(file_db_session: AsyncSession):
+    async with _client(file_db_session) as client:
+        created = await client.post("/candidates/", json=CANDIDATE)
+        candidate_id = created.json()["data"]["id"]
+        interview = {
+            "interviewer": "retry@example.com",
+            "scheduled_at": "2030-01-01T09:00:00",
+        }
+        responses = await asyncio.gather(
+            *(
+                client.post(
+                    f"/candidates/{candidate_id}/interviews",
+                    json=interview,
+                    headers={"Idempotency-Key": "schedule-once"},
+                )
+                for _ in range(5)
+            )
+        )
+
+    statuses = [response.status_code for response in responses]
+    assert statuses.count(201) >= 1
+    assert set(statuses) <= {201, 409}
+    created_bodies = {
+        response.text for response in responses if response.status_code == 201
+    }
+    assert len(created_bodies) == 1
+    assert await _count(file_db_session, InterviewModel) == 1
+
+
+@pytest.mark.asyncio
+async def test_expired_keys_are_claimed_again_and_purged(file_db_session: AsyncSession):
+    headers = {"Idempotency-Key": "expiring"}
+    async with _client(file_db_session) as client:
+        await client.post("/candidates/", json=CANDIDATE, headers=headers)
+        await file_db_session.execute(
+            update(IdempotencyKeyModel).values(expires_at=_now())
+        )
+        await file_db_session.commit()
+
+        # runs the route again, which now finds the email taken
+        retry = await client.post("/candidates/", json=CANDIDATE, headers=headers)
+    assert retry.status_code == 400
+    assert "Idempotent-Replayed" not in retry.headers
+
+    await file_db_session.execute(update(IdempotencyKeyModel).values(expires_at=_now()))
+    connection = await file_db_session.connection()
+    assert await connection.run_sync(purge_expired_keys) == 1
+    await file_db_session.commit()
+    assert await _count(file_db_session, IdempotencyKeyModel) == 0
@@ -0,0 +1,98 @@
+import logging
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from sqlalchemy import select, text
+
+from src.database import CandidateModel
+from src.instrumentation import QueryInstrumentationMiddleware, track_queries
+from src.metrics import metrics_router, registry
+from tests.conftest import test_engine
+
+# python -m pytest tests/test_instrumentation.py
+
+
+def _instrumented_app(**middleware_options) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(QueryInstrumentationMiddleware, **middleware_options)
+    app.include_router(metrics_router)
+
+    @app.get("/items/{item_id}")
+    async def read_item(item_id: int):
+        async with test_engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+            await conn.execute(text("SELECT 2"))
+        return {"item_id": item_id}
+
+    return app
+
+
+async def _get(app: FastAPI, url: str) -> httpx.Response:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        return await client.get(url)
+
+
+@pytest.mark.asyncio
+async def test_track_queries_counts_statements(db_session):
+    with track_queries() as stats:
+        await db_session.execute(select(CandidateModel))
+        await db_session.execute(select(CandidateModel.id))
+
+    assert stats.count == 2
+    assert stats.total_seconds > 0
+    assert "candidates" in stats.slowest_statement
+
+    # nothing is recorded outside the context
+    await db_session.execute(select(CandidateModel))
+    assert stats.count == 2
+
+
+@pytest.mark.asyncio
+async def test_middleware_adds_query_headers():
+    response = await _get(_instrumented_app(add_headers=True), "/items/1")
+
+    assert response.status_code == 200
+    assert response.headers["x-db-query-count"] == "2"
+    assert float(response.headers["x-db-time-ms"]) > 0
+
+
+@pytest.mark.asyncio
+async def test_middleware_headers_are_opt_in():
+    response = await _get(_instrumented_app(add_headers=False), "/items/1")
+
+    assert "x-db-query-count" not in response.headers
+
+
+@pytest.mark.asyncio
+async def test_middleware_logs_slow_requests(caplog):
+    with caplog.at_level(logging.WARNING, logger="Job Interview"):
+        await _get(_instrumented_app(slow_request_db_ms=0), "/items/1")
+
+    [record] = [r for r in caplog.records if r.message.startswith("slow request")]
+    assert '"route": "/items/{item_id}"' in record.message
+    assert '"query_count": 2' in record.message
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint_renders_prometheus_text():
+    app = _instrumented_app()
+    before = registry._metrics["http_requests_total"].value(
+        ("GET", "/items/{item_id}", "200")
+    )
+
+    await _get(app, "/items/1")
+    response = await _get(app, "/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert "# TYPE http_requests_total counter" in response.text
+    assert (
+        'http_requests_total{method="GET",route="/items/{item_id}",status="200"} '
+        f"{before + 1}"
+    ) in response.text
+    assert (
+        'db_queries_per_request_bucket{method="GET",route="/items/{item_id}",le="2"}'
+        in response.text
+    )
@@ -2,9 +2,15 @@ import datetime
 from unittest.mock import AsyncMock, MagicMock
 
 import pytest
-from fastapi import HTTPException
-
-from src.api.v1.routes.interview import create_schedule_interview
+from fastapi import HTTPException, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.api.v1.routes.interview import (
+    create_schedule_interview,
+    list_candidate_interviews,
+)
+from src.cache import read_cache
+from src.etag import NotModified
 from src.models.models import CandidateModel, InterviewModel
 from src.schemas.interview import InterviewCreate, InterviewCreateData
 
@@ -23,16 +29,17 @@ async def test_create_schedule_interview_success_with_mock():
 
     mock_db = AsyncMock()
 
-    # simulate: candidate exists
-    mock_candidate = CandidateModel(
-        id=candidate_id,
-        name="Mock User",
-        email="mock@example.com",
-        position="Python Developer",
-        status="applied",
+    # simulate: candidate exists, INSERT ... SELECT ... RETURNING returns the row
+    inserted_interview = InterviewModel(
+        id=99999,
+        candidate_id=candidate_id,
+        interviewer="Mock Interviewer",
+        scheduled_at=datetime.datetime(2025, 7, 1, 15, 0),
+        duration_minutes=60,
+        result="PASS",
     )
     mock_result = MagicMock()
-    mock_result.scalars.return_value.first.return_value = mock_candidate
+    mock_result.scalars.return_value.first.return_value = inserted_interview
     mock_db.execute.return_value = mock_result
 
     # simulate commit & refresh
@@ -40,12 +47,6 @@ async def test_create_schedule_interview_success_with_mock():
     mock_db.refresh = AsyncMock()
     mock_db.add = MagicMock()
 
-    # Mock refresh to assign ID
-    async def mock_refresh(obj):
-        obj.id = 99999
-
-    mock_db.refresh.side_effect = mock_refresh
-
     result = await create_schedule_interview(
         candidate_id=candidate_id, interview=interview_data, db=mock_db
     )
@@ -53,28 +54,19 @@ async def test_create_schedule_interview_success_with_mock():
     assert result["status"] is True
     assert result["message"] == "Interview scheduled successfully"
     assert isinstance(result["data"], InterviewCreateData)
+    assert result["data"].id == 99999
     assert result["data"].interviewer == "Mock Interviewer"
     assert result["data"].result == "PASS"
     assert result["data"].candidate_id == candidate_id
     assert result["data"].scheduled_at == datetime.datetime(2025, 7, 1, 15, 0)
 
+    # the candidate check is part of the INSERT itself
     mock_db.execute.assert_awaited_once()
-    mock_db.add.assert_called_once()
-    add_obj = mock_db.add.call_args[0][0]
-    assert isinstance(add_obj, InterviewModel)
-    assert add_obj.candidate_id == candidate_id
-    assert add_obj.interviewer == interview_data.interviewer
-    assert add_obj.scheduled_at == interview_data.scheduled_at
-    assert add_obj.result == interview_data.result
-
+    statement = mock_db.execute.call_args[0][0]
+    assert statement.is_insert
+    mock_db.add.assert_not_called()
     mock_db.commit.assert_awaited_once()
-    mock_db.refresh.assert_awaited_once()
-    refresh_obj = mock_db.refresh.call_args[0][0]
-    assert refresh_obj.id == 99999
-    assert refresh_obj.candidate_id == candidate_id
-    assert refresh_obj.interviewer == interview_data.interviewer
-    assert refresh_obj.scheduled_at == interview_data.scheduled_at
-    assert refresh_obj.result == interview_data.result
+    mock_db.refresh.assert_not_awaited()
 
 
 @pytest.mark.asyncio
@@ -82,10 +74,13 @@ async def test_create_schedule_interview_candidate_not_found():
     # Arrange
     mock_db = AsyncMock()
 
-    # Simulate db.execute().scalars().first() returning None
-    mock_result = MagicMock()
-    mock_result.scalars.return_value.first.return_value = None
-    mock_db.execute.return_value = mock_result
+    # Simulate the INSERT ... WHERE EXISTS returning no row, and the
+    # follow-up lookup not finding the candidate
+    insert_result = MagicMock()
+    insert_result.scalars.return_value.first.return_value = None
+    candidate_result = MagicMock()
+    candidate_result.first.return_value = None
+    mock_db.execute.side_effect = [insert_result, candidate_result]
 
     interview_data = InterviewCreate(
         interviewer="interviewer_1",
@@ -102,7 +97,95 @@ async def test_create_schedule_interview_candidate_not_found():
     assert exc_info.value.status_code == 404
     assert exc_info.value.detail == "Candidate not found"
 
-    mock_db.execute.assert_awaited_once()
+    assert mock_db.execute.await_count == 2
     mock_db.add.assert_not_called()
     mock_db.commit.assert_not_awaited()
     mock_db.refresh.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_list_candidate_interviews_is_cached_until_interview_created(
+    db_session: AsyncSession,
+):
+    candidate = CandidateModel(
+        name="Cached User",
+        email="cached@example.com",
+        position="Tester",
+        status="applied",
+    )
+    db_session.add(candidate)
+    await db_session.commit()
+
+    first = await list_candidate_interviews(
+        response=Response(), candidate_id=candidate.id, db=db_session
+    )
+    assert first["data"] == []
+
+    # served from the cache: the session (on the same read target) is not
+    # touched
+    mock_db = AsyncMock(info=db_session.info)
+    second = await list_candidate_interviews(
+        response=Response(), candidate_id=candidate.id, db=mock_db
+    )
+    assert second["data"] == []
+    mock_db.execute.assert_not_awaited()
+
+    await create_schedule_interview(
+        candidate_id=candidate.id,
+        interview=InterviewCreate(
+            interviewer="Interviewer A",
+            scheduled_at=datetime.datetime(2025, 7, 1, 8, 0),
+        ),
+        db=db_session,
+    )
+
+    third = await list_candidate_interviews(
+        response=Response(), candidate_id=candidate.id, db=db_session
+    )
+    assert [interview.interviewer for interview in third["data"]] == ["Interviewer A"]
+
+
+@pytest.mark.asyncio
+async def test_list_candidate_interviews_etag(db_session: AsyncSession):
+    candidate = CandidateModel(
+        name="Etag User",
+        email="etag@example.com",
+        position="Tester",
+        status="applied",
+    )
+    db_session.add(candidate)
+    await db_session.commit()
+
+    response = Response()
+    await list_candidate_interviews(
+        response=response, candidate_id=candidate.id, db=db_session
+    )
+    etag = response.headers["ETag"]
+
+    # answered from the cached etag, then from the version query alone
+    for _ in range(2):
+        with pytest.raises(NotModified) as exc_info:
+            await list_candidate_interviews(
+                response=Response(),
+                candidate_id=candidate.id,
+                if_none_match=etag,
+                db=db_session,
+            )
+        assert exc_info.value.etag == etag
+        read_cache.clear()
+
+    await create_schedule_interview(
+        candidate_id=candidate.id,
+        interview=InterviewCreate(
+            interviewer="Interviewer A",
+            scheduled_at=datetime.datetime(2025, 7, 1, 8, 0),
+        ),
+        db=db_session,
+    )
+
+    response = Response()
+    result = await list_candidate_interviews(
+        response=response, candidate_id=candidate.id, if_none_match=etag, db=db_session
+    )
+    assert len(result["data"]) == 1
+    assert response.headers["ETag"] != etag
@@ -0,0 +1,158 @@
+import datetime
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from conftest import create_test_candidate
+from src.api.v1.routes.interview import create_schedule_interview
+from src.api.v1.routes.interviewer import list_free_slots
+from src.scheduling import free_slots
+from src.schemas.interview import InterviewCreate
+
+# python -m pytest tests/test_interviewer.py
+
+INTERVIEWER = "calendar@example.com"
+
+
+def at(hour, minute=0):
+    return datetime.datetime(2030, 1, 1, hour, minute)
+
+
+async def _schedule(db_session, candidate_id, scheduled_at, duration_minutes=60):
+    return await create_schedule_interview(
+        candidate_id=candidate_id,
+        interview=InterviewCreate(
+            interviewer=INTERVIEWER,
+            scheduled_at=scheduled_at,
+            duration_minutes=duration_minutes,
+        ),
+        db=db_session,
+    )
+
+
+def test_free_slots_between_busy_intervals():
+    busy = [(at(8), at(9)), (at(9), at(10)), (at(11), at(11, 30)), (at(16), at(18))]
+
+    slots = free_slots(busy, at(7), at(17), datetime.timedelta(minutes=45))
+
+    # the 10:00-11:00 gap is long enough, 11:30-16:00 as well, 7:00-8:00 too
+    assert slots == [(at(7), at(8)), (at(10), at(11)), (at(11, 30), at(16))]
+    assert free_slots([], at(7), at(8), datetime.timedelta(hours=2)) == []
+
+
+@pytest.mark.asyncio
+async def test_create_schedule_interview_rejects_overlaps(db_session: AsyncSession):
+    candidate_id = await create_test_candidate(db_session)
+    await _schedule(db_session, candidate_id, at(10), duration_minutes=60)
+
+    for scheduled_at, duration_minutes in (
+        (at(10), 30),  # same start
+        (at(10, 30), 60),  # starts inside
+        (at(9, 30), 60),  # ends inside
+        (at(9), 180),  # contains it
+    ):
+        with pytest.raises(HTTPException) as exc_info:
+            await _schedule(db_session, candidate_id, scheduled_at, duration_minutes)
+        assert exc_info.value.status_code == 409
+        assert exc_info.value.detail == "Interviewer is already booked at this time"
+
+    # back to back on both sides
+    before = await _schedule(db_session, candidate_id, at(9), duration_minutes=60)
+    after = await _schedule(db_session, candidate_id, at(11), duration_minutes=30)
+    assert before["data"].duration_minutes == 60
+    assert after["data"].scheduled_at == at(11)
+
+    # other interviewers are not affected
+    other = await create_schedule_interview(
+        candidate_id=candidate_id,
+        interview=InterviewCreate(interviewer="other@example.com", scheduled_at=at(10)),
+        db=db_session,
+    )
+    assert other["data"].interviewer == "other@example.com"
+
+
+@pytest.mark.asyncio
+async def test_offsets_are_converted_to_utc(db_session: AsyncSession):
+    candidate_id = await create_test_candidate(db_session)
+    paris = datetime.timezone(datetime.timedelta(hours=2))
+    created = await _schedule(
+        db_session, candidate_id, datetime.datetime(2030, 1, 1, 10, tzinfo=paris)
+    )
+    assert created["data"].scheduled_at == at(8)
+
+    # the same instant in UTC
+    with pytest.raises(HTTPException) as exc_info:
+        await _schedule(
+            db_session,
+            candidate_id,
+            datetime.datetime(2030, 1, 1, 8, 30, tzinfo=datetime.timezone.utc),
+        )
+    assert exc_info.value.status_code == 409
+
+    result = await list_free_slots(
+        interviewer=INTERVIEWER,
+        start=datetime.datetime(2030, 1, 1, 9, tzinfo=paris),
+        end=datetime.datetime(2030, 1, 1, 12, tzinfo=paris),
+        duration_minutes=60,
+        db=db_session,
+    )
+    # 09:00-12:00 in Paris is 07:00-10:00 UTC, busy from 08:00 to 09:00
+    assert [(slot.start, slot.end) for slot in result["data"].slots] == [
+        (at(7), at(8)),
+        (at(9), at(10)),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_sub_second_start_times(db_session: AsyncSession):
+    candidate_id = await create_test_candidate(db_session)
+    created = await _schedule(
+        db_session, candidate_id, at(9).replace(microsecond=500000)
+    )
+    assert created["data"].scheduled_at == at(9)
+
+    # starts within the second the first interview ends in
+    with pytest.raises(HTTPException) as exc_info:
+        await _schedule(
+            db_session,
+            candidate_id,
+            at(9, 59).replace(second=59, microsecond=700000),
+        )
+    assert exc_info.value.status_code == 409
+
+    after = await _schedule(db_session, candidate_id, at(10).replace(microsecond=1))
+    assert after["data"].scheduled_at == at(10)
+
+
+@pytest.mark.asyncio
+async def test_list_free_slots_with_db(db_session: AsyncSession):
+    candidate_id = await create_test_candidate(db_session)
+    await _schedule(db_session, candidate_id, at(9), duration_minutes=60)
+    await _schedule(db_session, candidate_id, at(11), duration_minutes=90)
+    # started before the window, ends inside it
+    await _schedule(db_session, candidate_id, at(6, 30), duration_minutes=120)
+
+    result = await list_free_slots(
+        interviewer=INTERVIEWER,
+        start=at(8),
+        end=at(14),
+        duration_minutes=60,
+        db=db_session,
+    )
+    data = result["data"]
+
+    assert [(slot.start, slot.end) for slot in data.slots] == [
+        (at(10), at(11)),
+        (at(12, 30), at(14)),
+    ]
+
+    with pytest.raises(HTTPException) as exc_info:
+        await list_free_slots(
+            interviewer=INTERVIEWER,
+            start=at(14),
+            end=at(8),
+            duration_minutes=60,
+            db=db_session,
+        )
+    assert exc_info.value.status_code == 400
@@ -0,0 +1,231 @@
+import asyncio
+
+import pytest
+from sqlalchemy import inspect, text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from src.database import create_engine_from_profile
+from src.migrations import (
+    HEAD_VERSION,
+    check_schema,
+    get_schema_version,
+    upgrade,
+    upgrade_database,
+)
+
+# python -m pytest tests/test_migrations.py
+
+
+def _index_names(connection, table_name):
+    return {index["name"] for index in inspect(connection).get_indexes(table_name)}
+
+
+@pytest.mark.asyncio
+async def test_upgrade_new_database_is_stamped_with_head(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'new.db'}")
+
+    async with engine.begin() as conn:
+        previous_version = await conn.run_sync(upgrade)
+        version = await conn.run_sync(get_schema_version)
+        interview_indexes = await conn.run_sync(_index_names, "interviews")
+
+    await engine.dispose()
+
+    assert previous_version == 0
+    assert version == HEAD_VERSION
+    assert "ix_interviews_candidate_id_scheduled_at" in interview_indexes
+
+
+@pytest.mark.asyncio
+async def test_upgrade_existing_database_adds_indexes(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'old.db'}")
+
+    # schema as created by create_all before indexes were declared
+    async with engine.begin() as conn:
+        await conn.execute(
+            text(
+                "CREATE TABLE candidates (id VARCHAR PRIMARY KEY, name VARCHAR NOT NULL, "
+                "email VARCHAR NOT NULL UNIQUE, position VARCHAR NOT NULL, "
+                "status VARCHAR(12) NOT NULL)"
+            )
+        )
+        await conn.execute(
+            text(
+                "CREATE TABLE interviews (id INTEGER PRIMARY KEY AUTOINCREMENT, "
+                "candidate_id VARCHAR NOT NULL REFERENCES candidates (id), "
+                "interviewer VARCHAR NOT NULL, scheduled_at DATETIME NOT NULL, "
+                "result VARCHAR)"
+            )
+        )
+        await conn.execute(
+            text(
+                "INSERT INTO candidates VALUES "
+                "('c-1', 'Old', 'old@example.com', 'Tester', 'applied')"
+            )
+        )
+
+    async with engine.begin() as conn:
+        previous_version = await conn.run_sync(upgrade)
+        candidate_indexes = await conn.run_sync(_index_names, "candidates")
+        interview_indexes = await conn.run_sync(_index_names, "interviews")
+        has_feedbacks = await conn.run_sync(
+            lambda sync_conn: inspect(sync_conn).has_table("feedbacks")
+        )
+        candidate_columns = await conn.run_sync(
+            lambda sync_conn: inspect(sync_conn).get_columns("candidates")
+        )
+
+    # running it again is a no-op
+    async with engine.begin() as conn:
+        assert await conn.run_sync(upgrade) == HEAD_VERSION
+        candidate_count = (
+            await conn.execute(text("SELECT count(*) FROM candidates"))
+        ).scalar()
+
+    await engine.dispose()
+
+    assert previous_version == 0
+    assert {"ix_candidates_status_id", "ix_candidates_position_id"} <= candidate_indexes
+    assert "ix_interviews_candidate_id_scheduled_at" in interview_indexes
+    assert has_feedbacks
+    assert "version" in {column["name"] for column in candidate_columns}
+    assert candidate_count == 1
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("with_orphan", [False, True])
+async def test_upgrade_rebuilds_tables_with_cascading_foreign_keys(
+    tmp_path, with_orphan
+):
+    database_url = f"sqlite+aiosqlite:///{tmp_path / 'fk.db'}"
+
+    # schema at version 3: foreign keys without ON DELETE CASCADE, and not
+    # enforced, so an orphaned interview could be left behind
+    setup_engine = create_async_engine(database_url)
+    async with setup_engine.begin() as conn:
+        await conn.run_sync(upgrade)
+        for table_name in ("feedbacks", "interviews"):
+            await conn.execute(text(f"DROP TABLE {table_name}"))
+        await conn.execute(
+            text(
+                "CREATE TABLE interviews (id INTEGER PRIMARY KEY, "
+                "candidate_id VARCHAR NOT NULL REFERENCES candidates (id), "
+                "interviewer VARCHAR NOT NULL, scheduled_at DATETIME NOT NULL, "
+                "result VARCHAR, version INTEGER NOT NULL DEFAULT 1)"
+            )
+        )
+        await conn.execute(
+            text(
+                "CREATE TABLE feedbacks (id INTEGER PRIMARY KEY, "
+                "interview_id INTEGER NOT NULL REFERENCES interviews (id), "
+                "rating INTEGER NOT NULL, comment VARCHAR NOT NULL, "
+                "version INTEGER NOT NULL DEFAULT 1, "
+                "CONSTRAINT uq_feedback_interview_id UNIQUE (interview_id))"
+            )
+        )
+        await conn.execute(text("DELETE FROM schema_migrations WHERE version >= 4"))
+        await conn.execute(
+            text(
+                "INSERT INTO candidates (id, name, email, position, status) VALUES "
+                "('c-1', 'Old', 'old@example.com', 'Tester', 'applied')"
+            )
+        )
+        await conn.execute(
+            text(
+                "INSERT INTO interviews (id, candidate_id, interviewer, scheduled_at) "
+                "VALUES (1, 'c-1', 'a', '2025-01-01 09:00:00')"
+            )
+        )
+        if with_orphan:
+            await conn.execute(
+                text(
+                    "INSERT INTO interviews (id, candidate_id, interviewer, "
+                    "scheduled_at) VALUES (2, 'deleted', 'b', '2025-01-01 10:00:00')"
+                )
+            )
+        await conn.execute(
+            text(
+                "INSERT INTO feedbacks (interview_id, rating, comment) "
+                "VALUES (1, 5, 'ok')"
+            )
+        )
+    await setup_engine.dispose()
+
+    engine = create_engine_from_profile(database_url)
+
+    async with engine.begin() as conn:
+        previous_version = await conn.run_sync(upgrade)
+        interview_indexes = await conn.run_sync(_index_names, "interviews")
+        interview_ids = (await conn.execute(text("SELECT id FROM interviews"))).all()
+
+    async with engine.begin() as conn:
+        await conn.execute(text("DELETE FROM candidates WHERE id = 'c-1'"))
+        remaining = (
+            await conn.execute(
+                text(
+                    "SELECT (SELECT count(*) FROM interviews), "
+                    "(SELECT count(*) FROM feedbacks)"
+                )
+            )
+        ).one()
+        tombstones = (
+            await conn.execute(
+                text(
+                    "SELECT entity, entity_id FROM change_log "
+                    "WHERE operation = 'delete'"
+                )
+            )
+        ).all()
+
+    await engine.dispose()
+
+    assert previous_version == 3
+    assert "ix_interviews_candidate_id_scheduled_at" in interview_indexes
+    # the orphaned interview could not satisfy the foreign key
+    assert interview_ids == [(1,)]
+    assert tuple(remaining) == (0, 0)
+    assert set(tombstones) == {
+        ("candidate", "c-1"),
+        ("interview", "1"),
+        ("feedback", "1"),
+    }
+
+
+@pytest.mark.asyncio
+async def test_check_schema_requires_head(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'check.db'}")
+
+    async with engine.connect() as conn:
+        with pytest.raises(RuntimeError, match="python -m src.migrations"):
+            await conn.run_sync(check_schema)
+
+    async with engine.begin() as conn:
+        await conn.run_sync(upgrade)
+
+    async with engine.connect() as conn:
+        assert await conn.run_sync(check_schema) == HEAD_VERSION
+
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_concurrent_upgrades_run_one_after_the_other(tmp_path):
+    # one engine per worker starting with SCHEMA_STARTUP_MODE=upgrade
+    engines = [
+        create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'workers.db'}")
+        for _ in range(4)
+    ]
+
+    previous_versions = await asyncio.gather(
+        *(upgrade_database(engine) for engine in engines)
+    )
+
+    async with engines[0].connect() as conn:
+        versions = (
+            await conn.execute(text("SELECT version FROM schema_migrations"))
+        ).scalars().all()
+    for engine in engines:
+        await engine.dispose()
+
+    assert sorted(previous_versions) == [0] + [HEAD_VERSION] * 3
+    assert sorted(versions) == list(range(1, HEAD_VERSION + 1))
@@ -0,0 +1,151 @@
+import datetime
+import json
+
+import pytest
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from conftest import create_test_candidate
+from src.api.v1.routes.candidate import update_candidate_status
+from src.api.v1.routes.feedback import submit_feedback
+from src.api.v1.routes.interview import create_schedule_interview
+from src.models.models import OutboxMessageModel
+from src.outbox import (
+    OutboxDispatcher,
+    StubSink,
+    _now,
+    backoff_seconds,
+    outbox_messages,
+)
+from src.schemas.candidate import CandidateStatusUpdate
+from src.schemas.feedback import FeedbackCreate
+from src.schemas.interview import InterviewCreate
+
+# python -m pytest tests/test_outbox.py
+
+
+async def _set_status(db_session: AsyncSession, candidate_id: str, status: str):
+    await update_candidate_status(
+        id=candidate_id,
+        status_update=CandidateStatusUpdate(status=status),
+        db=db_session,
+    )
+
+
+async def _messages(db_session: AsyncSession):
+    message_query_result = await db_session.execute(
+        select(OutboxMessageModel).order_by(OutboxMessageModel.id)
+    )
+    return message_query_result.scalars().all()
+
+
+@pytest.mark.asyncio
+async def test_writes_queue_outbox_messages(db_session: AsyncSession):
+    candidate_id = await create_test_candidate(db_session)
+    await _set_status(db_session, candidate_id, "interviewing")
+    await _set_status(db_session, candidate_id, "hired")
+    # already hired, nothing new to tell
+    await _set_status(db_session, candidate_id, "hired")
+
+    interview = await create_schedule_interview(
+        candidate_id=candidate_id,
+        interview=InterviewCreate(
+            interviewer="boss@example.com",
+            scheduled_at=datetime.datetime(2030, 1, 1, 9),
+        ),
+        db=db_session,
+    )
+    await submit_feedback(
+        interview_id=interview["data"].id,
+        feedback_data=FeedbackCreate(rating=5, comment="Great"),
+        db=db_session,
+    )
+
+    messages = await _messages(db_session)
+    assert [message.event for message in messages] == [
+        "candidate.hired",
+        "feedback.submitted",
+    ]
+    hired = json.loads(messages[0].payload)
+    assert (hired["candidate_id"], hired["status"]) == (candidate_id, "hired")
+    assert hired["hired_at"] is not None
+    feedback = json.loads(messages[1].payload)
+    assert (feedback["candidate_id"], feedback["rating"]) == (candidate_id, 5)
+
+
+@pytest.mark.asyncio
+async def test_dispatcher_sends_and_deletes_messages(file_db_session: AsyncSession):
+    candidate_id = await create_test_candidate(file_db_session)
+    await _set_status(file_db_session, candidate_id, "rejected")
+
+    sink = StubSink()
+    dispatcher = OutboxDispatcher(sink, engine=file_db_session.bind)
+    sent_before = outbox_messages.value(("candidate.rejected", "sent"))
+
+    assert await dispatcher.dispatch_once() == 1
+    assert await dispatcher.dispatch_once() == 0
+
+    assert [message.event for message in sink.sent] == ["candidate.rejected"]
+    assert sink.sent[0].payload["candidate_id"] == candidate_id
+    assert await _messages(file_db_session) == []
+    assert outbox_messages.value(("candidate.rejected", "sent")) == sent_before + 1
+
+
+@pytest.mark.asyncio
+async def test_failed_messages_are_retried_then_given_up(
+    file_db_session: AsyncSession,
+):
+    candidate_id = await create_test_candidate(file_db_session)
+    await _set_status(file_db_session, candidate_id, "hired")
+
+    sink = StubSink(failures=2)
+    dispatcher = OutboxDispatcher(sink, engine=file_db_session.bind, max_attempts=2)
+
+    assert await dispatcher.dispatch_once() == 1
+    [message] = await _messages(file_db_session)
+    assert (message.attempts, message.last_error) == (
+        1,
+        "ConnectionError: stub sink failure",
+    )
+    assert message.next_attempt_at >= _now() + datetime.timedelta(
+        seconds=backoff_seconds(1) - 1
+    )
+    # backing off
+    assert await dispatcher.dispatch_once() == 0
+
+    await file_db_session.execute(
+        update(OutboxMessageModel).values(next_attempt_at=_now())
+    )
+    await file_db_session.commit()
+    assert await dispatcher.dispatch_once() == 1
+
+    file_db_session.expire_all()
+    [message] = await _messages(file_db_session)
+    assert (message.attempts, message.next_attempt_at) == (2, None)
+    assert await dispatcher.dispatch_once() == 0
+    assert sink.sent == []
+
+
+@pytest.mark.asyncio
+async def test_claimed_messages_are_leased(file_db_session: AsyncSession):
+    for index in range(3):
+        candidate_id = await create_test_candidate(
+            file_db_session, email=f"lease{index}@example.com"
+        )
+        await _set_status(file_db_session, candidate_id, "hired")
+
+    first = OutboxDispatcher(StubSink(), engine=file_db_session.bind, batch_size=2)
+    second = OutboxDispatcher(StubSink(), engine=file_db_session.bind, batch_size=2)
+
+    claimed = await first.claim()
+    others = await second.claim()
+    assert len(claimed) == 2
+    assert len(others) == 1
+    claimed_ids = {message.id for message in claimed}
+    assert not claimed_ids & {message.id for message in others}
+    assert await second.claim() == []
+
+    count_query_result = await file_db_session.execute(
+        select(func.count()).select_from(OutboxMessageModel)
+    )
+    assert count_query_result.scalar() == 3
@@ -0,0 +1,59 @@
+import json
+
+from fastapi import Response
+
+from conftest import candidate_data
+from src import responses
+from src.models.models import CandidateModel, InterviewModel
+from src.responses import fast_response
+from src.schemas.candidate import CandidateListDataResponse, CandidateListResponse
+
+# python -m pytest tests/test_responses.py
+
+
+def _candidate(index):
+    # an unsaved row with its interviews loaded, as the list route returns it
+    return CandidateModel(
+        id=f"id-{index}",
+        **candidate_data(email=f"user{index}@example.com").model_dump(),
+        interview_count=1,
+        feedback_count=0,
+        interviews=[
+            InterviewModel(
+                id=index,
+                candidate_id=f"id-{index}",
+                interviewer="Interviewer A",
+                scheduled_at="2025-07-01T08:00:00",
+            )
+        ],
+    )
+
+
+def test_fast_response_disabled_returns_payload(monkeypatch):
+    monkeypatch.setattr(responses, "FAST_JSON_RESPONSES", False)
+    payload = {"status": True, "message": "ok", "data": []}
+
+    assert fast_response(CandidateListResponse, payload) is payload
+
+
+def test_fast_response_serializes_models_and_orm_objects(monkeypatch):
+    monkeypatch.setattr(responses, "FAST_JSON_RESPONSES", True)
+    sub_response = Response()
+    sub_response.headers["ETag"] = 'W/"abc"'
+
+    payload = {
+        "status": True,
+        "message": "Candidates retrieved successfully",
+        # already validated rows and raw ORM rows are both accepted
+        "data": [CandidateListDataResponse.model_validate(_candidate(1)), _candidate(2)],
+        "next_cursor": None,
+    }
+
+    response = fast_response(CandidateListResponse, payload, sub_response)
+
+    assert response.media_type == "application/json"
+    assert response.headers["etag"] == 'W/"abc"'
+    body = json.loads(response.body)
+    assert [candidate["id"] for candidate in body["data"]] == ["id-1", "id-2"]
+    assert body["data"][1]["interviews"][0]["scheduled_at"] == "2025-07-01T08:00:00"
+    assert body["data"][1]["interviews"][0]["feedback"] is None
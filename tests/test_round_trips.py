@@ -0,0 +1,186 @@
+import datetime
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from conftest import candidate_data
+from src.api.v1.routes.candidate import (
+    bulk_delete_candidates,
+    create_candidate,
+    delete_candidate,
+    update_candidate_status,
+)
+from src.api.v1.routes.feedback import submit_feedback
+from src.api.v1.routes.interview import create_schedule_interview
+from src.instrumentation import track_queries
+from src.models.models import CandidateModel, FeedbackModel, InterviewModel
+from src.schemas.candidate import (
+    CandidateBulkFilter,
+    CandidateBulkSelection,
+    CandidateStatusEnum,
+    CandidateStatusUpdate,
+)
+from src.schemas.feedback import FeedbackCreate
+from src.schemas.interview import InterviewCreate
+
+# python -m pytest tests/test_round_trips.py
+# every mutating route runs a single statement per request
+
+
+def _interview():
+    return InterviewCreate(
+        interviewer="interviewer@example.com",
+        scheduled_at=datetime.datetime(2025, 7, 1, 9, 0),
+    )
+
+
+@pytest.mark.asyncio
+async def test_create_candidate_is_one_statement(db_session: AsyncSession):
+    with track_queries() as stats:
+        result = await create_candidate(candidate=candidate_data(), db=db_session)
+    assert stats.count == 1
+    assert result.data.email == "candidate@example.com"
+
+    with track_queries() as stats:
+        with pytest.raises(HTTPException) as exc_info:
+            await create_candidate(candidate=candidate_data(), db=db_session)
+    assert stats.count == 1
+    assert exc_info.value.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_update_candidate_status_is_one_statement(db_session: AsyncSession):
+    created = await create_candidate(candidate=candidate_data(), db=db_session)
+
+    with track_queries() as stats:
+        result = await update_candidate_status(
+            id=created.data.id,
+            status_update=CandidateStatusUpdate(status=CandidateStatusEnum.HIRED),
+            db=db_session,
+        )
+    assert stats.count == 1
+    assert result["data"].status == "hired"
+
+    version = (
+        await db_session.execute(
+            select(CandidateModel.version).where(CandidateModel.id == created.data.id)
+        )
+    ).scalar()
+    assert version == 2
+
+    with track_queries() as stats:
+        with pytest.raises(HTTPException) as exc_info:
+            await update_candidate_status(
+                id="missing",
+                status_update=CandidateStatusUpdate(status=CandidateStatusEnum.HIRED),
+                db=db_session,
+            )
+    assert stats.count == 1
+    assert exc_info.value.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_create_interview_and_feedback_are_one_statement(
+    db_session: AsyncSession,
+):
+    created = await create_candidate(candidate=candidate_data(), db=db_session)
+
+    with track_queries() as stats:
+        interview = await create_schedule_interview(
+            candidate_id=created.data.id, interview=_interview(), db=db_session
+        )
+    assert stats.count == 1
+    assert interview["data"].candidate_id == created.data.id
+
+    # the failure path needs one more query to pick 404 or 409
+    with pytest.raises(HTTPException) as exc_info:
+        await create_schedule_interview(
+            candidate_id="missing", interview=_interview(), db=db_session
+        )
+    assert exc_info.value.status_code == 404
+
+    interview_id = interview["data"].id
+    with track_queries() as stats:
+        feedback = await submit_feedback(
+            interview_id=interview_id,
+            feedback_data=FeedbackCreate(rating=5, comment="Great"),
+            db=db_session,
+        )
+    assert stats.count == 1
+    assert feedback["data"].rating == 5
+
+    # the failure paths need one more query to pick 400 or 404
+    for missing_id, status_code in ((interview_id, 400), (interview_id + 1, 404)):
+        with pytest.raises(HTTPException) as exc_info:
+            await submit_feedback(
+                interview_id=missing_id,
+                feedback_data=FeedbackCreate(rating=1, comment="Again"),
+                db=db_session,
+            )
+        assert exc_info.value.status_code == status_code
+
+
+@pytest.mark.asyncio
+async def test_delete_candidate_cascades_in_one_statement(db_session: AsyncSession):
+    created = await create_candidate(candidate=candidate_data(), db=db_session)
+    interview = await create_schedule_interview(
+        candidate_id=created.data.id, interview=_interview(), db=db_session
+    )
+    await submit_feedback(
+        interview_id=interview["data"].id,
+        feedback_data=FeedbackCreate(rating=4, comment="Good"),
+        db=db_session,
+    )
+
+    with track_queries() as stats:
+        await delete_candidate(id=created.data.id, db=db_session)
+    assert stats.count == 1
+
+    for model in (CandidateModel, InterviewModel, FeedbackModel):
+        count_query_result = await db_session.execute(
+            select(func.count()).select_from(model)
+        )
+        assert count_query_result.scalar() == 0
+
+    with track_queries() as stats:
+        with pytest.raises(HTTPException) as exc_info:
+            await delete_candidate(id=created.data.id, db=db_session)
+    assert stats.count == 1
+    assert exc_info.value.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_bulk_delete_candidates_cascades_in_one_statement(
+    db_session: AsyncSession,
+):
+    for index in range(3):
+        created = await create_candidate(
+            candidate=candidate_data(email=f"bulk{index}@example.com"), db=db_session
+        )
+        interview = await create_schedule_interview(
+            candidate_id=created.data.id,
+            interview=InterviewCreate(
+                interviewer="interviewer@example.com",
+                scheduled_at=datetime.datetime(2025, 7, 1, 9 + index, 0),
+            ),
+            db=db_session,
+        )
+        await submit_feedback(
+            interview_id=interview["data"].id,
+            feedback_data=FeedbackCreate(rating=4, comment="Good"),
+            db=db_session,
+        )
+
+    selection = CandidateBulkSelection(filter=CandidateBulkFilter(position="Tester"))
+    with track_queries() as stats:
+        result = await bulk_delete_candidates(selection=selection, db=db_session)
+    assert stats.count == 1
+    assert result["data"].deleted == 3
+
+    for model in (CandidateModel, InterviewModel, FeedbackModel):
+        count_query_result = await db_session.execute(
+            select(func.count()).select_from(model)
+        )
+        assert count_query_result.scalar() == 0
@@ -0,0 +1,170 @@
+import datetime
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import text, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from conftest import create_test_candidate
+from src.api.v1.routes.candidate import (
+    delete_candidate,
+    search_candidates,
+)
+from src.api.v1.routes.feedback import submit_feedback
+from src.api.v1.routes.interview import create_schedule_interview
+from src.models.models import CandidateModel, InterviewModel
+from src.schemas.feedback import FeedbackCreate
+from src.schemas.interview import InterviewCreate
+from src import search
+from src.search import match_query, rebuild_candidate_search
+
+# python -m pytest tests/test_search.py
+
+
+async def _feedback(db_session, candidate_id, comment, day=1):
+    interview = await create_schedule_interview(
+        candidate_id=candidate_id,
+        interview=InterviewCreate(
+            interviewer="search@example.com",
+            scheduled_at=datetime.datetime(2030, 1, day, 9),
+        ),
+        db=db_session,
+    )
+    await submit_feedback(
+        interview_id=interview["data"].id,
+        feedback_data=FeedbackCreate(rating=4, comment=comment),
+        db=db_session,
+    )
+    return interview["data"].id
+
+
+async def _search(db_session, q, **kwargs):
+    response = await search_candidates(q=q, db=db_session, **kwargs)
+    return [candidate.id for candidate in response["data"]], response
+
+
+def test_match_query_quotes_every_word_and_expands_the_last_one():
+    assert match_query("jane.doe@exa") == '"jane" "doe" "exa"*'
+    assert match_query('python OR "x" NEAR(') == '"python" "OR" "x" "NEAR"*'
+    assert match_query(" -*- ") is None
+
+
+@pytest.mark.asyncio
+async def test_search_candidates_by_fields_and_feedback(db_session: AsyncSession):
+    jane = await create_test_candidate(
+        db_session, name="Jane Doe", email="jane.doe@example.com"
+    )
+    zoe = await create_test_candidate(
+        db_session, name="Zoë Python", email="zoe@corp.io", position="Designer"
+    )
+    john = await create_test_candidate(
+        db_session, name="John Roe", email="jr@corp.io", position="Developer"
+    )
+    await _feedback(db_session, john, "Strong python and SQL skills")
+
+    assert (await _search(db_session, "jane"))[0] == [jane]
+    assert (await _search(db_session, "doe@exam"))[0] == [jane]
+    assert (await _search(db_session, "test"))[0] == [jane]
+    assert (await _search(db_session, "zoe"))[0] == [zoe]
+    assert sorted((await _search(db_session, "corp"))[0]) == sorted([zoe, john])
+
+    # a name match ranks above a feedback comment match
+    ids, response = await _search(db_session, "python")
+    assert ids == [zoe, john]
+    assert response["data"][1].snippet == "Strong [python] and SQL skills"
+    assert response["data"][1].feedback_count == 1
+
+    assert (await _search(db_session, "nobody"))[0] == []
+
+    with pytest.raises(HTTPException) as exc_info:
+        await search_candidates(q="...", db=db_session)
+    assert exc_info.value.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_search_index_follows_writes(db_session: AsyncSession):
+    candidate_id = await create_test_candidate(
+        db_session, name="Alice Smith", email="alice@example.com"
+    )
+    interview_id = await _feedback(db_session, candidate_id, "excellent communicator")
+    assert (await _search(db_session, "communicator"))[0] == [candidate_id]
+
+    await db_session.execute(
+        update(CandidateModel)
+        .where(CandidateModel.id == candidate_id)
+        .values(name="Alice Jones", version=CandidateModel.version + 1)
+    )
+    await db_session.commit()
+    assert (await _search(db_session, "smith"))[0] == []
+    assert (await _search(db_session, "jones"))[0] == [candidate_id]
+
+    # the feedback goes with its interview
+    await db_session.execute(
+        InterviewModel.__table__.delete().where(InterviewModel.id == interview_id)
+    )
+    await db_session.commit()
+    assert (await _search(db_session, "communicator"))[0] == []
+
+    await delete_candidate(id=candidate_id, db=db_session)
+    assert (await _search(db_session, "alice"))[0] == []
+
+
+@pytest.mark.asyncio
+async def test_search_candidates_keyset_pagination(db_session: AsyncSession):
+    candidate_ids = {
+        await create_test_candidate(
+            db_session, name=f"Sam {index}", email=f"sam{index}@x.io"
+        )
+        for index in range(5)
+    }
+
+    seen = []
+    after = None
+    while True:
+        ids, response = await _search(db_session, "sam", limit=2, after=after)
+        assert len(ids) <= 2
+        seen.extend(ids)
+        after = response["next_cursor"]
+        if after is None:
+            break
+
+    assert sorted(seen) == sorted(candidate_ids)
+
+    with pytest.raises(HTTPException) as exc_info:
+        await search_candidates(q="sam", after="not-a-cursor", db=db_session)
+    assert exc_info.value.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_search_reports_left_out_matches(db_session: AsyncSession, monkeypatch):
+    monkeypatch.setattr(search, "SEARCH_MAX_MATCHES", 3)
+    for index in range(5):
+        await create_test_candidate(
+            db_session, name=f"Sam {index}", email=f"sam{index}@x.io"
+        )
+
+    ids, response = await _search(db_session, "sam")
+    assert len(ids) == 3
+    assert response["truncated"] is True
+
+    ids, response = await _search(db_session, "sam 4")
+    assert len(ids) == 1
+    assert response["truncated"] is False
+
+
+@pytest.mark.asyncio
+async def test_rebuild_candidate_search(db_session: AsyncSession):
+    candidate_id = await create_test_candidate(
+        db_session, name="Rebuilt Person", email="rebuilt@example.com"
+    )
+    await _feedback(db_session, candidate_id, "remarkable")
+
+    await db_session.execute(text("DELETE FROM candidate_search"))
+    assert (await _search(db_session, "remarkable"))[0] == []
+
+    connection = await db_session.connection()
+    assert await connection.run_sync(rebuild_candidate_search) == 1
+    await db_session.commit()
+
+    assert (await _search(db_session, "remarkable"))[0] == [candidate_id]
+    assert (await _search(db_session, "rebuilt"))[0] == [candidate_id]
@@ -0,0 +1,129 @@
+import asyncio
+import datetime
+
+import pytest
+from fastapi import HTTPException, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.api.v1.routes.candidate import create_candidate
+from src.api.v1.routes.interview import (
+    create_schedule_interview,
+    list_candidate_interviews,
+)
+from src.cache import read_cache
+from src.instrumentation import track_queries
+from src.schemas.candidate import CandidateCreate
+from src.schemas.interview import InterviewCreate
+from src.singleflight import SingleFlight, coalesced_requests
+
+# python -m pytest tests/test_singleflight.py
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_one_execution():
+    flights = SingleFlight()
+    release = asyncio.Event()
+    calls = []
+
+    async def load():
+        calls.append(1)
+        await release.wait()
+        return "result"
+
+    waiting = [asyncio.ensure_future(flights.do("key", load)) for _ in range(5)]
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await asyncio.gather(*waiting) == [("result", False)] + [
+        ("result", True)
+    ] * 4
+    assert len(calls) == 1
+    assert len(flights) == 0
+
+    # nothing is kept once the flight is over
+    assert await flights.do("key", load) == ("result", False)
+    assert len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_exceptions_are_shared():
+    flights = SingleFlight()
+
+    async def load():
+        await asyncio.sleep(0)
+        raise HTTPException(status_code=404, detail="Candidate not found")
+
+    results = await asyncio.gather(
+        flights.do("key", load), flights.do("key", load), return_exceptions=True
+    )
+    assert [exc.status_code for exc in results] == [404, 404]
+    assert len(flights) == 0
+
+
+@pytest.mark.asyncio
+async def test_follower_takes_over_from_a_cancelled_leader():
+    flights = SingleFlight()
+    started = asyncio.Event()
+
+    async def hang():
+        started.set()
+        await asyncio.Event().wait()
+
+    async def load():
+        return "result"
+
+    leader = asyncio.ensure_future(flights.do("key", hang))
+    await started.wait()
+    follower = asyncio.ensure_future(flights.do("key", load))
+    await asyncio.sleep(0)
+
+    leader.cancel()
+    assert await follower == ("result", False)
+    with pytest.raises(asyncio.CancelledError):
+        await leader
+
+
+@pytest.mark.asyncio
+async def test_identical_route_calls_are_coalesced(db_session: AsyncSession):
+    created = await create_candidate(
+        candidate=CandidateCreate(
+            name="Popular", email="popular@example.com", position="Dev", status="applied"
+        ),
+        db=db_session,
+    )
+    candidate_id = created.data.id
+    await create_schedule_interview(
+        candidate_id=candidate_id,
+        interview=InterviewCreate(
+            interviewer="popular@example.com",
+            scheduled_at=datetime.datetime(2030, 1, 1, 9),
+        ),
+        db=db_session,
+    )
+
+    with track_queries() as single:
+        await list_candidate_interviews(
+            candidate_id=candidate_id, response=Response(), db=db_session
+        )
+    read_cache.clear()
+
+    labels = ("list_candidate_interviews", "follower")
+    followers_before = coalesced_requests.value(labels)
+    responses = [Response() for _ in range(3)]
+    with track_queries() as stats:
+        results = await asyncio.gather(
+            *(
+                list_candidate_interviews(
+                    candidate_id=candidate_id, response=response, db=db_session
+                )
+                for response in responses
+            )
+        )
+
+    # the queries of a single request for the three of them
+    assert stats.count == single.count
+    assert coalesced_requests.value(labels) == followers_before + 2
+    assert {response.headers["ETag"] for response in responses} == {
+        responses[0].headers["ETag"]
+    }
+    assert [len(result["data"]) for result in results] == [1, 1, 1]
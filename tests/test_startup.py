@@ -0,0 +1,22 @@
+import pytest
+
+from benchmarks.startup import (
+    FIRST_REQUEST_BUDGET_SECONDS,
+    IMPORT_BUDGET_SECONDS,
+    cold_start,
+)
+
+# python -m pytest tests/test_startup.py
+
+
+@pytest.mark.parametrize("mode", ["upgrade", "check", "skip"])
+def test_cold_start_stays_within_budget(tmp_path, mode):
+    database = str(tmp_path / "startup.db")
+    # the first start creates the database
+    cold_start(database, "upgrade")
+
+    result = cold_start(database, mode)
+
+    assert result["first_request_status"] == 200
+    assert result["import_seconds"] < IMPORT_BUDGET_SECONDS
+    assert result["first_request_seconds"] < FIRST_REQUEST_BUDGET_SECONDS
@@ -0,0 +1,201 @@
+import datetime
+
+import pytest
+from fastapi import HTTPException, Response
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from conftest import create_test_candidate
+from src.api.v1.routes.candidate import list_candidates
+from src.api.v1.routes.feedback import submit_feedback
+from src.api.v1.routes.interview import create_schedule_interview
+from src.etag import NotModified
+from src.models.models import CandidateModel, ChangeLogModel, InterviewModel
+from src.schemas.candidate import CandidateSortEnum
+from src.schemas.feedback import FeedbackCreate
+from src.schemas.interview import InterviewCreate
+from src.summaries import rebuild_summaries
+
+# python -m pytest tests/test_summaries.py
+
+
+async def _interview(db_session, candidate_id, day, rating=None):
+    interview = await create_schedule_interview(
+        candidate_id=candidate_id,
+        interview=InterviewCreate(
+            interviewer=f"interviewer-{candidate_id}",
+            scheduled_at=datetime.datetime(2030, 1, day, 9),
+        ),
+        db=db_session,
+    )
+    if rating is not None:
+        await submit_feedback(
+            interview_id=interview["data"].id,
+            feedback_data=FeedbackCreate(rating=rating, comment="ok"),
+            db=db_session,
+        )
+    return interview["data"].id
+
+
+async def _summary(db_session, candidate_id):
+    summary_query_result = await db_session.execute(
+        select(
+            CandidateModel.interview_count,
+            CandidateModel.feedback_count,
+            CandidateModel.rating_total,
+            CandidateModel.average_rating,
+            CandidateModel.last_interview_at,
+        ).where(CandidateModel.id == candidate_id)
+    )
+    return tuple(summary_query_result.one())
+
+
+@pytest.mark.asyncio
+async def test_writes_maintain_candidate_summaries(db_session: AsyncSession):
+    candidate_id = await create_test_candidate(db_session)
+    assert await _summary(db_session, candidate_id) == (0, 0, 0, None, None)
+
+    await _interview(db_session, candidate_id, 3, rating=5)
+    latest_id = await _interview(db_session, candidate_id, 9, rating=2)
+    await _interview(db_session, candidate_id, 5)
+
+    assert await _summary(db_session, candidate_id) == (
+        3,
+        2,
+        7,
+        3.5,
+        datetime.datetime(2030, 1, 9, 9),
+    )
+
+    # deleting an interview cascades to its feedback
+    await db_session.execute(
+        InterviewModel.__table__.delete().where(InterviewModel.id == latest_id)
+    )
+    await db_session.commit()
+
+    assert await _summary(db_session, candidate_id) == (
+        2,
+        1,
+        5,
+        5.0,
+        datetime.datetime(2030, 1, 5, 9),
+    )
+
+
+@pytest.mark.asyncio
+async def test_summaries_are_not_logged_as_candidate_changes(
+    db_session: AsyncSession,
+):
+    candidate_id = await create_test_candidate(db_session)
+    await _interview(db_session, candidate_id, 3, rating=4)
+
+    change_query_result = await db_session.execute(
+        select(ChangeLogModel.entity, ChangeLogModel.operation).order_by(
+            ChangeLogModel.seq
+        )
+    )
+    assert change_query_result.all() == [
+        ("candidate", "upsert"),
+        ("interview", "upsert"),
+        ("feedback", "upsert"),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_rebuild_summaries_recomputes_from_scratch(db_session: AsyncSession):
+    candidate_id = await create_test_candidate(db_session)
+    await _interview(db_session, candidate_id, 3, rating=4)
+    expected = await _summary(db_session, candidate_id)
+
+    await db_session.execute(
+        text(
+            "UPDATE candidates SET interview_count = 42, feedback_count = 0, "
+            "rating_total = 0, average_rating = NULL, last_interview_at = NULL"
+        )
+    )
+    connection = await db_session.connection()
+    assert await connection.run_sync(rebuild_summaries) == 1
+    await db_session.commit()
+
+    assert await _summary(db_session, candidate_id) == expected
+
+
+@pytest.mark.asyncio
+async def test_list_candidates_sorted_by_average_rating(db_session: AsyncSession):
+    ratings = {1: 5, 2: 3, 3: 4, 4: 3, 5: None}
+    candidate_ids = {}
+    for index, rating in ratings.items():
+        candidate_ids[index] = await create_test_candidate(
+            db_session, email=f"user{index}@example.com"
+        )
+        await _interview(db_session, candidate_ids[index], index, rating=rating)
+    db_session.expire_all()
+
+    seen = []
+    after = None
+    while True:
+        response = await list_candidates(
+            response=Response(),
+            limit=2,
+            after=after,
+            sort=CandidateSortEnum.AVERAGE_RATING,
+            db=db_session,
+        )
+        seen.extend((c.average_rating, c.id) for c in response["data"])
+        after = response["next_cursor"]
+        if after is None:
+            break
+
+    # highest first, ties by id, candidates without feedback left out
+    assert seen == sorted(
+        ((float(ratings[index]), candidate_ids[index]) for index in (1, 2, 3, 4)),
+        reverse=True,
+    )
+
+    response = await list_candidates(
+        response=Response(), min_rating=4, db=db_session
+    )
+    assert sorted(c.id for c in response["data"]) == sorted(
+        [candidate_ids[1], candidate_ids[3]]
+    )
+
+    response = await list_candidates(
+        response=Response(),
+        limit=1,
+        sort=CandidateSortEnum.LAST_INTERVIEW_AT,
+        db=db_session,
+    )
+    [most_recent] = response["data"]
+    assert most_recent.id == candidate_ids[5]
+    assert most_recent.interview_count == 1
+
+    # a cursor only continues the sort order it was made for
+    with pytest.raises(HTTPException) as exc_info:
+        await list_candidates(
+            response=Response(),
+            after=response["next_cursor"],
+            sort=CandidateSortEnum.AVERAGE_RATING,
+            db=db_session,
+        )
+    assert exc_info.value.status_code == 400
+
+    response = await list_candidates(
+        response=Response(),
+        after=response["next_cursor"],
+        sort=CandidateSortEnum.LAST_INTERVIEW_AT,
+        db=db_session,
+    )
+    assert len(response["data"]) == 4
+
+    # the version query of a conditional GET follows the same order
+    first_page = Response()
+    await list_candidates(
+        response=first_page, sort=CandidateSortEnum.AVERAGE_RATING, db=db_session
+    )
+    with pytest.raises(NotModified):
+        await list_candidates(
+            response=Response(),
+            sort=CandidateSortEnum.AVERAGE_RATING,
+            if_none_match=first_page.headers["ETag"],
+            db=db_session,
+        )